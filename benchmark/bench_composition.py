@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Составной режим против отдельных процессов
+
+Запускает на симуляционном бэкенде либо hardware_node + room_explorer
+(+ servo_controller) отдельными процессами, либо robot_composed, и за
+время прогона снимает:
+- процессорное время (utime + stime всех процессов дерева, /proc)
+- память (суммарный VmRSS)
+- задержку эхо -> запись в мотор и эхо -> /cmd_vel из /diagnostics
+  (LatencyTrace узла hardware_node)
+
+Нужно окружение ROS 2 с собранным пакетом:
+
+    python3 benchmark/bench_composition.py --duration 30
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import time
+
+import rclpy
+from diagnostic_msgs.msg import DiagnosticArray
+
+SETUPS = {
+    'separate': [['ros2', 'run', 'my_robot', 'hardware_node'],
+                 ['ros2', 'run', 'my_robot', 'room_explorer'],
+                 ['ros2', 'run', 'my_robot', 'servo_controller']],
+    'composed': [['ros2', 'run', 'my_robot', 'robot_composed']],
+}
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def process_tree(root):
+    """pid процесса и всех его потомков"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    pids, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def sample(pids):
+    """(процессорное время с, RSS байт) по списку процессов"""
+    cpu = rss = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            cpu += int(fields[11]) + int(fields[12])
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        rss += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return cpu / CLOCK_TICKS, rss
+
+
+class LatencyListener:
+    """Последние значения задержек hardware_node из /diagnostics"""
+
+    def __init__(self, node):
+        self.values = {}
+        self.subscription = node.create_subscription(
+            DiagnosticArray, '/diagnostics', self.callback, 10)
+
+    def callback(self, msg):
+        for status in msg.status:
+            if status.name.endswith('hardware_node: latency'):
+                for item in status.values:
+                    if item.key.startswith(('echo_to_motor', 'echo_to_cmd')):
+                        self.values.setdefault(item.key, []).append(int(item.value))
+
+
+def run(name, duration, node):
+    env = dict(os.environ, MY_ROBOT_BACKEND='sim', MY_ROBOT_SIM_EPOCH=repr(time.monotonic()))
+    procs = [subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL, start_new_session=True)
+             for cmd in SETUPS[name]]
+    listener = LatencyListener(node)
+    time.sleep(5.0)  # Запуск и обнаружение узлов
+
+    pids = [pid for proc in procs for pid in process_tree(proc.pid)]
+    cpu_start, _ = sample(pids)
+    rss_max = 0
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        rclpy.spin_once(node, timeout_sec=0.5)
+        rss_max = max(rss_max, sample(pids)[1])
+    cpu_end, _ = sample(pids)
+    node.destroy_subscription(listener.subscription)
+
+    for proc in procs:
+        os.killpg(proc.pid, signal.SIGINT)
+    for proc in procs:
+        proc.wait(timeout=10)
+    # Без сводок задержки сравнение неполное: лучше ошибка, чем null в отчёте
+    if not listener.values:
+        raise RuntimeError(f'{name}: нет статуса hardware_node: latency в /diagnostics '
+                           f'за {duration} с (узлы не запустились?)')
+
+    def median(key):
+        values = [v for v in listener.values.get(key, []) if v > 0]
+        return sorted(values)[len(values) // 2] if values else None
+
+    return {
+        'cpu_percent': round((cpu_end - cpu_start) / duration * 100.0, 1),
+        'rss_mb': round(rss_max / 2 ** 20, 1),
+        'echo_to_cmd_p50_us': median('echo_to_cmd_p50_us'),
+        'echo_to_motor_p50_us': median('echo_to_motor_p50_us'),
+        'echo_to_motor_p99_us': median('echo_to_motor_p99_us'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--output', help='Дополнительно сохранить JSON в файл')
+    args = parser.parse_args()
+
+    rclpy.init()
+    node = rclpy.create_node('bench_composition')
+    results = {name: run(name, args.duration, node) for name in SETUPS}
+    node.destroy_node()
+    rclpy.shutdown()
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
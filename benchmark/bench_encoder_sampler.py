@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк опроса энкодеров
+
+Сравнивает потоки на каждый пин (EncoderCounter без опросчика) и общий
+GpioSampler на синтетическом меандре: загрузка CPU и точность счёта тиков.
+Для опросчика оценка missed_edges сверяется с фактически потерянными
+фронтами (сгенерировано минус насчитано, сумма по пинам): расхождение
+больше MISSED_TOLERANCE - ошибка. Результат печатается в JSON.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from shims import install_fake_gpio, install_fake_motorhat, make_bank, PulseTrain
+
+PINS = (12, 26)
+MISSED_TOLERANCE = 0.25  # Допустимая относительная ошибка missed_edges
+
+
+def run_case(bank, mode, frequency, duration):
+    """Один прогон: mode = 'threads' или 'sampler'"""
+    from my_robot.hardware.encoder_counter import EncoderCounter
+    from my_robot.hardware.gpio_sampler import GpioSampler
+
+    bank.write_levels(0xFFFFFFFF)  # Все пины в 1 перед прогоном
+    sampler = None
+    if mode == 'sampler':
+        sampler = GpioSampler(bank)
+        sampler.start()
+
+    counters = [EncoderCounter(pin, sampler=sampler) for pin in PINS]
+    train = PulseTrain(bank, PINS, frequency)
+
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    train.start()
+    time.sleep(duration)
+    train.stop()
+    time.sleep(0.01)  # Дать опросу увидеть последний фронт
+    wall = time.monotonic() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    counts = [c.get_count() for c in counters]
+    for c in counters:
+        c.stop()
+    result = {
+        'mode': mode,
+        'frequency_hz': frequency,
+        'cpu_percent': 100.0 * cpu / wall,
+        'expected_ticks': train.falling_edges,
+        'counted_ticks': counts,
+        'tick_error': [train.falling_edges - n for n in counts],
+    }
+    if sampler is not None:
+        sampler.stop()
+        result['sampler'] = sampler.stats()
+        lost = sum(result['tick_error'])
+        estimated = sampler.missed_edges
+        result['lost_edges'] = lost
+        # Последний фронт может потеряться без следующего, который бы это выдал
+        assert abs(estimated - lost) <= max(len(PINS) * 2, MISSED_TOLERANCE * lost), (
+            f'{frequency} Гц: missed_edges={estimated}, потеряно {lost}')
+    return result
+
+
+def baseline_cpu(bank, frequency, duration):
+    """Загрузка CPU самим генератором импульсов"""
+    bank.write_levels(0xFFFFFFFF)
+    train = PulseTrain(bank, PINS, frequency)
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    train.start()
+    time.sleep(duration)
+    train.stop()
+    return 100.0 * (time.process_time() - cpu_start) / (time.monotonic() - wall_start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--freq', type=float, nargs='+', default=[20.0, 100.0, 400.0])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bank = make_bank(os.path.join(tmp, 'gpiomem'))
+        install_fake_gpio(bank)
+        install_fake_motorhat()
+
+        results = []
+        for frequency in args.freq:
+            base = baseline_cpu(bank, frequency, args.duration)
+            for mode in ('threads', 'sampler'):
+                case = run_case(bank, mode, frequency, args.duration)
+                case['generator_cpu_percent'] = base
+                case['net_cpu_percent'] = case['cpu_percent'] - base
+                results.append(case)
+        print(json.dumps(results, indent=2))
+        bank.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Цена записи события EventRecorder
+
+Время на событие (фронт энкодера) и выделения памяти на горячем пути
+(tracemalloc), ротация при заполнении файлов и скорость чтения записи:
+
+    PYTHONPATH=. python3 benchmark/bench_event_recorder.py --events 200000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('MY_ROBOT_BACKEND', 'sim')
+
+from my_robot.hardware.event_recorder import EventRecorder, read_files  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--capacity', type=int, default=65536)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = EventRecorder(directory, args.capacity, max_files=1000)
+        edge = recorder.edge
+        timestamp = time.monotonic()
+
+        start = time.perf_counter()
+        for i in range(args.events):
+            edge(timestamp, 12, 1)
+        per_event_ns = (time.perf_counter() - start) / args.events * 1e9
+
+        # Выделения на горячем пути (без ротации: файл уже открыт)
+        count = min(10000, args.capacity // 2)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for i in range(count):
+            edge(timestamp, 12, 1)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename')
+                        if stat.size_diff > 0)
+        recorder.close()
+
+        paths = [os.path.join(directory, name) for name in os.listdir(directory)]
+        start = time.perf_counter()
+        total = sum(1 for _ in read_files(paths))
+        read_s = time.perf_counter() - start
+
+    print(json.dumps({
+        'write_ns_per_event': round(per_event_ns, 1),
+        'bytes_allocated_per_event': round(allocated / count, 2),
+        'files': recorder.files,
+        'records_read': total,
+        'read_events_per_sec': round(total / read_s),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
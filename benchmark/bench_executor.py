@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Задержка /cmd_vel -> запись в мотор под нагрузкой фоновой группы
+
+hardware_node на симуляционном бэкенде (в отдельном процессе на каждый
+вариант executor'а) получает команды 50 Гц с меткой cmd_vel/trace,
+поставленной перед публикацией. Фоновая группа насыщена: датчики
+публикуются по таймеру, сонар на максимальной частоте, и таймер
+нагрузки занимает load от каждого периода 10 мс (обработка датчиков).
+Задержка - от публикации команды до записи в Motor HAT (колбэк
+трассировки выходного каскада), p50 / p99 / max в микросекундах.
+
+Нужно окружение ROS 2 с собранным пакетом:
+
+    python3 benchmark/bench_executor.py --duration 20 --load 0.8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+VARIANTS = {
+    'single': ['executor:=single'],
+    'multi_gil_5ms': ['executor:=multi', 'gil_switch_interval:=0.005'],
+    'multi_gil_1ms': ['executor:=multi', 'gil_switch_interval:=0.001'],
+}
+LOAD_PERIOD = 0.01
+
+
+def summarize(samples):
+    """p50 / p99 / max в микросекундах"""
+    if not samples:
+        return {'count': 0, 'p50_us': None, 'p99_us': None, 'max_us': None}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        'count': len(ordered),
+        'p50_us': round(ordered[last // 2] * 1e6),
+        'p99_us': round(ordered[int(0.99 * last)] * 1e6),
+        'max_us': round(ordered[-1] * 1e6),
+    }
+
+
+def run_variant(params, duration, load):
+    """Один прогон (в дочернем процессе): задержки в секундах"""
+    import rclpy
+    from geometry_msgs.msg import Twist
+    from rclpy.executors import SingleThreadedExecutor
+    from std_msgs.msg import Header
+
+    from my_robot.hardware.hardware_node import HardwareNode
+
+    args = ['--ros-args']
+    for param in params + ['sensor_publish:=timer', 'motor_output_rate:=1000.0',
+                           'sonar_min_rate:=30.0', 'sonar_max_rate:=30.0']:
+        args += ['-p', param]
+    rclpy.init(args=args)
+    node = HardwareNode()
+    node.wait_for_hardware(10.0)
+
+    # Задержка до записи в мотор; origin - момент публикации команды
+    latencies = []
+    node.motor_output.trace_callback = lambda origin, write_time: latencies.append(write_time - origin)
+
+    busy = load * LOAD_PERIOD
+
+    def sensor_load():
+        end = time.perf_counter() + busy
+        while time.perf_counter() < end:
+            pass
+
+    node.create_timer(LOAD_PERIOD, sensor_load, callback_group=node.background_group)
+
+    driver = rclpy.create_node('bench_executor_driver')
+    cmd_pub = driver.create_publisher(Twist, 'cmd_vel', 10)
+    trace_pub = driver.create_publisher(Header, 'cmd_vel/trace', 10)
+    executor = node.create_executor()
+    executor.add_node(node)
+    spinner = threading.Thread(target=executor.spin, daemon=True)
+    spinner.start()
+    driver_executor = SingleThreadedExecutor()
+    driver_executor.add_node(driver)
+    threading.Thread(target=driver_executor.spin, daemon=True).start()
+    time.sleep(2.0)  # Обнаружение издателей
+
+    msg = Twist()
+    trace = Header()
+    end = time.monotonic() + duration
+    count = 0
+    while time.monotonic() < end:
+        # Скорость чередуется: каждая команда - новая запись в мотор
+        msg.linear.x = 0.1 if count % 2 else 0.2
+        trace.stamp = driver.get_clock().now().to_msg()
+        trace_pub.publish(trace)
+        cmd_pub.publish(msg)
+        count += 1
+        time.sleep(0.02)
+    time.sleep(0.2)
+
+    node.stop_all()
+    executor.shutdown()
+    driver_executor.shutdown()
+    rclpy.shutdown()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--load', type=float, default=0.8,
+                        help='доля периода 10 мс, занятая фоновой группой')
+    parser.add_argument('--variant', choices=sorted(VARIANTS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(VARIANTS[args.variant], args.duration, args.load)))
+        return
+
+    results = {}
+    env = dict(os.environ, MY_ROBOT_BACKEND='sim')
+    for name in VARIANTS:
+        output = subprocess.run(
+            [sys.executable, __file__, '--variant', name,
+             '--duration', str(args.duration), '--load', str(args.load)],
+            env=env, capture_output=True, text=True, check=True).stdout
+        results[name] = summarize(json.loads(output.strip().splitlines()[-1]))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Нагрузка парка роботов на один сегмент сети
+
+Запускает N симулированных роботов (MY_ROBOT_BACKEND=sim, у каждого
+своё пространство имён /robotK и префикс кадров robotK/): по процессу
+robot_composed на робота (--mode composed) или hardware_node и
+room_explorer отдельными процессами (--mode separate). Симуляция
+железа - одна на процесс, поэтому робот не делит процесс с другими.
+Узлы работают по системному времени (без use_sim_time и /clock), эпоха
+симуляции общая для всех роботов прогона.
+Для каждого N снимает:
+- время обнаружения: от запуска до первой odom от всех роботов
+- суммарную частоту и объём (сериализованные байты) odom,
+  sensors/distance и cmd_vel
+- задержку доставки odom (метка -> приём подписчиком) и эхо -> мотор
+  (LatencyTrace hardware_node из /diagnostics, медиана по роботам)
+- процессорное время и память всех процессов роботов
+
+Нужно окружение ROS 2 с собранным пакетом:
+
+    python3 benchmark/bench_fleet.py --robots 1,2,4,8 --duration 20
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import time
+
+import rclpy
+from diagnostic_msgs.msg import DiagnosticArray
+from geometry_msgs.msg import Twist
+from nav_msgs.msg import Odometry
+from rclpy.qos import QoSProfile, QoSReliabilityPolicy
+from rclpy.serialization import deserialize_message
+from sensor_msgs.msg import Range
+
+from bench_composition import process_tree, sample
+
+TOPICS = {'odom': Odometry, 'sensors/distance': Range, 'cmd_vel': Twist}
+COMMANDS = {
+    'composed': [['ros2', 'run', 'my_robot', 'robot_composed']],
+    'separate': [['ros2', 'run', 'my_robot', 'hardware_node'],
+                 ['ros2', 'run', 'my_robot', 'room_explorer']],
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(len(values) * fraction), len(values) - 1)], 2)
+
+
+class FleetListener:
+    """Сырые подписки на топики всех роботов и /diagnostics"""
+
+    def __init__(self, node, robots):
+        self.node = node
+        self.counts = dict.fromkeys(TOPICS, 0)
+        self.bytes = dict.fromkeys(TOPICS, 0)
+        self.first_odom = {}
+        self.odom_latency_ms = []
+        self.echo_to_motor_us = {}
+        self.measuring = False
+        qos = QoSProfile(depth=10, reliability=QoSReliabilityPolicy.BEST_EFFORT)
+        self.subscriptions = [node.create_subscription(
+            DiagnosticArray, '/diagnostics', self.diagnostics_callback, 10)]
+        for robot in robots:
+            for topic, msg_type in TOPICS.items():
+                self.subscriptions.append(node.create_subscription(
+                    msg_type, f'/{robot}/{topic}',
+                    lambda raw, robot=robot, topic=topic: self.callback(robot, topic, raw),
+                    qos, raw=True))
+
+    def callback(self, robot, topic, raw):
+        if topic == 'odom':
+            if robot not in self.first_odom:
+                self.first_odom[robot] = time.monotonic()
+            if self.measuring:
+                msg = deserialize_message(raw, Odometry)
+                stamp = msg.header.stamp.sec * 1e9 + msg.header.stamp.nanosec
+                latency = (self.node.get_clock().now().nanoseconds - stamp) * 1e-6
+                self.odom_latency_ms.append(latency)
+        if self.measuring:
+            self.counts[topic] += 1
+            self.bytes[topic] += len(raw)
+
+    def diagnostics_callback(self, msg):
+        for status in msg.status:
+            if status.name.endswith('hardware_node: latency'):
+                for item in status.values:
+                    if item.key == 'echo_to_motor_p50_us' and int(item.value) > 0:
+                        self.echo_to_motor_us[status.name] = int(item.value)
+
+    def close(self):
+        for subscription in self.subscriptions:
+            self.node.destroy_subscription(subscription)
+
+
+def run(count, mode, duration, node):
+    robots = [f'robot{i}' for i in range(count)]
+    listener = FleetListener(node, robots)
+    start = time.monotonic()
+    env = dict(os.environ, MY_ROBOT_BACKEND='sim', MY_ROBOT_SIM_EPOCH=repr(start))
+    procs = []
+    for robot in robots:
+        args = ['--ros-args', '-r', f'__ns:=/{robot}', '-p', f'frame_prefix:={robot}/']
+        for command in COMMANDS[mode]:
+            procs.append(subprocess.Popen(
+                command + args, env=env, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, start_new_session=True))
+
+    # Обнаружение: пока все роботы не прислали odom
+    deadline = start + 30.0 + count
+    while len(listener.first_odom) < count and time.monotonic() < deadline:
+        rclpy.spin_once(node, timeout_sec=0.05)
+    discovery = (max(listener.first_odom.values()) - start) if len(listener.first_odom) == count else None
+
+    pids = [pid for proc in procs for pid in process_tree(proc.pid)]
+    cpu_start, _ = sample(pids)
+    rss_max = 0
+    listener.measuring = True
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        rclpy.spin_once(node, timeout_sec=0.1)
+        rss_max = max(rss_max, sample(pids)[1])
+    listener.measuring = False
+    cpu_end, _ = sample(pids)
+    listener.close()
+
+    for proc in procs:
+        os.killpg(proc.pid, signal.SIGINT)
+    for proc in procs:
+        proc.wait(timeout=15)
+
+    cpu_percent = (cpu_end - cpu_start) / duration * 100.0
+    echo_to_motor = list(listener.echo_to_motor_us.values())
+    return {
+        'robots': count,
+        'processes': len(procs),
+        'discovery_s': round(discovery, 2) if discovery is not None else None,
+        'msgs_per_sec': {topic: round(n / duration, 1) for topic, n in listener.counts.items()},
+        'kbytes_per_sec': round(sum(listener.bytes.values()) / duration / 1024, 1),
+        'odom_latency_p50_ms': percentile(listener.odom_latency_ms, 0.5),
+        'odom_latency_p99_ms': percentile(listener.odom_latency_ms, 0.99),
+        'echo_to_motor_p50_us': percentile(echo_to_motor, 0.5),
+        'cpu_percent': round(cpu_percent, 1),
+        'cpu_percent_per_robot': round(cpu_percent / count, 1),
+        'rss_mb': round(rss_max / 2 ** 20, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--robots', default='1,2,4,8', help='Размеры парка через запятую')
+    parser.add_argument('--mode', choices=sorted(COMMANDS), default='composed')
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--output', help='Дополнительно сохранить JSON в файл')
+    args = parser.parse_args()
+
+    rclpy.init()
+    node = rclpy.create_node('bench_fleet')
+    results = [run(int(n), args.mode, args.duration, node) for n in args.robots.split(',')]
+    node.destroy_node()
+    rclpy.shutdown()
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Число I2C-транзакций к Motor HAT: прямая запись против выходного каскада
+
+Прежняя схема на каждую команду /cmd_vel делала setSpeed + run для обоих
+моторов (24 транзакции). Выходной каскад пропускает повторы, сливает
+частые команды и пишет изменённые каналы одним блоком. Запускается на
+симуляционном бэкенде, транзакции считает имитация PCA9685.
+
+Перед замером - проверка сброса микросхемы: после PWM() на том же адресе
+(сервоприводы в этом процессе) и после обнуления каналов другим процессом
+та же команда снова доходит до моторов:
+
+    PYTHONPATH=. python3 benchmark/bench_motor_output.py
+"""
+
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault('MY_ROBOT_BACKEND', 'sim')
+
+from my_robot.hardware.hal import Raspi_MotorHAT, sim  # noqa: E402
+from my_robot.hardware.motor_output import MOTOR_CHANNELS, MotorOutputStage  # noqa: E402
+from my_robot.hardware.servos import Servos  # noqa: E402
+
+FORWARD = Raspi_MotorHAT.FORWARD
+BACKWARD = Raspi_MotorHAT.BACKWARD
+
+# Сценарии: имя -> (частота команд Гц, функция номер -> команда)
+SCENARIOS = {
+    # Телеуправление: одна и та же команда повторяется
+    'steady_20hz': (20.0, lambda i: ((FORWARD, 180), (FORWARD, 180))),
+    # Исследователь: скорость меняется редко, направление - на поворотах
+    'explorer_10hz': (10.0, lambda i: ((FORWARD, 160), (FORWARD if i % 20 < 15 else BACKWARD, 160))),
+    # Шумный джойстик на высокой частоте
+    'jitter_200hz': (200.0, lambda i: ((FORWARD, 150 + i % 5), (FORWARD, 150 + (i * 3) % 7))),
+}
+
+
+def run_direct(hat, rate, command, duration):
+    left, right = hat.getMotor(1), hat.getMotor(2)
+    period = 1.0 / rate
+    for i in range(int(duration * rate)):
+        (mode_l, speed_l), (mode_r, speed_r) = command(i)
+        left.setSpeed(speed_l)
+        left.run(mode_l)
+        right.setSpeed(speed_r)
+        right.run(mode_r)
+        time.sleep(period)
+
+
+def run_stage(stage, rate, command, duration):
+    period = 1.0 / rate
+    for i in range(int(duration * rate)):
+        stage.submit(*command(i))
+        time.sleep(period)
+    time.sleep(stage.min_interval * 2)
+
+
+def motor_duty(chip):
+    """Скважность ШИМ моторов 1 и 2"""
+    return [chip.duty(MOTOR_CHANNELS[motor][0]) for motor in (1, 2)]
+
+
+def check_chip_reset(hat, chip):
+    """Команда восстанавливается после сброса PCA9685 (иначе AssertionError)"""
+    command = ((FORWARD, 180), (FORWARD, 180))
+    stage = MotorOutputStage(hat, refresh_period=0.2)
+    stage.start()
+    stage.submit(*command)
+    time.sleep(0.05)
+    written = motor_duty(chip)
+    assert min(written) > 0, written
+
+    # Сервоприводы в этом процессе: PWM() обнуляет каналы, каскад пишет заново
+    Servos(hat._pwm.address)
+    assert motor_duty(chip) == [0, 0]
+    stage.submit(*command)
+    time.sleep(0.05)
+    assert motor_duty(chip) == written, motor_duty(chip)
+
+    # Другой процесс (servo_controller): только периодическая запись
+    chip.write_list(0, [0] * 70)
+    stage.submit(*command)
+    time.sleep(0.05)
+    assert motor_duty(chip) == [0, 0]
+    time.sleep(0.3)
+    assert motor_duty(chip) == written, motor_duty(chip)
+    refreshes = stage.stats()['refreshes']
+    stage.stop()
+    return {'restored': True, 'refreshes': refreshes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=2.0)
+    parser.add_argument('--max-rate', type=float, default=50.0)
+    args = parser.parse_args()
+
+    hat = Raspi_MotorHAT(addr=0x6F)
+    chip = sim.world.motor_chip
+    results = {'chip_reset': check_chip_reset(hat, chip)}
+
+    stage = MotorOutputStage(hat, max_rate=args.max_rate)
+    stage.start()
+    for name, (rate, command) in SCENARIOS.items():
+        stage.release()
+        time.sleep(stage.min_interval * 2)
+        start = chip.transactions
+        run_direct(hat, rate, command, args.duration)
+        direct = chip.transactions - start
+
+        stage.stats()
+        start = chip.transactions
+        run_stage(stage, rate, command, args.duration)
+        staged = chip.transactions - start
+        stats = stage.stats()
+        results[name] = {
+            'commands': int(args.duration * rate),
+            'direct_transactions': direct,
+            'stage_transactions': staged,
+            'reduction': round(direct / max(staged, 1), 1),
+            'cmd_to_wheel_p99_us': stats['cmd_to_wheel_p99_us'],
+        }
+    stage.stop()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
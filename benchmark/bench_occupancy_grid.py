@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Цена обновления карты занятости на одно измерение (три конуса)
+
+Робот объезжает комнату симуляции (Room) по траектории-"змейке" или
+проезжает Г-образный коридор (--layout corridor, здесь видна экономия
+памяти плиток), конусы трёх датчиков считаются трассировкой лучей. Печатаются время обновления
+на скан (p50/p99/max), память плиток против плотной карты охватывающего
+прямоугольника и доля клеток стен, отмеченных занятыми. На Raspberry Pi
+запускать так же:
+
+    PYTHONPATH=. python3 benchmark/bench_occupancy_grid.py --room-size 6
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+
+os.environ.setdefault('MY_ROBOT_BACKEND', 'sim')
+
+from my_robot.hardware.hal.sim_world import Room  # noqa: E402
+from my_robot.mapping.occupancy_grid import SENSOR_MOUNTS, SparseLogOddsGrid  # noqa: E402
+
+FOV = 0.26
+MAX_RANGE = 2.0
+
+
+def poses(width, height, step=0.05, margin=0.4):
+    """Змейка по комнате: (x, y, theta)"""
+    w, h = width / 2.0 - margin, height / 2.0 - margin
+    y = -h
+    direction = 1
+    while y <= h:
+        x = -w if direction > 0 else w
+        while -w <= x <= w:
+            yield x, y, 0.0 if direction > 0 else math.pi
+            x += step * direction
+        y += 0.5
+        direction = -direction
+
+
+def corridor(length, width=1.0, step=0.05):
+    """Г-образный коридор: комната и путь по осевой линии"""
+    w = width / 2.0
+    walls = [
+        ((-w, -w), (length + w, -w)), ((length + w, -w), (length + w, length)),
+        ((-w, w), (length - w, w)), ((length - w, w), (length - w, length)),
+        ((-w, -w), (-w, w)), ((length - w, length), (length + w, length)),
+    ]
+    path = [(k * step, 0.0, 0.0) for k in range(int(length / step))]
+    path += [(length, k * step, math.pi / 2) for k in range(int((length - w) / step))]
+    return Room(walls), path
+
+
+def scan(room, pose):
+    """Измерения трёх датчиков в позе: [(sx, sy, yaw, distance)]"""
+    x, y, theta = pose
+    cos_t, sin_t = math.cos(theta), math.sin(theta)
+    readings = []
+    for mx, my, myaw in SENSOR_MOUNTS.values():
+        sx = x + mx * cos_t - my * sin_t
+        sy = y + mx * sin_t + my * cos_t
+        yaw = theta + myaw
+        distance = min(room.raycast(sx, sy, yaw + a, MAX_RANGE)
+                       for a in (-FOV / 2, 0.0, FOV / 2))
+        readings.append((sx, sy, yaw, distance))
+    return readings
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--room-size', type=float, default=6.0)
+    parser.add_argument('--resolution', type=float, default=0.05)
+    parser.add_argument('--tile-size', type=int, default=32)
+    parser.add_argument('--layout', choices=('room', 'corridor'), default='room')
+    args = parser.parse_args()
+
+    size = args.room_size
+    if args.layout == 'corridor':
+        room, path = corridor(size)
+    else:
+        room = Room.rectangle(size, size * 0.8, obstacles=[(0.5, 0.3, 0.4), (-1.0, -0.6, 0.3)])
+        path = poses(size, size * 0.8)
+    grid = SparseLogOddsGrid(args.resolution, args.tile_size)
+    scans = [scan(room, pose) for pose in path]
+
+    times = []
+    for readings in scans:
+        start = time.perf_counter()
+        for sx, sy, yaw, distance in readings:
+            grid.update_cone(sx, sy, yaw, distance, FOV, MAX_RANGE)
+        times.append((time.perf_counter() - start) * 1e6)
+
+    tx0, ty0, tx1, ty1 = grid.bounds()
+    dense = (tx1 - tx0 + 1) * (ty1 - ty0 + 1) * args.tile_size ** 2 * 4
+
+    # Клетки стен (без препятствий), отмеченные как занятые
+    data = grid.render(tx0, ty0, tx1, ty1)
+    res = args.resolution
+    origin_x = tx0 * args.tile_size * res
+    origin_y = ty0 * args.tile_size * res
+    wall_cells = detected = 0
+    walls = room.walls if args.layout == 'corridor' else room.walls[:4]
+    for x1, y1, x2, y2 in walls:
+        length = math.hypot(x2 - x1, y2 - y1)
+        for k in range(int(length / res)):
+            px = x1 + (x2 - x1) * k * res / length
+            py = y1 + (y2 - y1) * k * res / length
+            col = int((px - origin_x) / res)
+            row = int((py - origin_y) / res)
+            wall_cells += 1
+            window = data[max(row - 1, 0):row + 2, max(col - 1, 0):col + 2]
+            if (window > 50).any():
+                detected += 1
+
+    print(json.dumps({
+        'scans': len(scans),
+        'update_us_per_scan_p50': round(percentile(times, 0.5), 1),
+        'update_us_per_scan_p99': round(percentile(times, 0.99), 1),
+        'update_us_per_scan_max': round(max(times), 1),
+        'tiles': len(grid.tiles),
+        'tile_memory_bytes': grid.memory_bytes(),
+        'bounding_box_bytes': dense,
+        'wall_cells_detected': round(detected / wall_cells, 3),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Микро-бенчмарк горячего пути одометрии
+
+Сравнивает текущий HardwareNode.update_odometry с прежней реализацией
+(get_parameter на каждом цикле, новые сообщения и ковариации, f-строка лога)
+по времени цикла и объёму временных аллокаций (tracemalloc). Нужен rclpy.
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from shims import install_fake_gpio, install_fake_motorhat, make_bank
+
+
+def legacy_update_odometry(node):
+    """Прежний update_odometry (до KinematicsModel) для сравнения"""
+    from geometry_msgs.msg import TransformStamped
+    from nav_msgs.msg import Odometry as NavOdometry
+
+    current_time = node.get_clock().now()
+    dt = (current_time - node.last_time).nanoseconds / 1e9
+    if dt < 0.001:
+        return
+    with node.encoder_lock:
+        left_ticks = node.left_encoder.get_count()
+        right_ticks = node.right_encoder.get_count()
+    diff_left = left_ticks - node.last_left_ticks
+    diff_right = right_ticks - node.last_right_ticks
+    node.last_left_ticks = left_ticks
+    node.last_right_ticks = right_ticks
+    node.last_time = current_time
+
+    wheel_diameter = node.get_parameter('wheel_diameter').value
+    ticks_per_rev = node.get_parameter('ticks_per_rev').value
+    ticks_to_m = (math.pi * wheel_diameter) / ticks_per_rev
+    dist_left = diff_left * ticks_to_m
+    dist_right = diff_right * ticks_to_m
+    wheel_base = node.get_parameter('wheel_base').value
+    dist_center = (dist_left + dist_right) / 2.0
+    delta_theta = (dist_right - dist_left) / wheel_base
+    node.theta += delta_theta
+    node.x += dist_center * math.cos(node.theta)
+    node.y += dist_center * math.sin(node.theta)
+
+    odom_msg = NavOdometry()
+    odom_msg.header.stamp = current_time.to_msg()
+    odom_msg.header.frame_id = 'odom'
+    odom_msg.child_frame_id = 'base_footprint'
+    odom_msg.pose.pose.position.x = node.x
+    odom_msg.pose.pose.position.y = node.y
+    odom_msg.pose.pose.orientation.z = math.sin(node.theta / 2.0)
+    odom_msg.pose.pose.orientation.w = math.cos(node.theta / 2.0)
+    odom_msg.pose.covariance = [0.01 if i % 7 == 0 else 0.0 for i in range(36)]
+    odom_msg.twist.twist.linear.x = dist_center / dt
+    odom_msg.twist.twist.angular.z = delta_theta / dt
+    odom_msg.twist.covariance = [0.001 if i % 7 == 0 else 0.0 for i in range(36)]
+    node.odom_pub.publish(odom_msg)
+
+    transform = TransformStamped()
+    transform.header.stamp = current_time.to_msg()
+    transform.header.frame_id = 'odom'
+    transform.child_frame_id = 'base_footprint'
+    transform.transform.translation.x = node.x
+    transform.transform.translation.y = node.y
+    transform.transform.rotation.z = math.sin(node.theta / 2.0)
+    transform.transform.rotation.w = math.cos(node.theta / 2.0)
+    node.tf_broadcaster.sendTransform(transform)
+
+    node.get_logger().info(
+        f'DEBUG: left_ticks={left_ticks}, right_ticks={right_ticks}, '
+        f'diff_l={diff_left}, diff_r={diff_right}, '
+        f'dist_l={dist_left:.4f}м, dist_r={dist_right:.4f}м',
+        throttle_duration_sec=0.5
+    )
+
+
+def measure(node, update, cycles):
+    """Время цикла (мкс) и пик временных аллокаций (байт) на цикл"""
+    times = []
+    peaks = []
+    tracemalloc.start()
+    for i in range(cycles):
+        node.left_encoder.pulse_count += 1
+        node.right_encoder.pulse_count += 2
+        time.sleep(0.0012)  # update_odometry пропускает dt < 1 мс
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        update(node)
+        times.append((time.perf_counter() - start) * 1e6)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - base)
+    tracemalloc.stop()
+    times.sort()
+    return {
+        'p50_us': statistics.median(times),
+        'p99_us': times[int(0.99 * (len(times) - 1))],
+        'max_us': times[-1],
+        'alloc_peak_bytes_p50': statistics.median(peaks),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cycles', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bank_path = os.path.join(tmp, 'gpiomem')
+        bank = make_bank(bank_path)
+        install_fake_gpio(bank)
+        install_fake_motorhat()
+
+        import rclpy
+        from my_robot.hardware.hardware_node import HardwareNode
+
+        rclpy.init(args=['--ros-args', '-p', f'gpiomem_path:={bank_path}'])
+        node = HardwareNode()
+        node.wait_for_hardware()  # Устройства поднимаются в фоне
+        for timer in list(node.timers):
+            timer.cancel()
+
+        results = {
+            'legacy': measure(node, legacy_update_odometry, args.cycles),
+            'current': measure(node, HardwareNode.update_odometry, args.cycles),
+        }
+        print(json.dumps(results, indent=2))
+
+        node.stop_all()
+        node.destroy_node()
+        rclpy.shutdown()
+        bank.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Точность и цена интегрирования одометрии
+
+Сравнивает прежнюю схему (шаг Эйлера с курсом после поворота на каждой
+публикации 30 Hz) с интегрированием на каждом тике энкодера (дуга и средняя
+точка) при публикации 30 и 10 Hz. Тики генерируются из эталонной траектории
+с быстрыми поворотами. При 20 тиках/оборот ошибку определяет квантование
+энкодера, разница схем видна на энкодерах высокого разрешения (360).
+Поток событий можно сохранить и воспроизвести:
+
+    python3 benchmark/bench_odometry_integration.py --save ticks.csv
+    python3 benchmark/bench_odometry_integration.py --replay ticks.csv
+"""
+
+import argparse
+import csv
+import json
+import math
+import time
+
+from my_robot.hardware.kinematics import KinematicsModel
+from my_robot.hardware.odometry import ARC, EULER, MIDPOINT, OdometryIntegrator, integrate_step
+
+# (длительность с, скорость левого м/с, скорость правого м/с)
+SCENARIO = [
+    (1.0, 0.3, 0.3),
+    (0.6, -0.35, 0.35),   # Разворот на месте
+    (1.0, 0.2, 0.45),     # Быстрая дуга
+    (0.8, 0.45, 0.1),
+    (0.5, 0.4, -0.4),
+    (1.5, 0.35, 0.3),
+    (0.7, -0.2, -0.35),
+]
+
+
+def generate(model, scenario):
+    """Тики (t, side, direction) и эталонные позы по сценарию"""
+    events = []
+    segments = []
+    t = 0.0
+    dist = [0.0, 0.0]
+    pose = (0.0, 0.0, 0.0)
+    mpt = model.meters_per_tick
+    for duration, v_left, v_right in scenario:
+        segments.append((t, duration, v_left, v_right, pose))
+        for side, v in ((0, v_left), (1, v_right)):
+            if v == 0:
+                continue
+            next_tick = (math.floor(dist[side] / mpt) + 1) * mpt
+            end = dist[side] + abs(v) * duration
+            while next_tick <= end:
+                events.append((t + (next_tick - dist[side]) / abs(v), side, 1 if v > 0 else -1))
+                next_tick += mpt
+            dist[side] = end
+        pose = ground_truth_step(model, pose, v_left, v_right, duration)
+        t += duration
+    events.sort()
+    return events, segments, t
+
+
+def ground_truth_step(model, pose, v_left, v_right, dt):
+    dist_center = (v_left + v_right) * 0.5 * dt
+    delta_theta = (v_right - v_left) * model.inv_wheel_base * dt
+    return integrate_step(*pose, dist_center, delta_theta, ARC)
+
+
+def ground_truth(model, segments, t):
+    """Эталонная поза в момент t"""
+    for start, duration, v_left, v_right, pose in reversed(segments):
+        if t >= start:
+            return ground_truth_step(model, pose, v_left, v_right, min(t - start, duration))
+    return 0.0, 0.0, 0.0
+
+
+def error(pose, truth):
+    dtheta = math.atan2(math.sin(pose[2] - truth[2]), math.cos(pose[2] - truth[2]))
+    return math.hypot(pose[0] - truth[0], pose[1] - truth[1]), abs(dtheta)
+
+
+def run_publish_rate(model, events, segments, total, rate):
+    """Прежняя схема: сумма тиков за период публикации, шаг Эйлера"""
+    period = 1.0 / rate
+    pose = (0.0, 0.0, 0.0)
+    errors = []
+    index = 0
+    cpu = 0.0
+    t = period
+    while t <= total:
+        start = time.perf_counter()
+        diff = [0, 0]
+        while index < len(events) and events[index][0] <= t:
+            diff[events[index][1]] += events[index][2]
+            index += 1
+        dist_center, delta_theta = model.ticks_to_motion(diff[0], diff[1])
+        pose = integrate_step(*pose, dist_center, delta_theta, EULER)
+        cpu += time.perf_counter() - start
+        errors.append(error(pose, ground_truth(model, segments, t)))
+        t += period
+    return summarize(errors, cpu, total)
+
+
+def run_per_tick(model, events, segments, total, rate, method):
+    """Интегрирование на каждом тике, публикация снимка с частотой rate"""
+    odometry = OdometryIntegrator(model, method)
+    period = 1.0 / rate
+    errors = []
+    cpu = 0.0
+    index = 0
+    t = period
+    while t <= total:
+        start = time.perf_counter()
+        while index < len(events) and events[index][0] <= t:
+            t_event, side, direction = events[index]
+            odometry.add_tick(side, t_event, direction)
+            index += 1
+        pose = odometry.pose()
+        cpu += time.perf_counter() - start
+        errors.append(error(pose, ground_truth(model, segments, t)))
+        t += period
+    return summarize(errors, cpu, total)
+
+
+def summarize(errors, cpu, total):
+    position = [e[0] for e in errors]
+    heading = [e[1] for e in errors]
+    return {
+        'position_rms_m': math.sqrt(sum(e * e for e in position) / len(position)),
+        'position_final_m': position[-1],
+        'heading_max_deg': math.degrees(max(heading)),
+        'heading_final_deg': math.degrees(heading[-1]),
+        'cpu_us_per_sim_sec': cpu * 1e6 / total,
+    }
+
+
+def save_events(path, events):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['t', 'side', 'direction'])
+        writer.writerows(events)
+
+
+def load_events(path):
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        return [(float(r['t']), int(r['side']), int(r['direction'])) for r in reader]
+
+
+def compare(model, events, segments, total):
+    """Все схемы на одном потоке тиков"""
+    return {
+        'ticks': len(events),
+        'duration_s': total,
+        'publish_rate_euler_30hz': run_publish_rate(model, events, segments, total, 30.0),
+        'publish_rate_euler_10hz': run_publish_rate(model, events, segments, total, 10.0),
+        'per_tick_arc_30hz': run_per_tick(model, events, segments, total, 30.0, ARC),
+        'per_tick_arc_10hz': run_per_tick(model, events, segments, total, 10.0, ARC),
+        'per_tick_midpoint_10hz': run_per_tick(model, events, segments, total, 10.0, MIDPOINT),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ticks-per-rev', type=int, nargs='+', default=[20, 360])
+    parser.add_argument('--save', help='сохранить поток тиков в CSV (первое разрешение)')
+    parser.add_argument('--replay', help='взять поток тиков из CSV (сценарий тот же)')
+    args = parser.parse_args()
+
+    results = {}
+    for index, ticks_per_rev in enumerate(args.ticks_per_rev):
+        model = KinematicsModel(0.12, 0.065, ticks_per_rev)
+        events, segments, total = generate(model, SCENARIO)
+        if index == 0 and args.replay:
+            events = load_events(args.replay)
+        if index == 0 and args.save:
+            save_events(args.save, events)
+        results[f'ticks_per_rev_{ticks_per_rev}'] = compare(model, events, segments, total)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
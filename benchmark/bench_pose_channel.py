@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Канал позы в разделяемой памяти против подписки на /odom
+
+- shm: писатель (отдельный процесс) пишет позу 30 Гц, читатель берёт
+  снимок 30 Гц: время read() (p50 / p99 / max, мкс; после сна - с
+  холодным кешем), возраст позы, процессорное время читателя и время
+  read() подряд (read_hot)
+- stress: писатель и читатель в отдельных процессах без пауз - число
+  несогласованных снимков (должно быть 0), повторов и отсечений по crc
+- restart: писатель перезапускается, читатель продолжает без
+  переоткрытия и видит новый generation
+- dds: издатель nav_msgs/Odometry 30 Гц и подписчик в отдельных
+  процессах: задержка доставки и процессорное время подписчика
+  (только в окружении ROS 2, иначе пропускается)
+
+    PYTHONPATH=. python3 benchmark/bench_pose_channel.py --duration 10
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from my_robot.pose_channel import PoseReader, PoseWriter
+
+RATE = 30.0
+
+
+def summarize(samples):
+    """p50 / p99 / max в микросекундах"""
+    if not samples:
+        return {'count': 0, 'p50_us': None, 'p99_us': None, 'max_us': None}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        'count': len(ordered),
+        'p50_us': round(ordered[last // 2] * 1e6, 2),
+        'p99_us': round(ordered[int(0.99 * last)] * 1e6, 2),
+        'max_us': round(ordered[-1] * 1e6, 2),
+    }
+
+
+def cpu_time():
+    times = os.times()
+    return times.user + times.system
+
+
+def write_loop(path, duration, period):
+    """Писатель: одинаковое значение во всех полях (проверка согласованности)"""
+    writer = PoseWriter(path)
+    end = time.monotonic() + duration
+    i = 0
+    while time.monotonic() < end:
+        i += 1
+        writer.write(i, float(i), float(i), float(i), float(i), float(i))
+        if period:
+            time.sleep(period)
+    writer.close()
+
+
+def read_paced(path, duration, queue):
+    reader = PoseReader(path)
+    period = 1.0 / RATE
+    latencies, ages = [], []
+    cpu_start = cpu_time()
+    end = time.monotonic() + duration
+    next_time = time.monotonic()
+    while time.monotonic() < end:
+        start = time.perf_counter()
+        snapshot = reader.read()
+        latencies.append(time.perf_counter() - start)
+        if snapshot is not None:
+            ages.append(time.monotonic() - snapshot.monotonic)
+        next_time += period
+        time.sleep(max(next_time - time.monotonic(), 0.0))
+    cpu_percent = round((cpu_time() - cpu_start) / duration * 100.0, 3)
+    hot = []
+    for _ in range(10000):
+        start = time.perf_counter()
+        reader.read()
+        hot.append(time.perf_counter() - start)
+    queue.put({
+        'read': summarize(latencies),
+        'read_hot': summarize(hot),
+        'age': summarize(ages),
+        'cpu_percent': cpu_percent,
+    })
+
+
+def read_stress(path, duration, queue):
+    reader = PoseReader(path)
+    reads = inconsistent = 0
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        snapshot = reader.read()
+        if snapshot is None:
+            continue
+        reads += 1
+        if not (snapshot.stamp_ns == snapshot.x == snapshot.y == snapshot.theta
+                == snapshot.vx == snapshot.wz):
+            inconsistent += 1
+    queue.put({'reads_per_s': round(reads / duration), 'inconsistent': inconsistent,
+               'retried': reader.retried, 'rejected': reader.rejected})
+
+
+def run_pair(path, duration, write_period, reader):
+    queue = multiprocessing.Queue()
+    writer = multiprocessing.Process(target=write_loop, args=(path, duration + 0.5, write_period))
+    writer.start()
+    time.sleep(0.2)
+    consumer = multiprocessing.Process(target=reader, args=(path, duration, queue))
+    consumer.start()
+    result = queue.get()
+    consumer.join()
+    writer.join()
+    return result
+
+
+def run_restart(path):
+    """Перезапуск писателя при живом читателе"""
+    reader = PoseReader(path)
+    generations = []
+    for _ in range(3):
+        writer = multiprocessing.Process(target=write_loop, args=(path, 0.3, 1.0 / RATE))
+        writer.start()
+        time.sleep(0.15)
+        snapshot = reader.read()
+        generations.append(None if snapshot is None else snapshot.generation)
+        writer.join()
+    return {'generations': generations, 'writer_pid_after_stop': reader.writer_pid}
+
+
+def run_dds(duration):
+    """Издатель и подписчик /odom в отдельных процессах (нужен rclpy)"""
+    try:
+        import rclpy  # noqa: F401
+    except ImportError:
+        return {'skipped': 'нет rclpy'}
+    publisher = subprocess.Popen([sys.executable, __file__, '--role', 'dds_publisher',
+                                  '--duration', str(duration + 3.0)])
+    try:
+        output = subprocess.run([sys.executable, __file__, '--role', 'dds_subscriber',
+                                 '--duration', str(duration)],
+                                capture_output=True, text=True, check=True).stdout
+    finally:
+        publisher.wait()
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def dds_role(role, duration):
+    import rclpy
+    from nav_msgs.msg import Odometry
+
+    rclpy.init()
+    node = rclpy.create_node(f'bench_pose_{role}')
+    if role == 'dds_publisher':
+        pub = node.create_publisher(Odometry, 'bench_pose/odom', 10)
+        msg = Odometry()
+
+        def publish():
+            msg.header.stamp = node.get_clock().now().to_msg()
+            msg.pose.pose.position.x += 0.001
+            pub.publish(msg)
+
+        node.create_timer(1.0 / RATE, publish)
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            rclpy.spin_once(node, timeout_sec=0.1)
+    else:
+        latencies = []
+
+        def callback(msg):
+            stamp = msg.header.stamp.sec * 1e9 + msg.header.stamp.nanosec
+            latencies.append((node.get_clock().now().nanoseconds - stamp) * 1e-9)
+
+        node.create_subscription(Odometry, 'bench_pose/odom', callback, 10)
+        time.sleep(2.0)  # Обнаружение
+        latencies.clear()
+        cpu_start = cpu_time()
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            rclpy.spin_once(node, timeout_sec=0.1)
+        print(json.dumps({
+            'delivery': summarize(latencies),
+            'cpu_percent': round((cpu_time() - cpu_start) / duration * 100.0, 3),
+        }))
+    node.destroy_node()
+    rclpy.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--role', choices=['dds_publisher', 'dds_subscriber'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.role:
+        dds_role(args.role, args.duration)
+        return
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench_pose')
+    results = {
+        'shm': run_pair(path, args.duration, 1.0 / RATE, read_paced),
+        'stress': run_pair(path, min(args.duration, 3.0), 0.0, read_stress),
+        'restart': run_restart(path),
+        'dds': run_dds(args.duration),
+    }
+    os.remove(path)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
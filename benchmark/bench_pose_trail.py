@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+След робота (PoseTrail) на долгом прогоне
+
+Поза 30 Гц (как /odom) на прогоне в несколько часов: случайное блуждание
+0.2 м/с с поворотами. Для следа - время add() и points() (p50 / p99 /
+max, мкс), память буферов в начале и в конце, прирост памяти, выделенной
+следом за последний час (tracemalloc), охват (время первой точки) и
+худшее отклонение фактической траектории от ломаной следа по участкам
+разного возраста.
+Для сравнения - память списка всех поз (наивный вариант):
+
+    python3 benchmark/bench_pose_trail.py --hours 8
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+import tracemalloc
+
+from my_robot.hardware import pose_trail
+from my_robot.hardware.pose_trail import PoseTrail
+
+RATE = 30.0
+SPEED = 0.2
+
+
+def summarize(samples):
+    """p50 / p99 / max в микросекундах"""
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        'count': len(ordered),
+        'p50_us': round(ordered[last // 2] * 1e6, 2),
+        'p99_us': round(ordered[int(0.99 * last)] * 1e6, 2),
+        'max_us': round(ordered[-1] * 1e6, 2),
+    }
+
+
+def segment_distance(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    k = 0.0 if length == 0.0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length))
+    return math.hypot(px - ax - k * dx, py - ay - k * dy)
+
+
+def deviation(trail_points, samples):
+    """Худшее отклонение поз samples (t, x, y) от ломаной следа (м)"""
+    worst = 0.0
+    j = 0
+    for t, x, y in samples:
+        while j + 2 < len(trail_points) and trail_points[j + 1][1] <= t:
+            j += 1
+        a, b = trail_points[j], trail_points[min(j + 1, len(trail_points) - 1)]
+        worst = max(worst, segment_distance(x, y, a[2], a[3], b[2], b[3]))
+    return round(worst, 3)
+
+
+def trail_memory():
+    """Живые выделения из pose_trail.py (байт)"""
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(True, pose_trail.__file__)])
+    return sum(stat.size for stat in snapshot.statistics('filename'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hours', type=float, default=8.0)
+    parser.add_argument('--capacity', type=int, default=1024)
+    parser.add_argument('--levels', type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(1)
+    trail = PoseTrail(args.capacity, args.levels)
+    bytes_start = trail.nbytes
+    count = int(args.hours * 3600.0 * RATE)
+    step_ns = int(1e9 / RATE)
+    x = y = theta = turn = 0.0
+    add_times = []
+    samples = []  # Каждая 30-я поза для оценки отклонения (t, x, y)
+    traced_from = max(count - int(3600.0 * RATE), 0)
+    memory_start = 0
+    for i in range(count):
+        if i == traced_from:
+            # Последний час: память, выделенная в pose_trail.py и не освобождённая
+            tracemalloc.start()
+            memory_start = trail_memory()
+        if i % 60 == 0:
+            turn = random.uniform(-0.6, 0.6)
+        theta += turn / RATE
+        x += SPEED / RATE * math.cos(theta)
+        y += SPEED / RATE * math.sin(theta)
+        start = time.perf_counter()
+        trail.add(i * step_ns, x, y, theta)
+        if i % 100 == 0:
+            add_times.append(time.perf_counter() - start)
+        if i % 30 == 0:
+            samples.append((i / RATE, x, y))
+    memory_growth = trail_memory() - memory_start
+    tracemalloc.stop()
+
+    read_times = []
+    for _ in range(20):
+        start = time.perf_counter()
+        points = trail.points()
+        read_times.append(time.perf_counter() - start)
+
+    # Отклонение по возрасту: последние 10 мин, час назад, начало прогона
+    duration = count / RATE
+    windows = {'last_10min': (duration - 600.0, duration),
+               'hour_ago': (duration - 3600.0, duration - 3000.0),
+               'first_10min': (0.0, 600.0)}
+    result = {
+        'poses': count,
+        'distance_km': round(count * SPEED / RATE / 1000.0, 2),
+        'add': summarize(add_times),
+        'points': summarize(read_times),
+        'trail': trail.stats(),
+        'bytes_start': bytes_start,
+        'bytes_end': trail.nbytes,
+        'last_hour_growth_bytes': memory_growth,
+        'naive_list_bytes': count * (56 + 3 * 24),  # Кортеж (x, y, theta) из float
+        'covers_from_s': round(points[0][1], 1),
+        'deviation_m': {name: deviation(points, [s for s in samples if lo <= s[0] < hi])
+                        for name, (lo, hi) in windows.items() if lo >= 0.0},
+    }
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Цена профилировщика для цикла одометрии
+
+Поток с циклом 30 Гц по абсолютным срокам (как таймер /odom) и потоки
+опроса энкодеров (EncoderCounter без общего опросчика) на
+симуляционном бэкенде. Сравнивается опоздание итераций цикла без
+профилировщика и с выборкой стеков, плюс цена одной выборки:
+
+    PYTHONPATH=. python3 benchmark/bench_profiler.py --duration 5
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('MY_ROBOT_BACKEND', 'sim')
+
+from my_robot.hardware.encoder_counter import EncoderCounter  # noqa: E402
+from my_robot.profiler import SamplingProfiler  # noqa: E402
+
+
+def odometry_loop(duration, lateness):
+    """30 Гц по абсолютным срокам, опоздание итераций (мкс)"""
+    period = 1.0 / 30.0
+    next_time = time.monotonic() + period
+    end = next_time + duration
+    while next_time < end:
+        delay = next_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        lateness.append((time.monotonic() - next_time) * 1e6)
+        sum(i * i for i in range(2000))  # Работа итерации
+        next_time += period
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'p50_us': round(values[len(values) // 2]),
+        'p99_us': round(values[int(len(values) * 0.99)]),
+        'max_us': round(values[-1]),
+    }
+
+
+def run(duration, profiler=None, path=None):
+    lateness = []
+    if profiler is not None:
+        profiler.start(duration + 1.0, path)
+    thread = threading.Thread(target=odometry_loop, args=(duration, lateness))
+    thread.start()
+    thread.join()
+    result = {'lateness': summarize(lateness)}
+    if profiler is not None:
+        profile = profiler.stop()
+        cpu = {name: used for name, used, _ in profile['threads']}
+        result['samples'] = profile['samples']
+        result['profiler_cpu_percent'] = round(cpu.get('profiler', 0.0) / profile['duration'] * 100, 2)
+        result['cost_per_sample_us'] = round(cpu.get('profiler', 0.0) / max(profile['samples'], 1) * 1e6)
+        result['threads'] = profile['threads'][:6]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--interval', type=float, default=0.01)
+    args = parser.parse_args()
+
+    encoders = [EncoderCounter(12), EncoderCounter(26)]
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            'baseline': run(args.duration),
+            'profiling': run(args.duration, SamplingProfiler(args.interval),
+                             os.path.join(directory, 'profile.collapsed')),
+        }
+    for encoder in encoders:
+        encoder.stop()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Частота /odom на стоянке и задержка выхода из покоя
+
+hardware_node на симуляционном бэкенде (в отдельном процессе на вариант):
+fixed - всегда odom_rate (odom_idle_rate:=0), adaptive - редкая публикация
+на стоянке. Для каждого варианта:
+- parked: частота /odom и процессорное время процесса на стоянке;
+- wake: от публикации ненулевой /cmd_vel до приёма первой /odom после
+  неё (p50 / p99 / max, мкс), каждый раз из покоя (после остановки и
+  motion_idle_after), плюс сводка publish_rate узла.
+
+Нужно окружение ROS 2 с собранным пакетом:
+
+    python3 benchmark/bench_publish_rate.py --parked 20 --trials 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+VARIANTS = {
+    'fixed': ['odom_idle_rate:=0.0'],
+    'adaptive': ['odom_idle_rate:=1.0'],
+}
+IDLE_AFTER = 1.0
+
+
+def summarize(samples):
+    """p50 / p99 / max в микросекундах"""
+    if not samples:
+        return {'count': 0, 'p50_us': None, 'p99_us': None, 'max_us': None}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        'count': len(ordered),
+        'p50_us': round(ordered[last // 2] * 1e6),
+        'p99_us': round(ordered[int(0.99 * last)] * 1e6),
+        'max_us': round(ordered[-1] * 1e6),
+    }
+
+
+def cpu_time():
+    times = os.times()
+    return times.user + times.system
+
+
+def run_variant(params, parked, trials):
+    """Один прогон (в дочернем процессе)"""
+    import rclpy
+    from geometry_msgs.msg import Twist
+    from nav_msgs.msg import Odometry
+    from rclpy.executors import SingleThreadedExecutor
+
+    from my_robot.hardware.hardware_node import HardwareNode
+
+    args = ['--ros-args']
+    for param in params + [f'motion_idle_after:={IDLE_AFTER}', 'trail_rate:=0.0']:
+        args += ['-p', param]
+    rclpy.init(args=args)
+    node = HardwareNode()
+    node.wait_for_hardware(10.0)
+
+    driver = rclpy.create_node('bench_publish_rate_driver')
+    cmd_pub = driver.create_publisher(Twist, 'cmd_vel', 10)
+    received = []  # Моменты приёма /odom (time.monotonic)
+    arrived = threading.Event()
+
+    def on_odom(msg):
+        received.append(time.monotonic())
+        arrived.set()
+
+    driver.create_subscription(Odometry, 'odom', on_odom, 10)
+    executor = node.create_executor()
+    executor.add_node(node)
+    threading.Thread(target=executor.spin, daemon=True).start()
+    driver_executor = SingleThreadedExecutor()
+    driver_executor.add_node(driver)
+    threading.Thread(target=driver_executor.spin, daemon=True).start()
+    time.sleep(2.0 + IDLE_AFTER)  # Обнаружение и переход в покой
+
+    # Стоянка
+    received.clear()
+    cpu_start = cpu_time()
+    time.sleep(parked)
+    result = {
+        'parked_odom_hz': round(len(received) / parked, 2),
+        'parked_cpu_percent': round((cpu_time() - cpu_start) / parked * 100.0, 2),
+    }
+
+    # Выход из покоя
+    go, stop = Twist(), Twist()
+    go.linear.x = 0.2
+    latencies = []
+    for _ in range(trials):
+        arrived.clear()
+        start = time.monotonic()
+        cmd_pub.publish(go)
+        if arrived.wait(2.0):
+            latencies.append(received[-1] - start)
+        time.sleep(0.3)
+        cmd_pub.publish(stop)
+        time.sleep(IDLE_AFTER + 1.0)  # Колёса остановились, узел в покое
+    result['wake'] = summarize(latencies)
+    if node.publish_rate is not None:
+        result['publish_rate'] = node.publish_rate.stats()
+
+    node.stop_all()
+    executor.shutdown()
+    driver_executor.shutdown()
+    rclpy.shutdown()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parked', type=float, default=20.0, help='длительность стоянки (с)')
+    parser.add_argument('--trials', type=int, default=20, help='выходов из покоя')
+    parser.add_argument('--variant', choices=sorted(VARIANTS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(VARIANTS[args.variant], args.parked, args.trials)))
+        return
+
+    results = {}
+    env = dict(os.environ, MY_ROBOT_BACKEND='sim')
+    for name in VARIANTS:
+        output = subprocess.run(
+            [sys.executable, __file__, '--variant', name,
+             '--parked', str(args.parked), '--trials', str(args.trials)],
+            env=env, capture_output=True, text=True, check=True).stdout
+        results[name] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
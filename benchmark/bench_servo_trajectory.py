@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Полоса I2C при плавном движении сервоприводов
+
+Сравнивает прежний способ (set_servo_angle на каждый шаг каждого канала,
+4 транзакции setPWM) с ServoTrajectoryEngine: изменившиеся каналы одной
+блочной записью на непрерывный участок. Сценарий: пан/тилт качаются по
+синусу, два других канала стоят или медленно ползут. Работает на
+симуляционном бэкенде:
+
+    PYTHONPATH=. python3 benchmark/bench_servo_trajectory.py --rate 50
+"""
+
+import argparse
+import json
+import math
+import os
+
+os.environ.setdefault('MY_ROBOT_BACKEND', 'sim')
+
+from my_robot.hardware.hal import sim  # noqa: E402
+from my_robot.hardware.servo_trajectory import ServoTrajectoryEngine  # noqa: E402
+from my_robot.hardware.servos import Servos  # noqa: E402
+
+
+def target(joint, t):
+    """Угол сервопривода joint (°) в момент t"""
+    if joint == 0:
+        return 60.0 * math.sin(2 * math.pi * 0.5 * t)
+    if joint == 1:
+        return 30.0 * math.sin(2 * math.pi * 0.25 * t)
+    if joint == 2:
+        return 10.0 * t  # Медленный дрейф
+    return 0.0  # Стоит
+
+
+def trajectory(duration, step=0.1):
+    """Точки траектории (t, [углы], None) с шагом step"""
+    points = []
+    t = step
+    while t <= duration + 1e-9:
+        points.append((t, [target(j, t) for j in range(4)], None))
+        t += step
+    return points
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rate', type=float, default=50.0)
+    parser.add_argument('--duration', type=float, default=4.0)
+    args = parser.parse_args()
+
+    servos = Servos(0x6F)
+    chip = sim.world.pca(0x6F)
+    ticks = int(args.duration * args.rate)
+    period = 1.0 / args.rate
+
+    # Прежняя схема: каждый канал на каждом шаге
+    start = chip.transactions
+    for tick in range(1, ticks + 1):
+        t = tick * period
+        for joint in range(4):
+            servos.set_servo_angle(joint, target(joint, t))
+    legacy = chip.transactions - start
+
+    # Движок траекторий (шаги выполняются синхронно, без потока)
+    engine = ServoTrajectoryEngine(servos, 4, args.rate)
+    for joint in range(4):
+        engine.hold(joint, 0.0)
+    engine.step(0.0)
+    now = sim.clock.monotonic()
+    engine.set_trajectory(range(4), trajectory(args.duration), start=now)
+    start = chip.transactions
+    writes = []
+    for tick in range(1, ticks + 1):
+        before = chip.transactions
+        engine.step(now + tick * period)
+        writes.append(chip.transactions - before)
+    staged = chip.transactions - start
+
+    print(json.dumps({
+        'ticks': ticks,
+        'legacy_transactions': legacy,
+        'engine_transactions': staged,
+        'engine_max_per_tick': max(writes),
+        'channel_writes': engine.channel_writes,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Частоты ультразвуковых датчиков: планировщик против запуска по очереди
+
+Прежний опрос запускал left, right, front по кругу с паузой 50 мс
+(эквивалент - планировщик, где все датчики мешают друг другу и пауза
+после пинга 50 мс). SonarScheduler держит свою частоту у каждого датчика,
+запускает одновременно только не мешающие друг другу и заканчивает
+измерение по приходу эха. Для каждого сценария движения - достигнутые
+частоты и число пересечений с пингом мешающего соседа (модель SimWorld):
+
+    PYTHONPATH=. python3 benchmark/bench_sonar_scheduler.py --duration 5
+"""
+
+import argparse
+import json
+import math
+import os
+
+os.environ.setdefault('MY_ROBOT_BACKEND', 'sim')
+
+from my_robot.hardware.hal import clock, sim  # noqa: E402
+from my_robot.hardware.sonar import SonarAcquisition, SonarSensor  # noqa: E402
+from my_robot.hardware.sonar_scheduler import SonarScheduler  # noqa: E402
+
+SENSORS = (('left', 27, 17, 0.6), ('right', 6, 5, -0.6), ('front', 23, 24, 0.0))
+
+# Сценарий: (linear м/с, angular рад/с)
+SCENARIOS = {
+    'stationary': (0.0, 0.0),
+    'forward': (0.2, 0.0),
+    'turning': (0.0, 1.0),
+}
+
+
+def make_scheduler(name):
+    mounts = [(position, yaw) for position, _, _, yaw in SENSORS]
+    if name == 'sequential':
+        # Прежнее поведение: все мешают всем, пауза 50 мс, частота не ограничена
+        return SonarScheduler(mounts, min_rate=1000.0, max_rate=1000.0,
+                              crosstalk_angle=2 * math.pi, settle=0.05)
+    return SonarScheduler(mounts)
+
+
+def run(scheduler_name, motion, duration):
+    sensors = [SonarSensor(position, trig, echo, yaw) for position, trig, echo, yaw in SENSORS]
+    for sensor in sensors:
+        sim.GPIO.setup(sensor.trig_pin, sim.GPIO.OUT)
+        sim.GPIO.setup(sensor.echo_pin, sim.GPIO.IN)
+    acquisition = SonarAcquisition(sensors, make_scheduler(scheduler_name))
+    acquisition.set_motion(*motion)
+    crosstalk_start = sim.world.crosstalk
+    acquisition.stats()
+    acquisition.start()
+    clock.sleep(duration)
+    stats = acquisition.stats()
+    acquisition.stop()
+    stats['crosstalk'] = sim.world.crosstalk - crosstalk_start
+    clock.sleep(0.1)  # Последние пинги затухают до следующего прогона
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    results = {}
+    for scheduler_name in ('sequential', 'scheduler'):
+        for scenario, motion in SCENARIOS.items():
+            results[f'{scheduler_name}/{scenario}'] = run(scheduler_name, motion, args.duration)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
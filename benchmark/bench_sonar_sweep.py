@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Развёртка переднего датчика сервоприводом: частота сканов и точность
+
+Передний датчик на пане проходит дугу (SonarSweep), боковые работают по
+своему расписанию. Конвейер (поворот к следующему углу во время ожидания
+эха и затухания) сравнивается с последовательным режимом (поворот после
+освобождения датчика). Для каждого режима - частота полных проходов и
+углов, угловой шаг, пересечения с пингами соседей и ошибка дальности
+относительно геометрии комнаты SimWorld на том же угле:
+
+    PYTHONPATH=. python3 benchmark/bench_sonar_sweep.py --duration 10
+"""
+
+import argparse
+import json
+import math
+import os
+
+os.environ.setdefault('MY_ROBOT_BACKEND', 'sim')
+
+from my_robot.hardware.hal import clock, sim  # noqa: E402
+from my_robot.hardware.servos import Servos  # noqa: E402
+from my_robot.hardware.sonar import SonarAcquisition, SonarSensor  # noqa: E402
+from my_robot.hardware.sonar_sweep import SonarSweep  # noqa: E402
+
+SENSORS = (('left', 27, 17, 0.6), ('right', 6, 5, -0.6), ('front', 23, 24, 0.0))
+FRONT_MOUNT = (0.06, 0.0)
+
+
+def true_range(bearing):
+    """Дальность по геометрии комнаты с учётом ширины луча (как в SimWorld)"""
+    world = sim.world
+    x, y, theta = world.pose()
+    sx = x + FRONT_MOUNT[0] * math.cos(theta)
+    sy = y + FRONT_MOUNT[0] * math.sin(theta)
+    half = world.config['sonar_fov'] / 2.0
+    return min(world.room.raycast(sx, sy, theta + bearing + a, world.config['sonar_max_range'])
+               for a in (-half, 0.0, half))
+
+
+def run(pipelined, step, duration):
+    sensors = [SonarSensor(position, trig, echo, yaw) for position, trig, echo, yaw in SENSORS]
+    for sensor in sensors:
+        sim.GPIO.setup(sensor.trig_pin, sim.GPIO.OUT)
+        sim.GPIO.setup(sensor.echo_pin, sim.GPIO.IN)
+    sweep = SonarSweep(Servos(), 'front', step=step, pipelined=pipelined,
+                       servo_speed=sim.world.config['pan_speed'])
+    errors = []
+    sectors = []
+
+    def on_sector(angle_min, angle_increment, ranges, first_time, last_time):
+        sectors.append(last_time - first_time)
+        for i, distance in enumerate(ranges):
+            truth = true_range(angle_min + i * angle_increment)
+            if distance != float('inf') and truth < 2.0:
+                errors.append(abs(distance - truth))
+
+    sweep.on_sector = on_sector
+    acquisition = SonarAcquisition(sensors, sweep=sweep)
+    crosstalk_start = sim.world.crosstalk
+    acquisition.start()
+    clock.sleep(1.0)  # Первый проход
+    sweep.stats()
+    errors.clear()
+    clock.sleep(duration)
+    stats = sweep.stats()
+    acquisition.stop()
+    clock.sleep(0.1)  # Последние пинги затухают до следующего прогона
+    errors.sort()
+    stats.update({
+        'sectors': len(sectors),
+        'crosstalk': sim.world.crosstalk - crosstalk_start,
+        'error_p50_cm': round(errors[len(errors) // 2] * 100.0, 1) if errors else None,
+        'error_p90_cm': round(errors[int(0.9 * (len(errors) - 1))] * 100.0, 1) if errors else None,
+    })
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--steps', type=float, nargs='+', default=[10.0, 5.0],
+                        help='шаги развёртки (°)')
+    args = parser.parse_args()
+
+    sim.world.start()
+    results = {}
+    for step in args.steps:
+        for pipelined in (False, True):
+            name = f'{"pipelined" if pipelined else "sequential"}/{step:g}deg'
+            results[name] = run(pipelined, math.radians(step), args.duration)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
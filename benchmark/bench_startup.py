@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Время запуска hardware_node
+
+Несколько раз запускает узел (симуляционный бэкенд) с последовательным
+и параллельным запуском железа (hardware_startup) и снимает:
+- время от запуска процесса до первой /odom (с точки зрения подписчика)
+- фазы запуска и моменты событий из /diagnostics (hardware_node: startup)
+
+Нужно окружение ROS 2 с собранным пакетом:
+
+    python3 benchmark/bench_startup.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import time
+
+import rclpy
+from diagnostic_msgs.msg import DiagnosticArray
+from nav_msgs.msg import Odometry
+
+MODES = ('serial', 'parallel')
+
+
+class StartupListener:
+    """Первая /odom и сводка startup из /diagnostics"""
+
+    def __init__(self, node):
+        self.first_odom = None
+        self.startup = None
+        self.subscriptions = [
+            node.create_subscription(Odometry, '/odom', self.odom_callback, 10),
+            node.create_subscription(DiagnosticArray, '/diagnostics', self.diagnostics_callback, 10),
+        ]
+
+    def odom_callback(self, msg):
+        if self.first_odom is None:
+            self.first_odom = time.monotonic()
+
+    def diagnostics_callback(self, msg):
+        for status in msg.status:
+            if status.name == 'hardware_node: startup':
+                self.startup = {item.key: float(item.value) for item in status.values
+                                if item.key.endswith('_ms')}
+
+
+def run(mode, node, timeout=20.0):
+    listener = StartupListener(node)
+    env = dict(os.environ, MY_ROBOT_BACKEND='sim')
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        ['ros2', 'run', 'my_robot', 'hardware_node', '--ros-args',
+         '-p', f'hardware_startup:={mode}', '-p', 'diagnostics_period:=0.5'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = start + timeout
+    while time.monotonic() < deadline and (listener.first_odom is None or listener.startup is None):
+        rclpy.spin_once(node, timeout_sec=0.01)
+    os.killpg(proc.pid, signal.SIGINT)
+    proc.wait(timeout=10)
+    for subscription in listener.subscriptions:
+        node.destroy_subscription(subscription)
+    first_odom = listener.first_odom
+    return {
+        'first_odom_ms': round((first_odom - start) * 1e3, 1) if first_odom else None,
+        'startup': listener.startup,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    rclpy.init()
+    node = rclpy.create_node('bench_startup')
+    results = {}
+    for mode in MODES:
+        runs = [run(mode, node) for _ in range(args.runs)]
+        times = sorted(r['first_odom_ms'] for r in runs if r['first_odom_ms'] is not None)
+        results[mode] = {
+            'first_odom_p50_ms': times[len(times) // 2] if times else None,
+            'first_odom_max_ms': times[-1] if times else None,
+            'last_startup': runs[-1]['startup'],
+        }
+    node.destroy_node()
+    rclpy.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
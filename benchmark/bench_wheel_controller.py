@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Регулятор скорости колёс на симуляционном бэкенде
+
+Уставки меняются ступеньками, посередине прогона "садится батарея"
+(max_wheel_speed симуляции падает на 25%). Сравнивается только прямая
+связь (как разомкнутая схема) и ПИД; параллельно крутятся потоки
+нагрузки, имитирующие занятый executor. Печатаются джиттер периода,
+пропуски периодов и ошибка слежения:
+
+    PYTHONPATH=. python3 benchmark/bench_wheel_controller.py --rate 100 --load 2
+"""
+
+import argparse
+import json
+import os
+import threading
+
+os.environ.setdefault('MY_ROBOT_BACKEND', 'sim')
+
+from my_robot.hardware.encoder_counter import EncoderCounter  # noqa: E402
+from my_robot.hardware.gpio_sampler import GpioSampler  # noqa: E402
+from my_robot.hardware.hal import Raspi_MotorHAT, clock, open_gpio_bank, sim  # noqa: E402
+from my_robot.hardware.kinematics import KinematicsModel  # noqa: E402
+from my_robot.hardware.motor_output import MotorOutputStage  # noqa: E402
+from my_robot.hardware.velocity_estimator import WheelVelocityEstimator  # noqa: E402
+from my_robot.hardware.wheel_controller import WheelSpeedController  # noqa: E402
+
+# (длительность с, левое м/с, правое м/с)
+STEPS = [(1.0, 0.3, 0.3), (1.0, 0.2, 0.4), (1.0, 0.35, 0.15), (1.0, -0.25, 0.25)]
+
+GAINS = {
+    'feed_forward': {'kp': 0.0, 'ki': 0.0, 'kff': 300.0, 'offset': 60.0},
+    'pid': {'kp': 150.0, 'ki': 600.0, 'kff': 300.0, 'offset': 60.0},
+}
+
+
+def busy_load(stop):
+    """Нагрузка на интерпретатор (как колбэки executor'а)"""
+    while not stop.is_set():
+        sum(i * i for i in range(2000))
+
+
+def run(name, gains, args):
+    world = sim.world
+    world.config['max_wheel_speed'] = 0.6
+    hat = Raspi_MotorHAT(addr=0x6F)
+    model = KinematicsModel(0.12, 0.065, 20)
+    sampler = GpioSampler(open_gpio_bank(), clock=clock)
+    encoders = (EncoderCounter(12, sampler=sampler), EncoderCounter(26, sampler=sampler))
+    estimators = tuple(WheelVelocityEstimator(e.ticks, model.meters_per_tick) for e in encoders)
+    output = MotorOutputStage(hat)
+    controller = WheelSpeedController(output, encoders, estimators, gains,
+                                      rate=args.rate, priority=args.priority)
+    sampler.start()
+    controller.start()
+
+    stop = threading.Event()
+    loads = [threading.Thread(target=busy_load, args=(stop,), daemon=True)
+             for _ in range(args.load)]
+    for thread in loads:
+        thread.start()
+
+    steps = STEPS * 2
+    half = len(STEPS)
+    errors = []
+    controller.stats()
+    for index, (duration, left, right) in enumerate(steps):
+        if index == half:
+            world.config['max_wheel_speed'] = 0.45  # Просела батарея
+        controller.set_target(left, right)
+        clock.sleep(duration * 0.5)  # Переходный процесс не учитываем
+        dist = (world.dist_left, world.dist_right)
+        start = clock.monotonic()
+        clock.sleep(duration * 0.5)
+        elapsed = clock.monotonic() - start
+        # Путь колёс в симуляции по модулю - сравниваем модули скоростей
+        actual = ((world.dist_left - dist[0]) / elapsed, (world.dist_right - dist[1]) / elapsed)
+        errors.append(max(abs(actual[0] - abs(left)), abs(actual[1] - abs(right))))
+
+    stats = controller.stats()
+    stop.set()
+    controller.stop()
+    output.stop()
+    sampler.stop()
+    for encoder in encoders:
+        encoder.stop()
+    return {
+        'steady_error_mm_s_max': round(max(errors) * 1000.0, 1),
+        'steady_error_mm_s_mean': round(sum(errors) / len(errors) * 1000.0, 1),
+        'rate_hz': stats['rate_hz'],
+        'jitter_p50_us': stats['jitter_p50_us'],
+        'jitter_p99_us': stats['jitter_p99_us'],
+        'jitter_max_us': stats['jitter_max_us'],
+        'overruns': stats['overruns'],
+        'realtime': stats['realtime'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rate', type=float, default=100.0)
+    parser.add_argument('--load', type=int, default=0, help='потоков нагрузки')
+    parser.add_argument('--priority', type=int, default=0, help='SCHED_FIFO, 0 - выкл')
+    args = parser.parse_args()
+    results = {name: run(name, gains, args) for name, gains in GAINS.items()}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Набор бенчмарков горячих путей железа и поведения
+
+Работает без робота: RPi.GPIO и Raspi_MotorHAT подменяются заглушками из
+shims.py. Каждый замер - p50 / p99 / max в микросекундах, результат в JSON,
+чтобы сравнивать прогоны между коммитами:
+
+    python3 benchmark/run_benchmarks.py --output bench.json
+
+Для замеров узлов нужен rclpy (окружение ROS 2).
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from shims import install_fake_gpio, install_fake_motorhat, make_bank, PulseTrain
+
+
+def summarize(samples):
+    """p50 / p99 / max выборки (в единицах выборки)"""
+    if not samples:
+        return {'count': 0, 'p50': None, 'p99': None, 'max': None}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        'count': len(ordered),
+        'p50': ordered[last // 2],
+        'p99': ordered[int(0.99 * last)],
+        'max': ordered[-1],
+    }
+
+
+def timed_calls(func, count, pause=0.0, before=None):
+    """Время вызовов func() в мкс"""
+    samples = []
+    for i in range(count):
+        if before is not None:
+            before(i)
+        if pause:
+            time.sleep(pause)
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def bench_polling_loop(gpio, bank, frequencies, duration):
+    """EncoderCounter._polling_loop: частота опроса и доля пропущенных фронтов"""
+    from my_robot.hardware.encoder_counter import EncoderCounter
+
+    pin = 12
+    results = []
+    real_input = gpio.input
+    for frequency in frequencies:
+        stamps = []
+
+        def counting_input(channel, _stamps=stamps):
+            if channel == pin:
+                _stamps.append(time.perf_counter())
+            return real_input(channel)
+
+        gpio.input = counting_input
+        bank.write_levels(0xFFFFFFFF)
+        counter = EncoderCounter(pin)
+        train = PulseTrain(bank, [pin], frequency)
+        train.start()
+        time.sleep(duration)
+        train.stop()
+        time.sleep(0.01)
+        counter.stop()
+        gpio.input = real_input
+
+        intervals = [(b - a) * 1e6 for a, b in zip(stamps, stamps[1:])]
+        expected = train.falling_edges
+        missed = max(expected - counter.get_count(), 0)
+        results.append({
+            'pulse_hz': frequency,
+            'samples_per_sec': len(stamps) / duration,
+            'sample_interval_us': summarize(intervals),
+            'expected_edges': expected,
+            'edge_miss_rate': missed / expected if expected else 0.0,
+        })
+    return results
+
+
+def bench_hardware_node(cycles):
+    """update_odometry, cmd_callback, publish_sensors и измерение сонара"""
+    from geometry_msgs.msg import Twist
+    from my_robot.hardware.hal import clock
+    from my_robot.hardware.hardware_node import HardwareNode
+
+    node = HardwareNode()
+    node.wait_for_hardware()  # Устройства поднимаются в фоне
+    for timer in list(node.timers):
+        timer.cancel()
+    node.sonar.stop()  # Измерения запускаем вручную
+
+    # Тики - через обработчик фронта энкодера, как из опросчика GPIO:
+    # кольцо тиков и интегрирование позы на каждом тике (OdometryIntegrator)
+    left, right = node.left_encoder, node.right_encoder
+    edges = []
+
+    def tick(i):
+        now = clock.monotonic()
+        start = time.perf_counter()
+        left._on_edge(now)
+        if i % 3:
+            right._on_edge(now)
+        edges.append((time.perf_counter() - start) * 1e6)
+
+    odometry = timed_calls(node.update_odometry, cycles, pause=0.0012, before=tick)
+    x, y, _ = node.odometry.pose()
+    assert x != 0.0 or y != 0.0, 'Поза не изменилась: тики не дошли до интегратора'
+
+    commands = []
+    for i in range(cycles):
+        msg = Twist()
+        msg.linear.x = 0.1 * (i % 5)
+        msg.angular.z = 0.5 * ((i % 7) - 3)
+        commands.append(msg)
+    cmd = timed_calls(lambda: node.cmd_callback(commands.pop()), cycles)
+
+    def fill_queue(i):
+        now = time.monotonic()
+        for position in ('left', 'right', 'front'):
+            node.sonar.results.append((position, 0.5, now))
+
+    sensors = timed_calls(node.publish_sensors, cycles, before=fill_queue)
+
+    # Без эха сонар ждёт до таймаута - это и есть худший случай блокировки
+    sensor = node.sonar.sensors[0]
+    measure = timed_calls(lambda: node.sonar.measure(sensor), 20)
+
+    node.stop_all()
+    node.destroy_node()
+    return {
+        'update_odometry_us': summarize(odometry),
+        'encoder_edge_us': summarize(edges),
+        'cmd_callback_us': summarize(cmd),
+        'publish_sensors_us': summarize(sensors),
+        'sonar_measure_blocking_us': summarize(measure),
+    }
+
+
+def bench_room_explorer(cycles):
+    """RoomExplorerNode.control_loop"""
+    from my_robot.behaviors.room_explorer_node import RoomExplorerNode
+
+    node = RoomExplorerNode()
+    for timer in list(node.timers):
+        timer.cancel()
+    distances = (0.1, 0.18, 0.3, 0.7, 1.5)
+
+    def set_sensors(i):
+        node.sensors['left'] = distances[i % 5]
+        node.sensors['right'] = distances[(i + 2) % 5]
+        node.sensors['front'] = distances[(i + 4) % 5]
+        now = node.get_clock().now()
+        for position in node.stamps:
+            node.stamps[position] = now  # Свежие показания, без остановки
+
+    control = timed_calls(node.control_loop, cycles, before=set_sensors)
+    node.destroy_node()
+    return {'control_loop_us': summarize(control)}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], text=True,
+            stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cycles', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=2.0,
+                        help='длительность замера опроса энкодера на частоту (с)')
+    parser.add_argument('--freq', type=float, nargs='+', default=[20.0, 100.0, 400.0, 1000.0])
+    parser.add_argument('--skip-ros', action='store_true', help='без замеров узлов (нет rclpy)')
+    parser.add_argument('--output', help='файл для JSON (по умолчанию stdout)')
+    args = parser.parse_args()
+
+    report = {
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'machine': platform.machine(),
+        'timestamp': time.time(),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bank_path = os.path.join(tmp, 'gpiomem')
+        bank = make_bank(bank_path)
+        gpio = install_fake_gpio(bank)
+        install_fake_motorhat()
+
+        report['encoder_polling_loop'] = bench_polling_loop(
+            gpio, bank, args.freq, args.duration)
+
+        if not args.skip_ros:
+            import rclpy
+            rclpy.init(args=['--ros-args', '-p', f'gpiomem_path:={bank_path}'])
+            try:
+                report['hardware_node'] = bench_hardware_node(args.cycles)
+                report['room_explorer'] = bench_room_explorer(args.cycles)
+            finally:
+                rclpy.shutdown()
+        bank.close()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
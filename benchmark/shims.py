@@ -0,0 +1,185 @@
+"""
+Подмены железа для бенчмарков
+
+Фальшивые модули RPi.GPIO (поверх файлового банка регистров) и
+Raspi_MotorHAT, генератор синтетических импульсов энкодера. Используются
+и тестами в test/.
+"""
+
+import sys
+import threading
+import time
+import types
+
+from my_robot.hardware.gpio_sampler import FileGpioBank
+
+
+def install_fake_gpio(bank):
+    """Подставить фальшивый RPi.GPIO, читающий уровни из bank"""
+    gpio = types.ModuleType('RPi.GPIO')
+    gpio.BCM = 11
+    gpio.IN = 1
+    gpio.OUT = 0
+    gpio.LOW = 0
+    gpio.HIGH = 1
+    gpio.PUD_UP = 22
+    gpio.PUD_DOWN = 21
+    gpio.setwarnings = lambda flag: None
+    gpio.setmode = lambda mode: None
+    gpio.cleanup = lambda *args: None
+    gpio.setup = lambda pin, mode, pull_up_down=None, initial=None: None
+
+    def gpio_input(pin):
+        return (bank.read_levels() >> pin) & 1
+
+    def gpio_output(pin, value):
+        bank.set_pin(pin, value)
+
+    gpio.input = gpio_input
+    gpio.output = gpio_output
+    gpio.BOTH = 33
+    gpio.add_event_detect = lambda pin, edge, callback=None, bouncetime=None: None
+    gpio.remove_event_detect = lambda pin: None
+
+    rpi = types.ModuleType('RPi')
+    rpi.GPIO = gpio
+    sys.modules['RPi'] = rpi
+    sys.modules['RPi.GPIO'] = gpio
+    return gpio
+
+
+class FakeI2C:
+    """Регистры PCA9685 за Raspi_I2C: автоинкремент MODE1 и журнал блоков"""
+
+    MODE1 = 0x00
+    MODE1_AI = 0x20
+
+    def __init__(self):
+        self.registers = bytearray(256)
+        self.blocks = []  # (регистр, данные) каждой блочной записи
+        self.sticky_ai = True  # False - бит AI не устанавливается
+
+    def write8(self, reg, value):
+        if reg == self.MODE1 and not self.sticky_ai:
+            value &= ~self.MODE1_AI
+        self.registers[reg] = value & 0xFF
+
+    def readU8(self, reg):
+        return self.registers[reg]
+
+    def writeList(self, reg, values):
+        self.blocks.append((reg, list(values)))
+        auto_increment = self.registers[self.MODE1] & self.MODE1_AI
+        for offset, value in enumerate(values):
+            self.registers[reg + offset if auto_increment else reg] = value & 0xFF
+
+
+class FakePWM:
+    """PCA9685 без железа: счётчик записей и регистры за i2c"""
+
+    def __init__(self, address=0x40, debug=False):
+        self.address = address
+        self.writes = 0
+        self.i2c = FakeI2C()
+
+    def setPWMFreq(self, freq):
+        self.writes += 1
+
+    def setPWM(self, channel, on, off):
+        self.writes += 1
+
+    def setAllPWM(self, on, off):
+        self.writes += 1
+
+
+class FakeDCMotor:
+    """Мотор Motor HAT без железа"""
+
+    def __init__(self, controller):
+        self._controller = controller
+        self.speed = 0
+        self.mode = None
+
+    def setSpeed(self, speed):
+        self.speed = speed
+        self._controller._pwm.writes += 1
+
+    def run(self, command):
+        self.mode = command
+        self._controller._pwm.writes += 2
+
+
+class FakeMotorHAT:
+    """Raspi_MotorHAT без железа"""
+
+    FORWARD = 1
+    BACKWARD = 2
+    BRAKE = 3
+    RELEASE = 4
+
+    def __init__(self, addr=0x60, freq=1600):
+        self._pwm = FakePWM(addr)
+        self.motors = [FakeDCMotor(self) for _ in range(4)]
+
+    def getMotor(self, num):
+        return self.motors[num - 1]
+
+
+def install_fake_motorhat():
+    """Подставить фальшивый пакет Raspi_MotorHAT"""
+    package = types.ModuleType('Raspi_MotorHAT')
+    package.Raspi_MotorHAT = FakeMotorHAT
+    driver = types.ModuleType('Raspi_MotorHAT.Raspi_PWM_Servo_Driver')
+    driver.PWM = FakePWM
+    package.Raspi_PWM_Servo_Driver = driver
+    sys.modules['Raspi_MotorHAT'] = package
+    sys.modules['Raspi_MotorHAT.Raspi_PWM_Servo_Driver'] = driver
+    return package
+
+
+def make_bank(path):
+    """Файловый банк регистров с подтяжкой всех пинов к 1"""
+    bank = FileGpioBank(path)
+    bank.write_levels(0xFFFFFFFF)
+    return bank
+
+
+class PulseTrain:
+    """Генератор меандра на нескольких пинах банка"""
+
+    def __init__(self, bank, pins, frequency):
+        self._bank = bank
+        self._mask = 0
+        for pin in pins:
+            self._mask |= 1 << pin
+        self.half_period = 0.5 / frequency
+        self.falling_edges = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        level = True
+        deadline = time.monotonic()
+        while self._running:
+            deadline += self.half_period
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            levels = self._bank.read_levels()
+            level = not level
+            if level:
+                levels |= self._mask
+            else:
+                levels &= ~self._mask
+                self.falling_edges += 1
+            self._bank.write_levels(levels)
@@ -0,0 +1,44 @@
+"""
+Составной режим: железо, исследователь и сервоприводы в одном процессе
+
+ros2 launch my_robot composed.launch.py
+ros2 launch my_robot composed.launch.py sim:=true speed:=5.0
+ros2 launch my_robot composed.launch.py namespace:=robot1 frame_prefix:=robot1/
+"""
+
+import time
+
+from launch import LaunchDescription
+from launch.actions import DeclareLaunchArgument, GroupAction, SetEnvironmentVariable
+from launch.conditions import IfCondition
+from launch.substitutions import LaunchConfiguration
+from launch_ros.actions import Node
+
+
+def generate_launch_description():
+    sim = LaunchConfiguration('sim')
+    speed = LaunchConfiguration('speed')
+    namespace = LaunchConfiguration('namespace')
+
+    return LaunchDescription([
+        DeclareLaunchArgument('sim', default_value='false',
+                              description='Симуляционный бэкенд вместо Raspberry Pi'),
+        DeclareLaunchArgument('speed', default_value='1.0',
+                              description='Ускорение времени симуляции'),
+        DeclareLaunchArgument('namespace', default_value='',
+                              description='Пространство имён робота'),
+        DeclareLaunchArgument('frame_prefix', default_value='',
+                              description='Префикс кадров TF робота, например robot1/'),
+        GroupAction(condition=IfCondition(sim), scoped=False, actions=[
+            SetEnvironmentVariable('MY_ROBOT_BACKEND', 'sim'),
+            SetEnvironmentVariable('MY_ROBOT_SIM_SPEED', speed),
+            SetEnvironmentVariable('MY_ROBOT_SIM_EPOCH', repr(time.monotonic())),
+            # Часы робота - в его пространстве имён (см. sim.launch.py)
+            Node(package='my_robot', executable='sim_clock', output='screen',
+                 namespace=namespace),
+        ]),
+        Node(package='my_robot', executable='robot_composed', output='screen',
+             namespace=namespace, remappings=[('/clock', 'clock')],
+             parameters=[{'use_sim_time': sim,
+                          'frame_prefix': LaunchConfiguration('frame_prefix')}]),
+    ])
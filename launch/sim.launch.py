@@ -0,0 +1,50 @@
+"""
+Запуск в симуляции (без Raspberry Pi)
+
+ros2 launch my_robot sim.launch.py speed:=10.0 room:=/path/room.json
+ros2 launch my_robot sim.launch.py namespace:=robot1 frame_prefix:=robot1/
+"""
+
+import time
+
+from launch import LaunchDescription
+from launch.actions import DeclareLaunchArgument, SetEnvironmentVariable
+from launch.substitutions import LaunchConfiguration
+from launch_ros.actions import Node
+
+
+def generate_launch_description():
+    speed = LaunchConfiguration('speed')
+    room = LaunchConfiguration('room')
+    namespace = LaunchConfiguration('namespace')
+    frames = {'frame_prefix': LaunchConfiguration('frame_prefix')}
+    sim_params = [{'use_sim_time': True}]
+    # Часы робота - в его пространстве имён (несколько роботов в одном домене)
+    clock_remap = [('/clock', 'clock')]
+
+    return LaunchDescription([
+        DeclareLaunchArgument('speed', default_value='1.0',
+                              description='Ускорение времени симуляции (0 - ручной шаг)'),
+        DeclareLaunchArgument('room', default_value='',
+                              description='JSON-файл комнаты (пусто - комната по умолчанию)'),
+        DeclareLaunchArgument('namespace', default_value='',
+                              description='Пространство имён робота'),
+        DeclareLaunchArgument('frame_prefix', default_value='',
+                              description='Префикс кадров TF робота, например robot1/'),
+        SetEnvironmentVariable('MY_ROBOT_BACKEND', 'sim'),
+        SetEnvironmentVariable('MY_ROBOT_SIM_SPEED', speed),
+        SetEnvironmentVariable('MY_ROBOT_SIM_ROOM', room),
+        # Общая эпоха: все процессы видят одно время симуляции
+        SetEnvironmentVariable('MY_ROBOT_SIM_EPOCH', repr(time.monotonic())),
+        Node(package='my_robot', executable='sim_clock', output='screen',
+             namespace=namespace),
+        Node(package='my_robot', executable='hardware_node', output='screen',
+             namespace=namespace, parameters=sim_params + [{'wheel_control': 'pid'}, frames],
+             remappings=clock_remap),
+        Node(package='my_robot', executable='room_explorer', output='screen',
+             namespace=namespace, parameters=sim_params, remappings=clock_remap),
+        Node(package='my_robot', executable='servo_controller', output='screen',
+             namespace=namespace, parameters=sim_params, remappings=clock_remap),
+        Node(package='my_robot', executable='occupancy_mapper', output='screen',
+             namespace=namespace, parameters=sim_params + [frames], remappings=clock_remap),
+    ])
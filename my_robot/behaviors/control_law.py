@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Закон управления исследователя комнаты (общий для узла и симулятора)
+
+Ближайшая боковая дистанция (или упор спереди) выбирает полосу: прямо,
+плавный поворот, крутой поворот, разворот назад, задний ход. Полоса
+задаёт скорости ближнего к препятствию и дальнего колеса (проценты
+base_speed), команда - /cmd_vel из скоростей колёс.
+
+Одна реализация и для RoomExplorerNode (числа), и для explorer_sim
+(массивы NumPy - тысячи конфигураций и комнат за шаг): ветвления
+записаны через xp.where, xp - SCALAR или модуль numpy. Параметры
+ExplorerGains - те же имена, что у параметров узла.
+"""
+
+import collections
+import math
+
+ExplorerGains = collections.namedtuple(
+    'ExplorerGains',
+    'base_speed straight_distance veer_distance turn_distance back_distance '
+    'front_distance turn_factor',
+    defaults=(60, 1.0, 0.5, 0.25, 0.15, 0.20, 0.5))
+
+# Показания вне (MIN_RANGE, MAX_RANGE) заменяются на NO_READING
+MIN_RANGE = 0.02
+MAX_RANGE = 2.0
+NO_READING = 1.0
+
+
+class _ScalarOps:
+    """where / trunc / minimum для чисел (подмножество интерфейса numpy)"""
+
+    @staticmethod
+    def where(condition, a, b):
+        return a if condition else b
+
+    trunc = staticmethod(math.trunc)
+    minimum = staticmethod(min)
+
+
+SCALAR = _ScalarOps()
+
+
+def clean_range(distance, xp=SCALAR):
+    """Показание датчика (м): нет эха или слишком близко - NO_READING"""
+    return xp.where((distance > MIN_RANGE) & (distance < MAX_RANGE), distance, NO_READING)
+
+
+def wheel_speeds(nearest, gains, xp=SCALAR):
+    """Скорости ближнего и дальнего колеса (проценты) по дистанции nearest"""
+    speed = gains.base_speed
+    near = xp.where(nearest >= gains.turn_distance, speed,
+                    xp.where(nearest >= gains.back_distance, -xp.trunc(speed * 0.4), -speed))
+    far = xp.where(nearest >= gains.straight_distance, speed,
+                   xp.where(nearest >= gains.veer_distance, xp.trunc(speed * 0.8),
+                            xp.where(nearest >= gains.turn_distance, xp.trunc(speed * 0.6), -speed)))
+    return near, far
+
+
+def explorer_command(left, right, front, gains, xp=SCALAR):
+    """(linear.x, angular.z) по показаниям левого, правого и переднего датчиков (м)"""
+    # Упор спереди - ниже любой полосы (задний ход)
+    nearest = xp.where(front < gains.front_distance, 0.0, xp.minimum(left, right))
+    near, far = wheel_speeds(nearest, gains, xp)
+    left_near = left < right
+    left_cmd = xp.where(left_near, near, far) / 100.0
+    right_cmd = xp.where(left_near, far, near) / 100.0
+    return (left_cmd + right_cmd) / 2.0, (right_cmd - left_cmd) * gains.turn_factor
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Пакетный симулятор исследователя комнаты для подбора параметров
+
+Закон управления - тот же код, что в RoomExplorerNode (control_law), на
+массивах NumPy: за один шаг считаются все пары (конфигурация, комната).
+Модель повторяет SimWorld и разомкнутое управление HardwareNode на
+массивах: /cmd_vel -> усиление кинематики и порог трогания
+(open_loop_percent) -> ШИМ (convert_speed) -> скорость колеса с мёртвой
+зоной -> точная дуга; упор в стену - колёса буксуют, пока не сменится
+команда. Три сонара - по три луча на ширину луча, как в SimWorld,
+показания через clean_range, как в узле. Константы берутся из
+DEFAULT_CONFIG SimWorld и KinematicsModel, чтобы модели не разошлись.
+
+Комнаты - случайные прямоугольники с квадратными препятствиями (общие
+для всех конфигураций, старт в центре). Для каждой конфигурации по всем
+комнатам: покрытие (доля достижимых клеток 10 см, где побывал центр
+робота), столкновения в минуту, доля застреваний (за stuck_window робот
+сместился меньше stuck_distance) и медиана времени до застревания.
+Конфигурации - декартово произведение значений параметров, порциями по
+процессам:
+
+    ros2 run my_robot explorer_sweep --base-speed 40 60 80 \\
+        --turn-factor 0.3 0.5 0.8 --veer-distance 0.4 0.5 0.7 --rooms 64
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import csv
+import itertools
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault('MY_ROBOT_BACKEND', 'sim')  # Железо для симуляции не нужно
+
+from my_robot.behaviors.control_law import (  # noqa: E402
+    ExplorerGains, clean_range, explorer_command)
+from my_robot.hardware.hal.sim_world import DEFAULT_CONFIG  # noqa: E402
+from my_robot.hardware.kinematics import MIN_SPEED_PERCENT, KinematicsModel  # noqa: E402
+
+CELL = 0.1             # Клетка покрытия (м)
+MAX_ROOM = (5.0, 4.0)  # Наибольшая комната (м), задаёт сетку покрытия
+PAD = 1e3              # Координата вырожденных отрезков-заполнителей
+
+Rooms = collections.namedtuple('Rooms', 'segments free headings')
+Settings = collections.namedtuple(
+    'Settings', 'duration control_hz substeps noise stuck_window stuck_distance seed')
+
+
+def make_rooms(count, seed=0, max_obstacles=3):
+    """
+    Случайные комнаты: отрезки (count, 4 + 4 * max_obstacles, 4),
+    достижимые клетки сетки покрытия (count, клеток) и курс старта
+    """
+    rng = np.random.default_rng(seed)
+    segments = np.full((count, 4 + 4 * max_obstacles, 4), PAD)
+    headings = rng.uniform(-math.pi, math.pi, count)
+    for i in range(count):
+        w = rng.uniform(2.0, MAX_ROOM[0]) / 2.0
+        h = rng.uniform(2.0, MAX_ROOM[1]) / 2.0
+        boxes = [(-w, -h, w, h)]
+        for _ in range(rng.integers(0, max_obstacles + 1)):
+            for _ in range(20):
+                s = rng.uniform(0.2, 0.5) / 2.0
+                x = rng.uniform(-w + s + 0.15, w - s - 0.15)
+                y = rng.uniform(-h + s + 0.15, h - s - 0.15)
+                if math.hypot(x, y) > 0.5 + 1.5 * s:  # Старт в центре свободен
+                    boxes.append((x - s, y - s, x + s, y + s))
+                    break
+        for j, (x1, y1, x2, y2) in enumerate(boxes):
+            corners = ((x1, y1), (x2, y1), (x2, y2), (x1, y2))
+            for k in range(4):
+                segments[i, 4 * j + k] = corners[k] + corners[(k + 1) % 4]
+
+    # Достижимые клетки: центр внутри комнаты и не ближе радиуса робота к стенам
+    gx, gy = (int(round(size / CELL)) for size in MAX_ROOM)
+    cx = (np.arange(gx) + 0.5) * CELL - MAX_ROOM[0] / 2.0
+    cy = (np.arange(gy) + 0.5) * CELL - MAX_ROOM[1] / 2.0
+    px, py = (a.ravel() for a in np.meshgrid(cx, cy, indexing='ij'))
+    walls = segments[:, 0:4]
+    inside = ((px[None] > walls[:, 0, 0, None]) & (px[None] < walls[:, 0, 2, None])
+              & (py[None] > walls[:, 0, 1, None]) & (py[None] < walls[:, 2, 1, None]))
+    clear = clearance(np.broadcast_to(px, (count, px.size)), np.broadcast_to(py, (count, py.size)),
+                      segments)
+    free = inside & (clear >= DEFAULT_CONFIG['robot_radius'])
+    return Rooms(segments, free, headings)
+
+
+def clearance(x, y, segments):
+    """Расстояние от точек (B, P) до ближайшего отрезка (B, S, 4)"""
+    x1, y1, x2, y2 = (segments[:, None, :, k] for k in range(4))
+    ex, ey = x2 - x1, y2 - y1
+    length2 = ex * ex + ey * ey
+    inv = np.divide(1.0, length2, out=np.zeros_like(length2), where=length2 > 0.0)
+    qx, qy = x[..., None] - x1, y[..., None] - y1
+    u = np.clip((qx * ex + qy * ey) * inv, 0.0, 1.0)
+    return np.hypot(qx - u * ex, qy - u * ey).min(axis=-1)
+
+
+def raycast(ox, oy, angle, segments, max_range):
+    """Дальность лучей (B, K) до отрезков (B, S, 4), как Room.raycast"""
+    dx, dy = np.cos(angle)[..., None], np.sin(angle)[..., None]
+    x1, y1, x2, y2 = (segments[:, None, :, k] for k in range(4))
+    ex, ey = x2 - x1, y2 - y1
+    denom = dx * ey - dy * ex
+    qx, qy = x1 - ox[..., None], y1 - oy[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (qx * ey - qy * ex) / denom
+        u = (qx * dy - qy * dx) / denom
+    hit = (np.abs(denom) > 1e-12) & (t > 0.0) & (u >= 0.0) & (u <= 1.0)
+    return np.where(hit, t, max_range).min(axis=-1).clip(max=max_range)
+
+
+def wheel_velocities(linear, angular, kinematics):
+    """
+    Скорости колёс (2, B) в м/с и ШИМ со знаком (2, B) по /cmd_vel:
+    open_loop_percent и convert_speed узла, мёртвая зона моторов SimWorld
+    """
+    forward = linear * kinematics.linear_scale
+    turn = angular * kinematics.turn_scale * kinematics.half_base
+    percent = np.stack((forward - turn, forward + turn)) * 100.0
+    small = (percent != 0.0) & (np.abs(percent) < MIN_SPEED_PERCENT)
+    percent = np.where(small, np.copysign(MIN_SPEED_PERCENT, percent), percent)
+    pwm = np.minimum(np.floor(np.abs(percent) * 255.0 / 100.0), 255.0)
+    speed = np.where(pwm < DEFAULT_CONFIG['pwm_deadband'], 0.0,
+                     DEFAULT_CONFIG['max_wheel_speed'] * pwm / 255.0)
+    sign = np.sign(percent)
+    return speed * sign, pwm * sign
+
+
+def simulate(gains, rooms, settings, room_index, rng):
+    """
+    Прогон пакета: gains - ExplorerGains из массивов (B,), room_index (B,) -
+    комната каждой симуляции. Возвращает покрытие, столкновения и время
+    до застревания (inf - не застрял) по симуляциям
+    """
+    cfg = DEFAULT_CONFIG
+    kinematics = KinematicsModel(cfg['wheel_base'], cfg['wheel_diameter'], cfg['ticks_per_rev'])
+    segments = rooms.segments[room_index]
+    free = rooms.free[room_index]
+    count = len(room_index)
+    rows = np.arange(count)
+
+    # Лучи сонаров: (крепление x, y, курс) x (-fov/2, 0, +fov/2)
+    mounts = np.array([sonar[2:5] for sonar in cfg['sonars']])  # left, right, front
+    half = cfg['sonar_fov'] / 2.0
+    ray_x = np.repeat(mounts[:, 0], 3)
+    ray_y = np.repeat(mounts[:, 1], 3)
+    ray_yaw = np.repeat(mounts[:, 2], 3) + np.tile((-half, 0.0, half), 3)
+    radius = cfg['robot_radius']
+    grid_x = int(round(MAX_ROOM[0] / CELL))
+    grid_y = int(round(MAX_ROOM[1] / CELL))
+
+    x = np.zeros(count)
+    y = np.zeros(count)
+    theta = rooms.headings[room_index].copy()
+    pwm = np.zeros((2, count))
+    stuck = np.zeros(count, dtype=bool)
+    collisions = np.zeros(count, dtype=np.int64)
+    visited = np.zeros_like(free)
+    stuck_time = np.full(count, np.inf)
+    anchor_x, anchor_y, anchor_t = x.copy(), y.copy(), 0.0
+
+    control_dt = 1.0 / settings.control_hz
+    dt = control_dt / settings.substeps
+    steps = int(round(settings.duration * settings.control_hz))
+    for step in range(steps):
+        now = step * control_dt
+        # Показания: ближайший из трёх лучей, шум, отсев как в узле
+        cos_t, sin_t = np.cos(theta)[:, None], np.sin(theta)[:, None]
+        ox = x[:, None] + ray_x * cos_t - ray_y * sin_t
+        oy = y[:, None] + ray_x * sin_t + ray_y * cos_t
+        ranges = raycast(ox, oy, theta[:, None] + ray_yaw, segments, cfg['sonar_max_range'])
+        ranges = ranges.reshape(count, 3, 3).min(axis=2)
+        if settings.noise:
+            ranges = ranges + rng.normal(0.0, settings.noise, ranges.shape)
+        ranges = clean_range(ranges, np)
+
+        linear, angular = explorer_command(ranges[:, 0], ranges[:, 1], ranges[:, 2], gains, np)
+        v, new_pwm = wheel_velocities(linear, angular, kinematics)
+        stuck &= (new_pwm == pwm).all(axis=0)  # Новая запись в Motor HAT - снова пробуем ехать
+        pwm = new_pwm
+
+        speed = (v[0] + v[1]) / 2.0
+        omega = (v[1] - v[0]) / cfg['wheel_base']
+        straight = np.abs(omega) < 1e-9
+        turn_radius = speed / np.where(straight, 1.0, omega)
+        for _ in range(settings.substeps):
+            turned = theta + omega * dt
+            nx = np.where(straight, x + speed * dt * np.cos(theta),
+                          x + turn_radius * (np.sin(turned) - np.sin(theta)))
+            ny = np.where(straight, y + speed * dt * np.sin(theta),
+                          y - turn_radius * (np.cos(turned) - np.cos(theta)))
+            blocked = clearance(nx[:, None], ny[:, None], segments)[:, 0] < radius
+            collisions += ~stuck & blocked
+            stuck |= blocked
+            x = np.where(stuck, x, nx)
+            y = np.where(stuck, y, ny)
+            theta = np.where(stuck, theta, np.arctan2(np.sin(turned), np.cos(turned)))
+            cell_x = np.clip(((x + MAX_ROOM[0] / 2.0) / CELL).astype(np.int64), 0, grid_x - 1)
+            cell_y = np.clip(((y + MAX_ROOM[1] / 2.0) / CELL).astype(np.int64), 0, grid_y - 1)
+            visited[rows, cell_x * grid_y + cell_y] = True
+
+        now += control_dt
+        if now - anchor_t >= settings.stuck_window - 1e-9:
+            progress = np.hypot(x - anchor_x, y - anchor_y)
+            stuck_time = np.where(np.isinf(stuck_time) & (progress < settings.stuck_distance),
+                                  anchor_t, stuck_time)
+            anchor_x, anchor_y, anchor_t = x.copy(), y.copy(), now
+
+    coverage = (visited & free).sum(axis=1) / np.maximum(free.sum(axis=1), 1)
+    return coverage, collisions, stuck_time
+
+
+def simulate_configs(configs, rooms, settings, chunk_id=0):
+    """Конфигурации (список ExplorerGains) по всем комнатам: метрики каждой"""
+    room_count = len(rooms.headings)
+    gains = ExplorerGains(*(np.repeat(np.array(values, dtype=float), room_count)
+                            for values in zip(*configs)))
+    room_index = np.tile(np.arange(room_count), len(configs))
+    rng = np.random.default_rng((settings.seed, chunk_id))
+    coverage, collisions, stuck_time = simulate(gains, rooms, settings, room_index, rng)
+
+    shape = (len(configs), room_count)
+    coverage = coverage.reshape(shape)
+    collisions = collisions.reshape(shape)
+    stuck_time = stuck_time.reshape(shape)
+    results = []
+    for i, config in enumerate(configs):
+        stuck = np.isfinite(stuck_time[i])
+        results.append(dict(config._asdict(), **{
+            'coverage_mean': round(float(coverage[i].mean()), 4),
+            'coverage_p10': round(float(np.percentile(coverage[i], 10)), 4),
+            'collisions_per_min': round(float(collisions[i].mean() * 60.0 / settings.duration), 2),
+            'stuck_fraction': round(float(stuck.mean()), 3),
+            # Не застрявшие - как застрявшие в конце прогона
+            'time_to_stuck_s': round(float(np.median(
+                np.where(stuck, stuck_time[i], settings.duration))), 1),
+        }))
+    return results
+
+
+def valid(config):
+    """Полосы дистанций по убыванию"""
+    return (config.straight_distance >= config.veer_distance >= config.turn_distance
+            >= config.back_distance > 0.0 and config.base_speed > 0)
+
+
+def sweep(configs, rooms, settings, workers, chunk):
+    """Все конфигурации порциями по chunk, в workers процессах"""
+    chunks = [configs[i:i + chunk] for i in range(0, len(configs), chunk)]
+    if workers <= 1:
+        return [result for i, part in enumerate(chunks)
+                for result in simulate_configs(part, rooms, settings, i)]
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(simulate_configs, part, rooms, settings, i)
+                   for i, part in enumerate(chunks)]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    defaults = ExplorerGains()
+    for name in ExplorerGains._fields:
+        parser.add_argument('--' + name.replace('_', '-'), nargs='+',
+                            type=int if name == 'base_speed' else float,
+                            default=[getattr(defaults, name)], help='значения для перебора')
+    parser.add_argument('--rooms', type=int, default=32, help='случайных комнат')
+    parser.add_argument('--max-obstacles', type=int, default=3)
+    parser.add_argument('--duration', type=float, default=120.0, help='длительность прогона (с)')
+    parser.add_argument('--control-hz', type=float, default=10.0, help='частота шагов управления')
+    parser.add_argument('--substeps', type=int, default=2, help='шагов физики на шаг управления')
+    parser.add_argument('--noise', type=float, default=0.01, help='шум сонаров, СКО (м)')
+    parser.add_argument('--stuck-window', type=float, default=10.0, help='окно проверки застревания (с)')
+    parser.add_argument('--stuck-distance', type=float, default=0.15, help='смещение за окно (м), меньше - застрял')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk', type=int, default=0, help='конфигураций на задачу (0 - ~4096 симуляций)')
+    parser.add_argument('--top', type=int, default=10, help='лучших в выводе')
+    parser.add_argument('--output', help='CSV со всеми конфигурациями')
+    args = parser.parse_args()
+
+    grid = [getattr(args, name) for name in ExplorerGains._fields]
+    configs = [ExplorerGains(*values) for values in itertools.product(*grid)]
+    skipped = len(configs)
+    configs = [config for config in configs if valid(config)]
+    skipped -= len(configs)
+    if not configs:
+        parser.error(f'все {skipped} конфигураций недопустимы: нужно straight_distance >= '
+                     'veer_distance >= turn_distance >= back_distance > 0 и base_speed > 0')
+    rooms = make_rooms(args.rooms, args.seed, args.max_obstacles)
+    settings = Settings(args.duration, args.control_hz, args.substeps, args.noise,
+                        args.stuck_window, args.stuck_distance, args.seed)
+    chunk = args.chunk or max(1, 4096 // args.rooms)
+
+    started = time.perf_counter()
+    results = sweep(configs, rooms, settings, args.workers, chunk)
+    elapsed = time.perf_counter() - started
+    results.sort(key=lambda r: (-r['coverage_mean'], r['collisions_per_min'], -r['time_to_stuck_s']))
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+    simulations = len(configs) * args.rooms
+    summary = {
+        'configs': len(configs),
+        'skipped_invalid': skipped,
+        'rooms': args.rooms,
+        'simulations': simulations,
+        'wall_seconds': round(elapsed, 1),
+        'simulated_seconds_per_wall_second': round(simulations * args.duration / elapsed),
+        'top': results[:args.top],
+    }
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if results:
+        best = results[0]
+        params = ' '.join(f'-p {name}:={best[name]!r}' for name in ExplorerGains._fields)
+        print(f'ros2 run my_robot room_explorer --ros-args {params}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 import rclpy
 from rclpy.node import Node
+from rclpy.time import Time
 from geometry_msgs.msg import Twist
 from sensor_msgs.msg import Range
+from std_msgs.msg import Header
+from my_robot import composition
+from my_robot.behaviors.control_law import ExplorerGains, clean_range, explorer_command
+from my_robot.diagnostics import CallbackDiagnostics, LatencyTrace
+from my_robot.profiler_service import ProfilerService
 
 class RoomExplorerNode(Node):
     def __init__(self):
@@ -12,67 +18,116 @@ class RoomExplorerNode(Node):
         self.declare_parameter('base_speed', 60)
         self.declare_parameter('loop_hz', 10)
         self.declare_parameter('wheel_base', 0.09)  # ДОБАВИТЬ ЭТО
+        self.declare_parameter('diagnostics_period', 2.0)  # Период /diagnostics (с), 0 - выкл
+        self.declare_parameter('control_mode', 'event')  # 'event' - шаг на каждое измерение, 'timer' - loop_hz
+        self.declare_parameter('max_sensor_age', 0.5)    # Показания старше (с) не используются
+        # Закон управления (control_law, подбор - explorer_sweep)
+        defaults = ExplorerGains()
+        self.declare_parameter('straight_distance', defaults.straight_distance)  # Дальше (м) - прямо
+        self.declare_parameter('veer_distance', defaults.veer_distance)          # Плавный поворот
+        self.declare_parameter('turn_distance', defaults.turn_distance)          # Крутой поворот
+        self.declare_parameter('back_distance', defaults.back_distance)          # Ниже - задний ход
+        self.declare_parameter('front_distance', defaults.front_distance)        # Упор спереди (м)
+        self.declare_parameter('turn_factor', defaults.turn_factor)              # angular.z на разницу колёс
         
-        self.speed = self.get_parameter('base_speed').value
+        self.gains = ExplorerGains(*(self.get_parameter(name).value for name in ExplorerGains._fields))
+        self.event_mode = self.get_parameter('control_mode').value == 'event'
+        self.max_sensor_age = self.get_parameter('max_sensor_age').value
         
-        self.cmd_pub = self.create_publisher(Twist, '/cmd_vel', 10)
+        self.cmd_pub = composition.create_publisher(self, Twist, 'cmd_vel', 10)
+        # Метка эха, на которое отвечает команда (трассировка задержки)
+        self.trace_pub = composition.create_publisher(self, Header, 'cmd_vel/trace', 10)
         
         self.sensors = {'left': 1.0, 'right': 1.0, 'front': 1.0}
-        self.create_subscription(Range, '/sensors/distance', self.sensor_callback, 10)
+        self.stamps = {'left': None, 'right': None, 'front': None}  # header.stamp показаний
+        self.stopped = False  # Остановлен из-за устаревших показаний
         
+        # Диагностика колбэков и задержек (эхо -> приём -> решение -> /cmd_vel)
+        self.diagnostics = CallbackDiagnostics(
+            self, self.get_parameter('diagnostics_period').value)
+        self.latency = LatencyTrace(('echo_to_receive', 'echo_to_decision', 'decision_to_cmd'))
+        self.diagnostics.add_source('latency', self.latency.stats)
+        instrument = self.diagnostics.instrument
+
+        composition.create_subscription(
+            self, Range, 'sensors/distance', instrument('sensor_callback', self.sensor_callback), 10)
+
         loop_period = 1.0 / self.get_parameter('loop_hz').value
-        self.create_timer(loop_period, self.control_loop)
+        if self.event_mode:
+            # Шаги - по приходу показаний, таймер только следит за их свежестью
+            self.create_timer(loop_period, instrument(
+                'stale_watchdog', self.stale_watchdog, loop_period))
+        else:
+            self.create_timer(loop_period, instrument(
+                'control_loop', self.control_loop, loop_period))
         
+        self.profiler_service = ProfilerService(self)  # ~/profile
         self.loop_count = 0
         self.get_logger().info('Room Explorer Node запущен')
 
     def sensor_callback(self, msg):
-        frame = msg.header.frame_id
-        if '_sensor' in frame:
-            position = frame.replace('_sensor', '')
+        frame = msg.header.frame_id.rsplit('/', 1)[-1]  # Без префикса робота
+        if frame.endswith('_sensor'):
+            position = frame[:-len('_sensor')]
             if position in self.sensors:
-                if 0.02 < msg.range < 2.0:
-                    self.sensors[position] = msg.range
-                else:
-                    self.sensors[position] = 1.0
+                self.sensors[position] = clean_range(msg.range)
+                stamp = Time.from_msg(msg.header.stamp)
+                self.stamps[position] = stamp
+                now = self.get_clock().now()
+                self.latency.record('echo_to_receive', (now - stamp).nanoseconds * 1e-9)
+                # Событийный режим: шаг сразу, если набор полный и свежий
+                if self.event_mode and self.sensors_fresh(now):
+                    self.control_loop(stamp)
 
-    def get_speeds(self, nearest_distance):
-        if nearest_distance >= 1.0:
-            return self.speed, self.speed, 100
-        elif nearest_distance >= 0.5:
-            return self.speed, int(self.speed * 0.8), 100
-        elif nearest_distance >= 0.25:
-            return self.speed, int(self.speed * 0.6), 100
-        elif nearest_distance >= 0.15:
-            return -int(self.speed * 0.4), -self.speed, 100
-        else:
-            return -self.speed, -self.speed, 150
+    def sensors_fresh(self, now):
+        """Все три показания есть и не старше max_sensor_age"""
+        for stamp in self.stamps.values():
+            if stamp is None or (now - stamp).nanoseconds * 1e-9 > self.max_sensor_age:
+                return False
+        return True
+
+    def stale_watchdog(self):
+        """Остановиться, если свежих показаний нет (событийный режим)"""
+        if not self.stopped and not self.sensors_fresh(self.get_clock().now()):
+            self.stop_robot()
 
-    def control_loop(self):
+    def stop_robot(self):
+        """Нулевая команда при устаревших показаниях (один раз)"""
+        self.stopped = True
+        self.cmd_pub.publish(Twist())
+        self.get_logger().warn(
+            f'Показания датчиков старше {self.max_sensor_age} с, остановка',
+            throttle_duration_sec=5)
+
+    def control_loop(self, trigger=None):
+        """
+        Шаг управления
+        trigger: header.stamp показания, вызвавшего шаг (событийный режим)
+        """
+        now = self.get_clock().now()
+        if trigger is None:
+            if not self.sensors_fresh(now):
+                if not self.stopped:
+                    self.stop_robot()
+                return
+            trigger = max(self.stamps.values(), key=lambda stamp: stamp.nanoseconds)
+        self.stopped = False
         left = self.sensors['left']
         right = self.sensors['right']
         front = self.sensors['front']
         
-        nearest_side = min(left, right)
-        if front < 0.20:
-            nearest_side = 0.10
-            
-        nearest_speed, furthest_speed, delay = self.get_speeds(nearest_side)
-        
-        if left < right:
-            left_cmd = nearest_speed / 100.0
-            right_cmd = furthest_speed / 100.0
-        else:
-            left_cmd = furthest_speed / 100.0
-            right_cmd = nearest_speed / 100.0
-            
+        # Общий с explorer_sim закон управления (под упрощенный hardware_node)
         cmd = Twist()
-        cmd.linear.x = (left_cmd + right_cmd) / 2.0
-        
-        # ИСПРАВЛЕНА ФОРМУЛА ПОВОРОТА (под упрощенный hardware_node)
-        cmd.angular.z = (right_cmd - left_cmd) * 0.5 
+        cmd.linear.x, cmd.angular.z = explorer_command(left, right, front, self.gains)
         
+        decided = self.get_clock().now()
+        self.latency.record('echo_to_decision', (decided - trigger).nanoseconds * 1e-9)
+        # Новый объект: в составном режиме сообщение передаётся по ссылке
+        trace = Header()
+        trace.stamp = trigger.to_msg()
+        self.trace_pub.publish(trace)
         self.cmd_pub.publish(cmd)
+        self.latency.record('decision_to_cmd', (self.get_clock().now() - decided).nanoseconds * 1e-9)
         
         self.loop_count += 1
         if self.loop_count % 10 == 0:
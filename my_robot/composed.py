@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Составной режим: HardwareNode, RoomExplorerNode и ServoControllerNode
+в одном процессе под одним executor'ом
+
+/sensors/distance, /cmd_vel и /cmd_vel/trace между ними идут через
+шину процесса (my_robot.composition) без сериализации; внешние
+подписчики по-прежнему получают их из DDS.
+
+Executor однопоточный: шина доставляет сообщения подписчикам процесса
+из одного колбэка guard condition, вне их групп колбэков, а узлы
+поведения не рассчитаны на параллельные колбэки. Группы HardwareNode
+действуют при отдельном запуске hardware_node.
+"""
+
+import rclpy
+from rclpy.executors import SingleThreadedExecutor
+
+from my_robot import composition
+
+
+def main(args=None):
+    """Точка входа составного режима"""
+    rclpy.init(args=args)
+    bus = composition.enable_bus()
+
+    # Импорт после включения шины: узлы создают издателей через неё
+    from my_robot.behaviors.room_explorer_node import RoomExplorerNode
+    from my_robot.hardware.hardware_node import HardwareNode
+    from my_robot.hardware.servo_controller import ServoControllerNode
+
+    hardware = HardwareNode()
+    hardware.diagnostics.add_source('in_process_bus', bus.stats)
+    nodes = [hardware, RoomExplorerNode(), ServoControllerNode()]
+    executor = SingleThreadedExecutor()
+    for node in nodes:
+        executor.add_node(node)
+
+    try:
+        executor.spin()
+    except KeyboardInterrupt:
+        hardware.get_logger().info('Получен сигнал остановки (Ctrl+C)')
+    finally:
+        for node in nodes:
+            if hasattr(node, 'stop_all'):
+                node.stop_all()
+            executor.remove_node(node)
+            node.destroy_node()
+        rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Быстрый путь сообщений между узлами одного процесса
+
+rclpy не умеет intra-process: каждое сообщение сериализуется в DDS даже
+для соседнего узла. В составном режиме (my_robot.composed) узлы создают
+издателей и подписки через create_publisher/create_subscription этого
+модуля: сообщение передаётся подписчикам процесса объектом через общую
+очередь, колбэки выполняются executor'ом (guard condition), порядок
+публикаций сохраняется. В DDS сообщение уходит, только если есть внешние
+подписчики. Тогда своя копия возвращается из DDS и подписчикам процесса:
+такие копии (только реально отправленные в DDS и не старше copy_timeout)
+отбрасываются сравнением с ожидаемыми. Сообщения внешних издателей,
+равные недавно доставленным напрямую, не теряются: без публикации в DDS
+ждать нечего.
+
+Без включённой шины функции - обычные node.create_publisher/subscription.
+Сообщение после publish() не должно изменяться издателем. Топики
+сопоставляются по полному имени (с пространством имён узла).
+"""
+
+import collections
+import threading
+import time
+
+_bus = None
+
+
+def enable_bus():
+    """Включить шину процесса (до создания узлов)"""
+    global _bus
+    if _bus is None:
+        _bus = InProcessBus()
+    return _bus
+
+
+def create_publisher(node, msg_type, topic, qos):
+    if _bus is None:
+        return node.create_publisher(msg_type, topic, qos)
+    return _bus.create_publisher(node, msg_type, topic, qos)
+
+
+def create_subscription(node, msg_type, topic, callback, qos, callback_group=None):
+    if _bus is None:
+        return node.create_subscription(msg_type, topic, callback, qos,
+                                        callback_group=callback_group)
+    return _bus.create_subscription(node, msg_type, topic, callback, qos, callback_group)
+
+
+class _LocalSubscription:
+    """Подписчик шины: прямая доставка и отсев копий из DDS"""
+
+    __slots__ = ('callback', 'expected', 'subscription')
+
+    def __init__(self, callback, depth):
+        self.callback = callback
+        self.expected = collections.deque(maxlen=depth)  # (время, сообщение), ушедшие и в DDS
+        self.subscription = None
+
+    def deliver_local(self, msg):
+        self.callback(msg)
+
+    def deliver_dds(self, msg, bus):
+        expected = self.expected
+        with bus.lock:
+            # Своя копия приходит за миллисекунды; старые записи - потерянные в DDS
+            expired = time.monotonic() - bus.copy_timeout
+            while expected and expected[0][0] < expired:
+                expected.popleft()
+            for i, (_, sent) in enumerate(expected):
+                if sent == msg:
+                    del expected[i]
+                    bus.duplicates_dropped += 1
+                    return
+        self.callback(msg)
+
+
+class _FastPublisher:
+    """Издатель: подписчикам процесса - объект, в DDS - если есть внешние"""
+
+    def __init__(self, bus, publisher, topic):
+        self._bus = bus
+        self.publisher = publisher
+        self.topic = topic
+
+    def publish(self, msg):
+        bus = self._bus
+        dds = self.publisher.get_subscription_count() > bus.local_count(self.topic)
+        bus.deliver(self.topic, msg, dds)
+        if dds:
+            self.publisher.publish(msg)
+            bus.dds_publishes += 1
+        else:
+            bus.dds_skipped += 1
+
+    def get_subscription_count(self):
+        return self.publisher.get_subscription_count()
+
+
+class InProcessBus:
+    """Шина сообщений между узлами одного процесса"""
+
+    def __init__(self, depth=16, copy_timeout=1.0):
+        """
+        depth: сколько отправленных в DDS сообщений ждать обратно (на подписчика)
+        copy_timeout: сколько ждать свою копию из DDS (с)
+        """
+        self.depth = depth
+        self.copy_timeout = copy_timeout
+        self.lock = threading.Lock()
+        self._subscribers = {}   # topic -> [_LocalSubscription]
+        self._queue = collections.deque()
+        self._guard = None
+        # Метрики
+        self.local_deliveries = 0
+        self.dds_publishes = 0
+        self.dds_skipped = 0
+        self.duplicates_dropped = 0
+
+    def create_publisher(self, node, msg_type, topic, qos):
+        self._attach(node)
+        publisher = node.create_publisher(msg_type, topic, qos)
+        return _FastPublisher(self, publisher, publisher.topic_name)
+
+    def create_subscription(self, node, msg_type, topic, callback, qos, callback_group=None):
+        """
+        DDS-подписка остаётся: внешние издатели (телеуправление) тоже доходят.
+        callback_group действует на доставку из DDS; прямая доставка идёт
+        из колбэка guard condition (группа по умолчанию первого узла)
+        """
+        self._attach(node)
+        local = _LocalSubscription(callback, self.depth)
+        local.subscription = node.create_subscription(
+            msg_type, topic, lambda msg: local.deliver_dds(msg, self), qos,
+            callback_group=callback_group)
+        self._subscribers.setdefault(local.subscription.topic_name, []).append(local)
+        return local.subscription
+
+    def local_count(self, topic):
+        """Число подписчиков процесса на топик"""
+        return len(self._subscribers.get(topic, ()))
+
+    def deliver(self, topic, msg, dds=False):
+        """
+        Поставить сообщение в очередь подписчиков процесса, вернуть их число
+        dds: сообщение уходит и в DDS - копию оттуда отбросить
+        """
+        subscribers = self._subscribers.get(topic)
+        if not subscribers:
+            return 0
+        if dds:
+            now = time.monotonic()
+            with self.lock:
+                for local in subscribers:
+                    local.expected.append((now, msg))
+        for local in subscribers:
+            self._queue.append((local, msg))
+        self._guard.trigger()
+        return len(subscribers)
+
+    def stats(self):
+        return {
+            'local_deliveries': self.local_deliveries,
+            'dds_publishes': self.dds_publishes,
+            'dds_skipped': self.dds_skipped,
+            'duplicates_dropped': self.duplicates_dropped,
+            'queued': len(self._queue),
+        }
+
+    def _attach(self, node):
+        if self._guard is None:
+            self._guard = node.create_guard_condition(self._drain)
+
+    def _drain(self):
+        """Колбэк guard condition: доставка в порядке публикации"""
+        queue = self._queue
+        while queue:
+            local, msg = queue.popleft()
+            self.local_deliveries += 1
+            local.deliver_local(msg)
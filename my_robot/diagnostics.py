@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Диагностика колбэков: время выполнения, джиттер, перегрузки, задержка
+
+Каждый колбэк оборачивается в CallbackStats. Задержка (lag) у таймера -
+отставание от расписания, у подписки - от header.stamp сообщения до начала
+колбэка по часам узла (очередь и транспорт; сообщения без header не
+меряются). Выборки копятся в гистограммах фиксированного размера
+(my_robot.histogram), поэтому память не растёт.
+Сводка раз в несколько секунд публикуется в /diagnostics
+(diagnostic_msgs/DiagnosticArray). Достаточно дёшево, чтобы не выключать.
+"""
+
+import contextlib
+import os
+import time
+
+from diagnostic_msgs.msg import DiagnosticArray, DiagnosticStatus, KeyValue
+
+from my_robot.histogram import FixedHistogram
+
+
+class CallbackStats:
+    """Статистика одного колбэка"""
+
+    def __init__(self, name, period=None):
+        """
+        name: имя колбэка
+        period: номинальный период таймера (с) или None для подписок
+        """
+        self.name = name
+        self.period = period
+        self.exec_us = FixedHistogram()
+        self.jitter_us = FixedHistogram()
+        self.lag_us = FixedHistogram()
+        self.calls = 0
+        self.overruns = 0          # Всего за время работы
+        self.window_overruns = 0   # С последней публикации
+        self.window_start = time.monotonic()
+        self._last_start = None
+        self._expected = None
+
+    def begin(self, now):
+        """Начало вызова: джиттер интервала и отставание от расписания"""
+        period = self.period
+        last = self._last_start
+        self._last_start = now
+        if period is None or last is None:
+            self._expected = now
+            return
+        self.jitter_us.record(abs(now - last - period) * 1e6)
+        expected = self._expected + period
+        lag = now - expected
+        if lag < 0.0 or lag > period:
+            # Опережение или пропущенный тик - расписание заново от now
+            expected = now
+            lag = 0.0 if lag < 0.0 else lag
+        self._expected = expected
+        self.lag_us.record(lag * 1e6)
+
+    def end(self, elapsed):
+        """Конец вызова: время выполнения (с)"""
+        self.calls += 1
+        self.exec_us.record(elapsed * 1e6)
+        if self.period is not None and elapsed > self.period:
+            self.overruns += 1
+            self.window_overruns += 1
+
+    def set_period(self, period):
+        """Новый период таймера: следующий вызов начинает расписание заново"""
+        self.period = period
+        self._last_start = None
+
+    def record_lag(self, lag):
+        """Задержка доставки сообщения (с), если известна по header.stamp"""
+        if lag >= 0.0:
+            self.lag_us.record(lag * 1e6)
+
+    def summary(self, now):
+        """Пары ключ-значение за текущее окно"""
+        window = max(now - self.window_start, 1e-9)
+        return [
+            ('calls', self.exec_us.count),
+            ('rate_hz', round(self.exec_us.count / window, 2)),
+            ('exec_p50_us', self.exec_us.percentile(0.5)),
+            ('exec_p99_us', self.exec_us.percentile(0.99)),
+            ('exec_max_us', self.exec_us.max),
+            ('jitter_p99_us', self.jitter_us.percentile(0.99)),
+            ('jitter_max_us', self.jitter_us.max),
+            ('overruns', self.window_overruns),
+            ('overruns_total', self.overruns),
+        ] + ([('lag_p99_us', self.lag_us.percentile(0.99)),
+              ('lag_max_us', self.lag_us.max)] if self.lag_us.count else [])
+
+    def reset_window(self, now):
+        self.exec_us.reset()
+        self.jitter_us.reset()
+        self.lag_us.reset()
+        self.window_overruns = 0
+        self.window_start = now
+
+
+class LatencyTrace:
+    """Гистограммы задержек этапов конвейера (например, эхо -> мотор)"""
+
+    def __init__(self, stages):
+        """stages: имена этапов"""
+        self.stages = {name: FixedHistogram() for name in stages}
+
+    def record(self, stage, seconds):
+        """Задержка этапа (с); отрицательные (рассинхрон часов) отбрасываются"""
+        if seconds >= 0.0:
+            self.stages[stage].record(seconds * 1e6)
+
+    def stats(self):
+        """Сводка за окно (для CallbackDiagnostics.add_source)"""
+        result = {}
+        for name, histogram in self.stages.items():
+            result[f'{name}_count'] = histogram.count
+            result[f'{name}_p50_us'] = histogram.percentile(0.5)
+            result[f'{name}_p99_us'] = histogram.percentile(0.99)
+            result[f'{name}_max_us'] = histogram.max
+            histogram.reset()
+        return result
+
+
+def process_age():
+    """Время с запуска процесса (с) по /proc или None"""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(uptime - start_ticks / os.sysconf('SC_CLK_TCK'), 0.0)
+
+
+class StartupProfile:
+    """Длительности фаз запуска (мс) и моменты событий от старта процесса"""
+
+    def __init__(self):
+        now = time.monotonic()
+        age = process_age()
+        self.process_start = now - (age if age is not None else 0.0)
+        self.phases = {}       # Фаза -> длительность (мс)
+        self.milestones = {}   # Событие -> мс от старта процесса
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Замер фазы: with profile.phase('motors'): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - start) * 1e3, 1)
+
+    def milestone(self, name):
+        """Отметить событие (только первое); True, если отмечено сейчас"""
+        if name in self.milestones:
+            return False
+        self.milestones[name] = round((time.monotonic() - self.process_start) * 1e3, 1)
+        return True
+
+    def stats(self):
+        """Сводка (для CallbackDiagnostics.add_source)"""
+        result = {f'{name}_ms': value for name, value in list(self.phases.items())}
+        result.update((f'{name}_at_ms', value) for name, value in list(self.milestones.items()))
+        return result
+
+    def summary(self):
+        """Строка для лога"""
+        phases = ', '.join(f'{name}={value:.0f}' for name, value in list(self.phases.items()))
+        milestones = ', '.join(f'{name}@{value:.0f}' for name, value in list(self.milestones.items()))
+        return f'фазы (мс): {phases}; события (мс от старта): {milestones}'
+
+
+class CallbackDiagnostics:
+    """Реестр статистик колбэков узла и публикация в /diagnostics"""
+
+    def __init__(self, node, publish_period=2.0, callback_group=None):
+        """
+        node: узел rclpy
+        publish_period: период публикации сводки (с), 0 - не публиковать
+        callback_group: группа колбэков таймера публикации
+        """
+        self.node = node
+        # Имя в статусах: узел, с пространством имён робота (если есть)
+        namespace = node.get_namespace().strip('/')
+        self.prefix = f'{namespace}/{node.get_name()}' if namespace else node.get_name()
+        self.stats = {}
+        self.sources = {}
+        self._msg = DiagnosticArray()
+        self._pub = None
+        if publish_period > 0:
+            self._pub = node.create_publisher(DiagnosticArray, '/diagnostics', 10)
+            self._timer = node.create_timer(publish_period, self.publish,
+                                             callback_group=callback_group)
+
+    def instrument(self, name, callback, period=None):
+        """Обернуть колбэк таймера (period) или подписки (period=None)"""
+        stats = CallbackStats(name, period)
+        self.stats[name] = stats
+        perf_counter = time.perf_counter
+        monotonic = time.monotonic
+
+        if period is None:
+            clock = self.node.get_clock()
+
+            def wrapper(*args):
+                stats.begin(monotonic())
+                header = getattr(args[0], 'header', None) if args else None
+                if header is not None:
+                    stamp = header.stamp
+                    if stamp.sec or stamp.nanosec:
+                        stats.record_lag((clock.now().nanoseconds - stamp.sec * 1_000_000_000
+                                          - stamp.nanosec) * 1e-9)
+                start = perf_counter()
+                try:
+                    return callback(*args)
+                finally:
+                    stats.end(perf_counter() - start)
+        else:
+            def wrapper(*args):
+                stats.begin(monotonic())
+                start = perf_counter()
+                try:
+                    return callback(*args)
+                finally:
+                    stats.end(perf_counter() - start)
+
+        wrapper.stats = stats
+        return wrapper
+
+    def add_source(self, name, provider):
+        """Дополнительная сводка в /diagnostics: provider() -> dict значений"""
+        self.sources[name] = provider
+
+    def publish(self):
+        """Сводка по всем колбэкам за окно"""
+        now = time.monotonic()
+        prefix = self.prefix
+        statuses = []
+        for stats in self.stats.values():
+            status = DiagnosticStatus()
+            status.name = f'{prefix}: {stats.name}'
+            status.hardware_id = prefix
+            jitter = stats.jitter_us.percentile(0.99)
+            if stats.window_overruns:
+                status.level = DiagnosticStatus.WARN
+                status.message = f'{stats.window_overruns} перегрузок'
+            elif stats.period is not None and jitter > stats.period * 0.5e6:
+                status.level = DiagnosticStatus.WARN
+                status.message = 'Большой джиттер таймера'
+            else:
+                status.level = DiagnosticStatus.OK
+                status.message = 'OK'
+            status.values = [KeyValue(key=k, value=str(v)) for k, v in stats.summary(now)]
+            statuses.append(status)
+            stats.reset_window(now)
+        for name, provider in list(self.sources.items()):
+            status = DiagnosticStatus()
+            status.name = f'{prefix}: {name}'
+            status.hardware_id = prefix
+            status.level = DiagnosticStatus.OK
+            status.message = 'OK'
+            status.values = [KeyValue(key=k, value=str(v)) for k, v in provider().items()]
+            statuses.append(status)
+
+        self._msg.header.stamp = self.node.get_clock().now().to_msg()
+        self._msg.status = statuses
+        self._pub.publish(self._msg)
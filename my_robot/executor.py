@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Многопоточный executor с настройкой своих потоков
+
+MultiThreadedExecutor выполняет колбэки разных групп (callback groups)
+параллельно: команда /cmd_vel не ждёт в очереди за публикацией датчиков
+или диагностикой. Колбэки одной группы MutuallyExclusive по-прежнему
+идут по одному, поэтому состояние группы не требует блокировок.
+
+Приоритет и ядра задаются потоку ОС, а не группе: готовый колбэк
+достаётся любому свободному потоку пула. Поэтому поток ожидания (spin) и
+все потоки пула получают одни и те же priority и cpus; потоки устройств
+настраиваются отдельно (my_robot.realtime.configure_thread).
+
+Схема MultiThreadedExecutor повторена поверх открытого API Executor
+(wait_for_ready_callbacks): пул свой, и его поток настраивается при
+создании, то есть при первой раздаче ему колбэка. Внутренние атрибуты
+rclpy не подменяются.
+
+Колбэки Python чередуются под GIL: поток с готовой командой получает
+интерпретатор не позже sys.getswitchinterval() (5 мс по умолчанию) -
+это слагаемое худшей задержки, его уменьшает switch_interval.
+"""
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from rclpy.executors import (ConditionReachedException, Executor, ExternalShutdownException,
+                             ShutdownException, TimeoutException)
+
+from my_robot.realtime import configure_thread
+
+
+class PriorityExecutor(Executor):
+    """Многопоточный executor, потоки которого получают приоритет и ядра"""
+
+    def __init__(self, num_threads=3, priority=0, cpus=(), switch_interval=0.0, context=None):
+        """
+        num_threads: потоков пула (по числу групп, которые должны идти параллельно)
+        priority: SCHED_FIFO потоков executor'а (0 - обычный планировщик)
+        cpus: ядра потоков executor'а (пусто - без привязки)
+        switch_interval: интервал переключения GIL (с), 0 - не менять
+        """
+        super().__init__(context=context)
+        self.num_threads = num_threads
+        self.priority = priority
+        self.cpus = set(cpus)
+        self.threads = {}  # native_id -> (realtime, pinned)
+        if switch_interval > 0:
+            sys.setswitchinterval(switch_interval)
+        configure = priority > 0 or bool(self.cpus)
+        # Потоки пула создаются при раздаче колбэков и тогда же настраиваются
+        self._pool = ThreadPoolExecutor(
+            num_threads, thread_name_prefix='executor',
+            initializer=self._configure_thread if configure else None)
+        self._handlers = []
+        self._spin_configured = not configure
+
+    def _configure_thread(self):
+        self.threads[threading.get_native_id()] = configure_thread(0, self.priority, self.cpus)
+
+    def _spin_once_impl(self, timeout_sec=None, wait_condition=lambda: False):
+        if not self._spin_configured:
+            self._spin_configured = True
+            self._configure_thread()  # Поток ожидания раздаёт колбэки пулу
+        try:
+            handler, _, _ = self.wait_for_ready_callbacks(timeout_sec, None, wait_condition)
+        except (ExternalShutdownException, ShutdownException,
+                TimeoutException, ConditionReachedException):
+            return
+        self._pool.submit(handler)
+        self._handlers.append(handler)
+        # Исключения завершившихся колбэков - в поток spin, как в MultiThreadedExecutor
+        done = [task for task in self._handlers if task.done()]
+        if done:
+            self._handlers = [task for task in self._handlers if not task.done()]
+            for task in done:
+                task.result()
+
+    def spin_once(self, timeout_sec=None):
+        self._spin_once_impl(timeout_sec)
+
+    def spin_once_until_future_complete(self, future, timeout_sec=None):
+        future.add_done_callback(lambda _: self.wake())
+        self._spin_once_impl(timeout_sec, future.done)
+
+    def shutdown(self, timeout_sec=None):
+        success = super().shutdown(timeout_sec)
+        self._pool.shutdown()
+        return success
+
+    def stats(self):
+        """Настройка потоков (для /diagnostics)"""
+        settings = list(self.threads.values())
+        return {
+            'threads': self.num_threads,
+            'configured': len(settings),
+            'realtime': sum(1 for realtime, _ in settings if realtime),
+            'pinned': sum(1 for _, pinned in settings if pinned),
+            'switch_interval_ms': round(sys.getswitchinterval() * 1000.0, 2),
+        }
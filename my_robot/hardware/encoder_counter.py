@@ -1,32 +1,45 @@
 #!/usr/bin/env python3
-import RPi.GPIO as GPIO
 import math
 import threading
-import time
+from my_robot.hardware.hal import GPIO, clock
+from my_robot.hardware.tick_buffer import TickRingBuffer
 
 class EncoderCounter:
     """Счётчик энкодера на базе опроса (polling)"""
     
     ticks_to_mm_const = None
+    kinematics = None  # Общая KinematicsModel узла (если задана)
     
-    def __init__(self, pin_number, callback=None):
+    def __init__(self, pin_number, callback=None, sampler=None, tick_capacity=256):
         """
         pin_number: номер GPIO пина
         callback: функция для вызова при каждом импульсе (опционально)
+        sampler: общий опросчик GpioSampler (опционально).
+        Без него запускается собственный поток опроса пина.
+        tick_capacity: ёмкость кольцевого буфера меток времени тиков
         """
         self.pin_number = pin_number
         self.pulse_count = 0
         self.direction = 1
         self.callback = callback
+        self.recorder = None  # EventRecorder для записи фронтов (опционально)
         self._running = True
         self._last_state = None
+        # Метки времени последних тиков (для оценки скорости)
+        self.ticks = TickRingBuffer(tick_capacity)
         
         # Блокировка для потокобезопасного доступа
         self.lock = threading.Lock()
 
         # Настройка пина
         GPIO.setup(self.pin_number, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-        
+
+        self._sampler = sampler
+        if sampler is not None:
+            # Фронты детектирует общий поток опросчика
+            sampler.register(self.pin_number, self._on_edge)
+            return
+
         # Запуск потока опроса
         self._thread = threading.Thread(target=self._polling_loop)
         self._thread.daemon = True
@@ -39,14 +52,21 @@ class EncoderCounter:
             
             # Детектируем спад (переход из 1 в 0)
             if self._last_state == 1 and current_state == 0:
-                with self.lock:  # Защита записи
-                    self.pulse_count += self.direction
-                if self.callback:
-                    self.callback()
+                self._on_edge(clock.monotonic())
             
             self._last_state = current_state
-            time.sleep(0.0001)  # 500 мкс - оптимально для энкодеров
+            clock.sleep(0.0001)  # 500 мкс - оптимально для энкодеров
     
+    def _on_edge(self, timestamp):
+        """Обработка спадающего фронта (timestamp - clock.monotonic())"""
+        with self.lock:  # Защита записи
+            self.pulse_count += self.direction
+        self.ticks.append(timestamp, self.direction)
+        if self.recorder is not None:
+            self.recorder.edge(timestamp, self.pin_number, self.direction)
+        if self.callback:
+            self.callback()
+
     def get_count(self):
         """Вернуть текущее значение счётчика"""
         with self.lock: # Защита чтения
@@ -56,6 +76,7 @@ class EncoderCounter:
         """Сбросить счётчик"""
         with self.lock:
             self.pulse_count = 0
+            self.ticks.clear()
     
     def set_direction(self, direction):
         """Установить направление (1 или -1)"""
@@ -65,6 +86,8 @@ class EncoderCounter:
     def stop(self):
         """Остановить поток опроса"""
         self._running = False
+        if self._sampler is not None:
+            self._sampler.unregister(self.pin_number)
         if hasattr(self, '_thread') and self._thread.is_alive():
             self._thread.join(timeout=1.0)
     
@@ -77,3 +100,9 @@ class EncoderCounter:
     @staticmethod
     def set_constants(wheel_diameter_mm, ticks_per_revolution):
         EncoderCounter.ticks_to_mm_const = (math.pi * wheel_diameter_mm) / ticks_per_revolution
+
+    @staticmethod
+    def set_kinematics(model):
+        """Взять константы из общей KinematicsModel"""
+        EncoderCounter.kinematics = model
+        EncoderCounter.ticks_to_mm_const = model.mm_per_tick
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Запись сырых событий железа в бинарный файл
+
+Файл - заголовок и массив записей фиксированного размера, заранее
+выделенный и отображённый в память (mmap). Запись события - один
+Struct.pack_into прямо в отображение под блокировкой, без создания
+объектов на каждое событие, поэтому запись можно не выключать.
+Заполненный файл закрывается и начинается следующий (ротация,
+хранится не больше max_files).
+
+Формат записи (24 байта, little-endian):
+    t: float64     - время события (clock.monotonic)
+    kind: uint8    - EDGE, ECHO, CMD_VEL, PWM
+    channel: uint8 - пин энкодера, номер датчика или колесо (0/1)
+    a: int16       - направление тика или режим мотора
+    x, y: float32  - расстояние и длительность эха, linear и angular
+    b: int32       - ШИМ мотора
+"""
+
+import glob
+import mmap
+import os
+import struct
+import threading
+
+from my_robot.hardware.hal import clock
+
+MAGIC = b'MYRBREC1'
+HEADER = struct.Struct('<8sIIQd')      # magic, размер записи, ёмкость, число записей, время начала
+HEADER_SIZE = 64
+COUNT_OFFSET = 16                       # Смещение поля "число записей" в заголовке
+RECORD = struct.Struct('<dBBhffi')
+
+EDGE = 1
+ECHO = 2
+CMD_VEL = 3
+PWM = 4
+KIND_NAMES = {EDGE: 'edge', ECHO: 'echo', CMD_VEL: 'cmd_vel', PWM: 'pwm'}
+
+_COUNT = struct.Struct('<Q')
+
+
+class EventRecorder:
+    """Запись событий с ротацией файлов"""
+
+    def __init__(self, directory, capacity=262144, max_files=4, prefix='events'):
+        """
+        directory: каталог файлов записи
+        capacity: записей в одном файле (по 24 байта)
+        max_files: сколько файлов хранить (старые удаляются)
+        """
+        self.directory = directory
+        self.capacity = capacity
+        self.max_files = max_files
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.records = 0
+        self.files = 0
+        self._mem = None
+        self._index = 0
+        os.makedirs(directory, exist_ok=True)
+        existing = self._existing()
+        self._sequence = int(existing[-1][-10:-4]) + 1 if existing else 0
+        self._open_next()
+
+    def _existing(self):
+        return sorted(glob.glob(os.path.join(self.directory, f'{self.prefix}-*.bin')))
+
+    def _open_next(self):
+        """Новый файл записи (под self.lock или из __init__)"""
+        if self._mem is not None:
+            self._mem.flush()
+            self._mem.close()
+        path = os.path.join(self.directory, f'{self.prefix}-{self._sequence:06d}.bin')
+        self._sequence += 1
+        size = HEADER_SIZE + self.capacity * RECORD.size
+        with open(path, 'w+b') as f:
+            f.truncate(size)
+            self._mem = mmap.mmap(f.fileno(), size)
+        HEADER.pack_into(self._mem, 0, MAGIC, RECORD.size, self.capacity, 0, clock.monotonic())
+        self._index = 0
+        self.path = path
+        self.files += 1
+        for old in self._existing()[:-self.max_files]:
+            os.remove(old)
+
+    def _write(self, t, kind, channel, a, x, y, b):
+        with self.lock:
+            if self._mem is None:
+                return
+            if self._index >= self.capacity:
+                self._open_next()
+            index = self._index
+            RECORD.pack_into(self._mem, HEADER_SIZE + index * RECORD.size, t, kind, channel, a, x, y, b)
+            self._index = index + 1
+            _COUNT.pack_into(self._mem, COUNT_OFFSET, index + 1)
+            self.records += 1
+
+    def edge(self, t, pin, direction):
+        """Фронт энкодера"""
+        self._write(t, EDGE, pin, direction, 0.0, 0.0, 0)
+
+    def echo(self, t, sensor, distance, width):
+        """Эхо датчика sensor: расстояние (м, inf - нет) и длительность импульса (с)"""
+        self._write(t, ECHO, sensor, 0, distance, width, 0)
+
+    def cmd_vel(self, t, linear, angular):
+        """Входная команда /cmd_vel"""
+        self._write(t, CMD_VEL, 0, 0, linear, angular, 0)
+
+    def pwm(self, t, wheel, mode, speed):
+        """Запись в мотор колеса wheel (0 - левое, 1 - правое)"""
+        self._write(t, PWM, wheel, mode, 0.0, 0.0, speed)
+
+    def close(self):
+        with self.lock:
+            if self._mem is not None:
+                self._mem.flush()
+                self._mem.close()
+                self._mem = None
+
+
+def read_records(path):
+    """Записи файла: (t, kind, channel, a, x, y, b) по порядку"""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mem:
+            magic, record_size, capacity, count, _ = HEADER.unpack_from(mem, 0)
+            if magic != MAGIC or record_size != RECORD.size:
+                raise ValueError(f'{path}: не файл записи событий')
+            end = HEADER_SIZE + min(count, capacity) * record_size
+            yield from RECORD.iter_unpack(mem[HEADER_SIZE:end])
+
+
+def read_files(paths):
+    """Записи нескольких файлов (ротация) по порядку имён"""
+    for path in sorted(paths):
+        yield from read_records(path)
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Общий опросчик GPIO для энкодеров
+
+Один поток читает весь регистр уровней GPLEV0 за одно обращение
+(mmap /dev/gpiomem) и детектирует фронты сразу для всех зарегистрированных
+пинов. Для тестов и бенчмарков есть файловая подмена банка регистров.
+
+Пропущенные фронты (импульс короче провала опроса не виден вовсе)
+оцениваются по каждому пину: интервал до следующего фронта кратно длиннее
+сглаженного интервала - значит, между ними были фронты, которых опрос
+не увидел.
+"""
+
+import mmap
+import os
+import threading
+import time
+
+# Смещение регистра уровней GPLEV0 в блоке GPIO (BCM2835/2711)
+GPLEV0_OFFSET = 0x34
+GPIO_BLOCK_SIZE = 4096
+
+# Интервал длиннее MISSED_RATIO сглаженных - между фронтами были пропуски;
+# длиннее RESTART_RATIO - колесо стояло и тронулось (пропуски - только
+# в пределах провалов опроса)
+MISSED_RATIO = 1.5
+RESTART_RATIO = 8.0
+
+FALLING = 0
+RISING = 1
+BOTH = 2
+
+
+class GpioRegisterBank:
+    """Банк регистров GPIO, отображённый в память (mmap)"""
+
+    def __init__(self, path='/dev/gpiomem', offset=GPLEV0_OFFSET,
+                 size=GPIO_BLOCK_SIZE):
+        """
+        path: устройство (/dev/gpiomem) или файл-подмена
+        offset: смещение регистра уровней в байтах
+        """
+        fd = os.open(path, os.O_RDWR | os.O_SYNC)
+        try:
+            self._mem = mmap.mmap(fd, size, mmap.MAP_SHARED,
+                                  mmap.PROT_READ | mmap.PROT_WRITE)
+        finally:
+            os.close(fd)
+        # 32-битное представление: одно чтение = один доступ к регистру
+        self._words = memoryview(self._mem).cast('I')
+        self._index = offset // 4
+
+    def read_levels(self):
+        """Прочитать уровни всех пинов банка 0 (биты 0..31)"""
+        return self._words[self._index]
+
+    def close(self):
+        """Освободить отображение"""
+        self._words.release()
+        self._mem.close()
+
+
+class FileGpioBank(GpioRegisterBank):
+    """Файловая подмена /dev/gpiomem для тестов и бенчмарков"""
+
+    def __init__(self, path, offset=GPLEV0_OFFSET, size=GPIO_BLOCK_SIZE):
+        with open(path, 'ab') as f:
+            if f.tell() < size:
+                f.write(b'\x00' * (size - f.tell()))
+        super().__init__(path, offset, size)
+
+    def write_levels(self, levels):
+        """Записать уровни пинов (имитация внешнего сигнала)"""
+        self._words[self._index] = levels & 0xFFFFFFFF
+
+    def set_pin(self, pin, value):
+        """Установить уровень одного пина"""
+        levels = self._words[self._index]
+        if value:
+            levels |= 1 << pin
+        else:
+            levels &= ~(1 << pin)
+        self.write_levels(levels)
+
+
+class _PinState:
+    """Состояние одного зарегистрированного пина"""
+
+    __slots__ = ('pin', 'mask', 'handler', 'edge', 'last_edge_time',
+                 'edge_interval', 'edge_gap', 'overrun_time')
+
+    def __init__(self, pin, handler, edge):
+        self.pin = pin
+        self.mask = 1 << pin
+        self.handler = handler
+        self.edge = edge
+        self.last_edge_time = None
+        self.edge_interval = None  # Сглаженный интервал между фронтами (с)
+        self.edge_gap = 0.0        # Провал опроса, в котором увиден последний фронт (с)
+        self.overrun_time = 0.0    # Провалы опроса после последнего фронта (с)
+
+
+class GpioSampler:
+    """Мультиплексированный опрос пинов одним потоком"""
+
+    def __init__(self, bank, period=0.0001, idle_period=0.005,
+                 overrun_factor=4.0, clock=time):
+        """
+        bank: банк регистров (GpioRegisterBank, FileGpioBank или
+        любой объект с read_levels())
+        period: период опроса при работающих моторах (с)
+        idle_period: период опроса при отпущенных моторах (с)
+        overrun_factor: во сколько раз интервал должен превысить период,
+        чтобы считаться перегрузкой опроса
+        clock: источник времени с monotonic() и sleep() (модуль time или
+        часы симуляции)
+        """
+        self._bank = bank
+        self._clock = clock
+        self.period = period
+        self.idle_period = idle_period
+        self.overrun_factor = overrun_factor
+
+        self._pins = {}
+        self._mask = 0
+        self._active = True
+        self._running = False
+        self._thread = None
+        self.lock = threading.Lock()
+
+        # Счётчики диагностики
+        self.sample_count = 0
+        self.edge_count = 0
+        self.overruns = 0
+        self.missed_edges = 0
+
+    def register(self, pin, handler, edge=FALLING):
+        """
+        Зарегистрировать пин
+        handler: функция handler(timestamp), вызывается на каждом фронте
+        edge: FALLING, RISING или BOTH
+        """
+        with self.lock:
+            pins = dict(self._pins)
+            pins[pin] = _PinState(pin, handler, edge)
+            self._pins = pins
+            self._mask |= 1 << pin
+
+    def unregister(self, pin):
+        """Снять пин с опроса"""
+        with self.lock:
+            pins = dict(self._pins)
+            pins.pop(pin, None)
+            self._pins = pins
+            self._mask &= ~(1 << pin)
+
+    def set_active(self, active):
+        """Переключить частоту опроса (False - моторы отпущены)"""
+        self._active = bool(active)
+
+    @property
+    def active(self):
+        return self._active
+
+    def start(self):
+        """Запустить поток опроса"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._sampling_loop,
+                                        name='gpio_sampler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Остановить поток опроса"""
+        self._running = False
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+    def stats(self):
+        """Счётчики опроса в виде словаря"""
+        return {
+            'samples': self.sample_count,
+            'edges': self.edge_count,
+            'overruns': self.overruns,
+            'missed_edges': self.missed_edges,
+            'active': self._active,
+        }
+
+    def _sampling_loop(self):
+        """Цикл опроса: одно чтение регистра на все пины"""
+        read_levels = self._bank.read_levels
+        monotonic = self._clock.monotonic
+        sleep = self._clock.sleep
+        last_levels = read_levels()
+        last_time = monotonic()
+
+        while self._running:
+            levels = read_levels()
+            now = monotonic()
+            self.sample_count += 1
+
+            period = self.period if self._active else self.idle_period
+            gap = now - last_time
+            if gap > period * self.overrun_factor:
+                self.overruns += 1
+                for state in self._pins.values():
+                    state.overrun_time += gap
+
+            changed = (levels ^ last_levels) & self._mask
+            if changed:
+                self._dispatch(changed, levels, now, gap)
+            last_levels = levels
+            last_time = now
+
+            sleep(period)
+
+    def _dispatch(self, changed, levels, now, gap):
+        """Разослать фронты обработчикам пинов (gap - провал опроса до now)"""
+        for state in self._pins.values():
+            if not changed & state.mask:
+                continue
+            rising = bool(levels & state.mask)
+            if state.edge == FALLING and rising:
+                continue
+            if state.edge == RISING and not rising:
+                continue
+
+            if state.last_edge_time is not None:
+                self._track_interval(state, now - state.last_edge_time, gap)
+            state.last_edge_time = now
+            state.edge_gap = gap
+            state.overrun_time = 0.0
+            self.edge_count += 1
+
+            # Фронт при пониженной частоте - колесо крутится, ускоряемся
+            if not self._active:
+                self._active = True
+            state.handler(now)
+
+    def _track_interval(self, state, interval, gap):
+        """Сглаженный интервал пина и пропуски по его кратности"""
+        # Фронт случился где-то в последнем провале опроса: середина провала
+        # точнее момента обнаружения (джиттер опроса не считается пропуском)
+        interval += (state.edge_gap - gap) / 2.0
+        average = state.edge_interval
+        if average is None:
+            state.edge_interval = interval
+            return
+        ratio = interval / average
+        if ratio >= MISSED_RATIO:
+            lost = round(ratio) - 1
+            if ratio > RESTART_RATIO:
+                # Долгая пауза: потерять можно только то, что уместилось
+                # в провалы опроса, остальное время колесо стояло
+                lost = min(lost, round(state.overrun_time / average))
+                self.missed_edges += lost
+                state.edge_interval = None
+                return
+            self.missed_edges += lost
+            interval /= lost + 1
+        state.edge_interval += 0.2 * (interval - average)
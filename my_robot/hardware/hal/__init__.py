@@ -0,0 +1,28 @@
+"""
+Слой абстракции железа
+
+Бэкенд выбирается переменной окружения MY_ROBOT_BACKEND до импорта
+модулей железа: 'rpi' (по умолчанию) - RPi.GPIO и Motor HAT,
+'sim' - симуляция (см. my_robot.hardware.hal.sim).
+
+Экспортирует GPIO, Raspi_MotorHAT, PWM, clock (monotonic/sleep) и
+open_gpio_bank(path).
+"""
+
+import os
+
+BACKEND_ENV = 'MY_ROBOT_BACKEND'
+BACKEND = os.environ.get(BACKEND_ENV, 'rpi')
+
+if BACKEND == 'sim':
+    from my_robot.hardware.hal import sim as _backend
+elif BACKEND == 'rpi':
+    from my_robot.hardware.hal import rpi as _backend
+else:
+    raise ImportError(f'Неизвестный бэкенд железа {BACKEND_ENV}={BACKEND!r}')
+
+GPIO = _backend.GPIO
+Raspi_MotorHAT = _backend.Raspi_MotorHAT
+PWM = _backend.PWM
+clock = _backend.clock
+open_gpio_bank = _backend.open_gpio_bank
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""Бэкенд реального железа Raspberry Pi (по умолчанию)"""
+
+import time as clock
+
+import RPi.GPIO as GPIO
+from Raspi_MotorHAT import Raspi_MotorHAT
+from Raspi_MotorHAT.Raspi_PWM_Servo_Driver import PWM
+
+__all__ = ['GPIO', 'Raspi_MotorHAT', 'PWM', 'clock', 'open_gpio_bank']
+
+
+def open_gpio_bank(path='/dev/gpiomem'):
+    """Регистры GPIO через mmap /dev/gpiomem"""
+    from my_robot.hardware.gpio_sampler import GpioRegisterBank
+    return GpioRegisterBank(path)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Симулированный бэкенд железа (MY_ROBOT_BACKEND=sim)
+
+Повторяет интерфейсы RPi.GPIO, Raspi_MotorHAT и PCA9685 поверх SimWorld.
+Время идёт по SimClock (MY_ROBOT_SIM_SPEED - ускорение, 0 - ручной шаг).
+Комната задаётся JSON-файлом в MY_ROBOT_SIM_ROOM (иначе комната по умолчанию).
+
+Узел sim_clock публикует clock (относительное имя: /clock без пространства
+имён, /robotK/clock в пространстве робота), чтобы ROS-таймеры узлов с
+use_sim_time шли в том же темпе, что и симуляция. У каждого симулированного
+робота свои часы, поэтому узлы робота переназначают /clock:=clock -
+несколько роботов в одном домене не спорят за общий /clock.
+"""
+
+import os
+
+from my_robot.hardware.hal.sim_clock import SimClock
+from my_robot.hardware.hal.sim_world import (
+    FULL_BIT, LED0_ON_L, MODE1, MOTOR_CHANNELS, Room, SimWorld)
+
+ROOM_ENV = 'MY_ROBOT_SIM_ROOM'
+
+clock = SimClock.from_environment()
+_room_path = os.environ.get(ROOM_ENV)
+world = SimWorld(clock, Room.from_json(_room_path) if _room_path else None)
+
+
+class SimGPIO:
+    """Подмена модуля RPi.GPIO"""
+
+    BCM = 11
+    BOARD = 10
+    IN = 1
+    OUT = 0
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    _EDGES = {RISING: 'rising', FALLING: 'falling', BOTH: 'both'}
+
+    def __init__(self, sim_world):
+        self._world = sim_world
+
+    def setwarnings(self, flag):
+        pass
+
+    def setmode(self, mode):
+        pass
+
+    def setup(self, channel, direction, pull_up_down=None, initial=None):
+        if direction == self.OUT:
+            self._world.output(channel, initial or 0)
+        self._world.start()
+
+    def cleanup(self, channel=None):
+        pass
+
+    def input(self, channel):
+        return self._world.input(channel)
+
+    def output(self, channel, value):
+        self._world.output(channel, value)
+
+    def add_event_detect(self, channel, edge, callback=None, bouncetime=None):
+        self._world.add_event_detect(channel, self._EDGES[edge], callback)
+
+    def remove_event_detect(self, channel):
+        self._world.remove_event_detect(channel)
+
+
+GPIO = SimGPIO(world)
+
+
+class _SimI2CDevice:
+    """Подмена Raspi_I2C поверх регистров SimPCA9685"""
+
+    def __init__(self, chip):
+        self._chip = chip
+
+    def write8(self, reg, value):
+        self._chip.write8(reg, value)
+
+    def writeList(self, reg, values):
+        self._chip.write_list(reg, values)
+
+    def readU8(self, reg):
+        return self._chip.read8(reg)
+
+
+class PWM:
+    """Подмена Raspi_PWM_Servo_Driver.PWM (PCA9685)"""
+
+    def __init__(self, address=0x40, debug=False):
+        self.address = address
+        self.chip = world.pca(address)
+        self.i2c = _SimI2CDevice(self.chip)
+        # Как в оригинальном драйвере: все каналы в 0, MODE1 по умолчанию
+        self.setAllPWM(0, 0)
+        self.i2c.write8(MODE1, 0x00)
+
+    def setPWMFreq(self, freq):
+        self.freq = freq
+
+    def setPWM(self, channel, on, off):
+        # Как в оригинальном драйвере: четыре отдельные записи
+        base = LED0_ON_L + 4 * channel
+        self.i2c.write8(base, on & 0xFF)
+        self.i2c.write8(base + 1, on >> 8)
+        self.i2c.write8(base + 2, off & 0xFF)
+        self.i2c.write8(base + 3, off >> 8)
+
+    def setAllPWM(self, on, off):
+        for channel in range(16):
+            self.setPWM(channel, on, off)
+
+
+class _SimDCMotor:
+    """Подмена Raspi_DCMotor"""
+
+    def __init__(self, controller, num):
+        self.MC = controller
+        self.PWMpin, self.IN1pin, self.IN2pin = MOTOR_CHANNELS[num + 1]
+
+    def _set_pin(self, pin, value):
+        if value:
+            self.MC._pwm.setPWM(pin, FULL_BIT << 8, 0)
+        else:
+            self.MC._pwm.setPWM(pin, 0, FULL_BIT << 8)
+
+    def run(self, command):
+        if command == Raspi_MotorHAT.FORWARD:
+            self._set_pin(self.IN2pin, 0)
+            self._set_pin(self.IN1pin, 1)
+        elif command == Raspi_MotorHAT.BACKWARD:
+            self._set_pin(self.IN1pin, 0)
+            self._set_pin(self.IN2pin, 1)
+        elif command == Raspi_MotorHAT.RELEASE:
+            self._set_pin(self.IN1pin, 0)
+            self._set_pin(self.IN2pin, 0)
+
+    def setSpeed(self, speed):
+        speed = max(0, min(255, int(speed)))
+        self.MC._pwm.setPWM(self.PWMpin, 0, speed * 16)
+
+
+class Raspi_MotorHAT:
+    """Подмена Raspi_MotorHAT"""
+
+    FORWARD = 1
+    BACKWARD = 2
+    BRAKE = 3
+    RELEASE = 4
+
+    def __init__(self, addr=0x60, freq=1600):
+        self._i2caddr = addr
+        self._frequency = freq
+        self._pwm = PWM(addr)
+        self._pwm.setPWMFreq(freq)
+        self.motors = [_SimDCMotor(self, m) for m in range(4)]
+
+    def getMotor(self, num):
+        if num < 1 or num > 4:
+            raise NameError('MotorHAT Motor must be between 1 and 4 inclusive')
+        return self.motors[num - 1]
+
+
+def open_gpio_bank(path=None):
+    """Банк уровней GPIO для GpioSampler (читает состояние SimWorld)"""
+    world.start()
+    return world
+
+
+def main(args=None):
+    """Узел sim_clock: публикация времени симуляции в clock (в пространстве имён)"""
+    import rclpy
+    from rclpy.node import Node
+    from rosgraph_msgs.msg import Clock
+
+    class SimClockNode(Node):
+        def __init__(self):
+            super().__init__('sim_clock')
+            # Шаг /clock во времени симуляции (с)
+            self.declare_parameter('clock_step', 0.005)
+            step = self.get_parameter('clock_step').value
+            self.msg = Clock()
+            self.clock_pub = self.create_publisher(Clock, 'clock', 10)
+            speed = clock.speed if clock.speed > 0 else 1.0
+            self.timer = self.create_timer(step / speed, self.publish_clock)
+            self.get_logger().info(f'Часы симуляции: x{clock.speed}, шаг {step} с')
+
+        def publish_clock(self):
+            nanoseconds = int(clock.monotonic() * 1e9)
+            self.msg.clock.sec = nanoseconds // 1000000000
+            self.msg.clock.nanosec = nanoseconds % 1000000000
+            self.clock_pub.publish(self.msg)
+
+    rclpy.init(args=args)
+    node = SimClockNode()
+    try:
+        rclpy.spin(node)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Управляемые часы симуляции
+
+Время симуляции = (time.monotonic() - epoch) * speed. Эпоха и множитель
+передаются дочерним процессам через переменные окружения, поэтому все узлы
+симуляции видят одно и то же время. При speed == 0 время идёт только
+вызовами advance() (пошаговый режим для тестов и повтора записей).
+"""
+
+import os
+import threading
+import time
+
+SPEED_ENV = 'MY_ROBOT_SIM_SPEED'
+EPOCH_ENV = 'MY_ROBOT_SIM_EPOCH'
+
+
+class SimClock:
+    """Часы с ускорением или ручным шагом"""
+
+    def __init__(self, speed=1.0, epoch=None):
+        """
+        speed: множитель скорости времени (0 - ручной шаг через advance)
+        epoch: time.monotonic() момента нулевого времени симуляции
+        """
+        self.speed = float(speed)
+        self.epoch = time.monotonic() if epoch is None else float(epoch)
+        self._manual_now = 0.0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    @classmethod
+    def from_environment(cls):
+        """Часы по MY_ROBOT_SIM_SPEED / MY_ROBOT_SIM_EPOCH (и экспорт эпохи)"""
+        speed = float(os.environ.get(SPEED_ENV, '1.0'))
+        epoch = os.environ.get(EPOCH_ENV)
+        clock = cls(speed, None if epoch is None else float(epoch))
+        os.environ[EPOCH_ENV] = repr(clock.epoch)
+        return clock
+
+    @property
+    def manual(self):
+        return self.speed == 0.0
+
+    def monotonic(self):
+        """Текущее время симуляции (с)"""
+        frozen = getattr(self._local, 'frozen', None)
+        if frozen is not None:
+            return frozen
+        if self.manual:
+            return self._manual_now
+        return (time.monotonic() - self.epoch) * self.speed
+
+    def sleep(self, seconds):
+        """Сон на seconds секунд времени симуляции"""
+        if seconds <= 0:
+            time.sleep(0)
+            return
+        if not self.manual:
+            time.sleep(seconds / self.speed)
+            return
+        with self._cond:
+            deadline = self._manual_now + seconds
+            while self._manual_now < deadline:
+                self._cond.wait()
+
+    def advance(self, seconds):
+        """Продвинуть время в ручном режиме"""
+        with self._cond:
+            self._manual_now += seconds
+            self._cond.notify_all()
+
+    def frozen_at(self, timestamp):
+        """Контекст: в текущем потоке monotonic() возвращает timestamp"""
+        return _FrozenTime(self._local, timestamp)
+
+
+class _FrozenTime:
+    """Подмена времени на время события (для колбэков фронтов)"""
+
+    def __init__(self, local, timestamp):
+        self._local = local
+        self._timestamp = timestamp
+
+    def __enter__(self):
+        self._local.frozen = self._timestamp
+
+    def __exit__(self, *exc):
+        self._local.frozen = None
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Модель мира для симуляции железа
+
+- Room: 2D-комната из отрезков стен
+- SimPCA9685: регистры ШИМ-контроллера (общие для Motor HAT и сервоприводов)
+- SimWorld: дифференциальный привод по ШИМ моторов, фронты энкодеров,
+  эхо HC-SR04 по геометрии комнаты, сервопривод пана переднего датчика
+
+Скорости колёс постоянны между записями в PCA9685, поэтому поза и путь
+колёс считаются аналитически на любой момент времени, а не шагами.
+"""
+
+import heapq
+import json
+import math
+import threading
+
+# Регистры PCA9685
+MODE1 = 0x00
+MODE1_AI = 0x20  # Автоинкремент адреса
+LED0_ON_L = 0x06
+FULL_BIT = 0x10  # Бит 4 в ON_H / OFF_H
+
+# Каналы Motor HAT: номер мотора -> (PWM, IN1, IN2)
+MOTOR_CHANNELS = {1: (8, 10, 9), 2: (13, 11, 12), 3: (2, 4, 3), 4: (7, 5, 6)}
+
+SOUND_SPEED = 343.0  # м/с
+
+
+class Room:
+    """Комната как набор отрезков стен ((x1, y1), (x2, y2))"""
+
+    def __init__(self, walls):
+        self.walls = [tuple(map(float, (a[0], a[1], b[0], b[1]))) for a, b in walls]
+
+    @classmethod
+    def rectangle(cls, width=3.0, height=2.5, obstacles=()):
+        """Прямоугольная комната с началом координат в центре"""
+        w, h = width / 2.0, height / 2.0
+        corners = [(-w, -h), (w, -h), (w, h), (-w, h)]
+        walls = [(corners[i], corners[(i + 1) % 4]) for i in range(4)]
+        for x, y, size in obstacles:
+            s = size / 2.0
+            box = [(x - s, y - s), (x + s, y - s), (x + s, y + s), (x - s, y + s)]
+            walls += [(box[i], box[(i + 1) % 4]) for i in range(4)]
+        return cls(walls)
+
+    @classmethod
+    def from_json(cls, path):
+        """Комната из JSON: {"walls": [[[x1, y1], [x2, y2]], ...]}"""
+        with open(path) as f:
+            return cls(json.load(f)['walls'])
+
+    def raycast(self, x, y, angle, max_range):
+        """Расстояние до ближайшей стены по лучу (или max_range)"""
+        dx, dy = math.cos(angle), math.sin(angle)
+        best = max_range
+        for x1, y1, x2, y2 in self.walls:
+            ex, ey = x2 - x1, y2 - y1
+            denom = dx * ey - dy * ex
+            if abs(denom) < 1e-12:
+                continue
+            qx, qy = x1 - x, y1 - y
+            t = (qx * ey - qy * ex) / denom
+            u = (qx * dy - qy * dx) / denom
+            if 0.0 < t < best and 0.0 <= u <= 1.0:
+                best = t
+        return best
+
+    def clearance(self, x, y):
+        """Расстояние от точки до ближайшей стены"""
+        best = float('inf')
+        for x1, y1, x2, y2 in self.walls:
+            ex, ey = x2 - x1, y2 - y1
+            length2 = ex * ex + ey * ey
+            u = 0.0 if length2 == 0 else max(0.0, min(1.0, ((x - x1) * ex + (y - y1) * ey) / length2))
+            best = min(best, math.hypot(x1 + u * ex - x, y1 + u * ey - y))
+        return best
+
+
+class SimPCA9685:
+    """Файл регистров PCA9685 с подсчётом I2C-транзакций"""
+
+    def __init__(self, address, on_write=None):
+        self.address = address
+        self.regs = bytearray(256)
+        self.transactions = 0
+        self._on_write = on_write
+
+    def write8(self, reg, value):
+        self.regs[reg & 0xFF] = value & 0xFF
+        self.transactions += 1
+        self._notify()
+
+    def write_list(self, reg, values):
+        """Блочная запись (с автоинкрементом, если он включён в MODE1)"""
+        step = 1 if self.regs[MODE1] & MODE1_AI else 0
+        for i, value in enumerate(values):
+            self.regs[(reg + i * step) & 0xFF] = value & 0xFF
+        self.transactions += 1
+        self._notify()
+
+    def read8(self, reg):
+        self.transactions += 1
+        return self.regs[reg & 0xFF]
+
+    def channel(self, channel):
+        """(on, off) канала с учётом битов FULL ON / FULL OFF"""
+        base = LED0_ON_L + 4 * channel
+        on = self.regs[base] | (self.regs[base + 1] << 8)
+        off = self.regs[base + 2] | (self.regs[base + 3] << 8)
+        return on, off
+
+    def pin_level(self, channel):
+        """Логический уровень канала, используемого как цифровой выход"""
+        on, off = self.channel(channel)
+        if off & (FULL_BIT << 8):
+            return 0
+        if on & (FULL_BIT << 8):
+            return 1
+        return 1 if (off & 0xFFF) > (on & 0xFFF) else 0
+
+    def duty(self, channel):
+        """Скважность канала 0..4095"""
+        on, off = self.channel(channel)
+        if off & (FULL_BIT << 8):
+            return 0
+        if on & (FULL_BIT << 8):
+            return 4095
+        return ((off & 0xFFF) - (on & 0xFFF)) % 4096
+
+    def _notify(self):
+        if self._on_write is not None:
+            self._on_write(self)
+
+
+class _Sonar:
+    """Симулированный HC-SR04"""
+
+    __slots__ = ('trig_pin', 'echo_pin', 'mount_x', 'mount_y', 'mount_yaw',
+                 'rise', 'fall', 'trig_level', 'fired')
+
+    def __init__(self, trig_pin, echo_pin, mount_x, mount_y, mount_yaw):
+        self.trig_pin = trig_pin
+        self.echo_pin = echo_pin
+        self.mount_x = mount_x
+        self.mount_y = mount_y
+        self.mount_yaw = mount_yaw
+        self.rise = -1.0
+        self.fall = -1.0
+        self.trig_level = 0
+        self.fired = -1.0
+
+
+DEFAULT_CONFIG = {
+    'wheel_base': 0.12,
+    'wheel_diameter': 0.065,
+    'ticks_per_rev': 20,
+    'max_wheel_speed': 0.6,      # м/с при ШИМ 255
+    'pwm_deadband': 60,          # Ниже этого ШИМ колесо не крутится
+    'robot_radius': 0.08,
+    'motor_addr': 0x6F,
+    'left_motor': 1,
+    'right_motor': 2,
+    'left_encoder_pin': 12,
+    'right_encoder_pin': 26,
+    # (trig, echo, x, y, yaw) относительно base_footprint
+    'sonars': [
+        [27, 17, 0.05, 0.04, 0.6],     # left
+        [6, 5, 0.05, -0.04, -0.6],     # right
+        [23, 24, 0.06, 0.0, 0.0],      # front
+    ],
+    'sonar_fov': 0.26,
+    'sonar_max_range': 4.0,
+    'sonar_crosstalk_angle': 0.8,  # Оси ближе - датчик слышит пинг соседа
+    'sonar_residual': 0.025,       # Сколько пинг слышен после запуска (с)
+    # Пан переднего датчика: канал PCA9685 на адресе motor_addr, trig датчика
+    'pan_channel': 0,
+    'pan_sonar': 23,
+    'pan_mid_steps': 532.48,       # Такты ШИМ среднего положения (1.3 мс при 100 Гц)
+    'pan_steps_per_degree': 3.641,  # Калибровка Servos по умолчанию (0.8 мс на 90°)
+    'pan_speed': 6.0,              # Скорость поворота сервопривода (рад/с)
+    'physics_step': 0.005,
+    'start_pose': [0.0, 0.0, 0.0],
+}
+
+
+class SimWorld:
+    """Робот в комнате: моторы -> поза -> энкодеры и сонары"""
+
+    def __init__(self, clock, room=None, config=None):
+        self.clock = clock
+        self.room = room or Room.rectangle(obstacles=[(0.8, 0.5, 0.3)])
+        self.config = dict(DEFAULT_CONFIG)
+        if config:
+            self.config.update(config)
+        cfg = self.config
+
+        self.lock = threading.RLock()
+        self.chips = {}
+        self.motor_chip = self.pca(cfg['motor_addr'])
+
+        self.x, self.y, self.theta = map(float, cfg['start_pose'])
+        self.v_left = 0.0
+        self.v_right = 0.0
+        self.dist_left = 0.0   # Путь колёс по модулю (для энкодеров)
+        self.dist_right = 0.0
+        self.t0 = clock.monotonic()
+        self.collisions = 0
+        self.stuck = False
+        self.crosstalk = 0  # Запуски, пересёкшиеся с пингом мешающего соседа
+        # Пан: движение от pan_from к pan_target с момента pan_t
+        self.pan_from = 0.0
+        self.pan_target = 0.0
+        self.pan_t = self.t0
+
+        self.circumference = math.pi * cfg['wheel_diameter']
+        self.sonars = {}
+        for trig, echo, mx, my, myaw in cfg['sonars']:
+            self.sonars[trig] = _Sonar(trig, echo, mx, my, myaw)
+
+        self.outputs = {}
+        self.callbacks = {}
+        self._events = []
+        self._running = False
+        self._thread = None
+
+    # ---------- PCA9685 / моторы ----------
+
+    def pca(self, address):
+        """Общий на адрес файл регистров PCA9685"""
+        with self.lock:
+            chip = self.chips.get(address)
+            if chip is None:
+                chip = SimPCA9685(address, self._on_pca_write)
+                self.chips[address] = chip
+            return chip
+
+    def _motor_speed(self, chip, motor):
+        """Линейная скорость колеса по регистрам мотора (м/с)"""
+        pwm_ch, in1, in2 = MOTOR_CHANNELS[motor]
+        a, b = chip.pin_level(in1), chip.pin_level(in2)
+        if a == b:
+            return 0.0  # RELEASE или BRAKE
+        pwm = chip.duty(pwm_ch) >> 4
+        if pwm < self.config['pwm_deadband']:
+            return 0.0
+        speed = self.config['max_wheel_speed'] * pwm / 255.0
+        return speed if a else -speed
+
+    def _on_pca_write(self, chip):
+        if chip is not self.motor_chip:
+            return
+        with self.lock:
+            self._update_pan(self.clock.monotonic())
+            self.advance(self.clock.monotonic())
+            self.stuck = False  # Новая команда - снова пробуем ехать
+            self.v_left = self._motor_speed(chip, self.config['left_motor'])
+            self.v_right = self._motor_speed(chip, self.config['right_motor'])
+
+    def _update_pan(self, now):
+        """Новая цель пана по такту канала (запись 0 - импульсов нет, стоит)"""
+        cfg = self.config
+        steps = self.motor_chip.duty(cfg['pan_channel'])
+        if steps == 0:
+            return
+        target = math.radians((steps - cfg['pan_mid_steps']) / cfg['pan_steps_per_degree'])
+        if target != self.pan_target:
+            self.pan_from = self.pan_angle(now)
+            self.pan_target = target
+            self.pan_t = now
+
+    def pan_angle(self, now):
+        """Угол пана на момент now (рад), поворот с постоянной скоростью"""
+        delta = self.pan_target - self.pan_from
+        travel = self.config['pan_speed'] * (now - self.pan_t)
+        if travel >= abs(delta):
+            return self.pan_target
+        return self.pan_from + math.copysign(travel, delta)
+
+    def _sonar_yaw(self, sonar, now):
+        """Направление оси датчика относительно робота (с учётом пана)"""
+        if sonar.trig_pin == self.config['pan_sonar']:
+            return sonar.mount_yaw + self.pan_angle(now)
+        return sonar.mount_yaw
+
+    # ---------- кинематика ----------
+
+    def advance(self, now):
+        """Довести позу и путь колёс до момента now (точная дуга)"""
+        dt = now - self.t0
+        if dt <= 0:
+            return
+        self.t0 = now
+        self.dist_left += abs(self.v_left) * dt
+        self.dist_right += abs(self.v_right) * dt
+        if self.stuck:
+            return
+        v = (self.v_left + self.v_right) / 2.0
+        w = (self.v_right - self.v_left) / self.config['wheel_base']
+        if abs(w) < 1e-9:
+            nx = self.x + v * dt * math.cos(self.theta)
+            ny = self.y + v * dt * math.sin(self.theta)
+        else:
+            r = v / w
+            nx = self.x + r * (math.sin(self.theta + w * dt) - math.sin(self.theta))
+            ny = self.y - r * (math.cos(self.theta + w * dt) - math.cos(self.theta))
+        if self.room.clearance(nx, ny) < self.config['robot_radius']:
+            # Упёрлись в стену: колёса буксуют, поза не меняется
+            self.collisions += 1
+            self.stuck = True
+            return
+        self.x, self.y = nx, ny
+        self.theta = math.atan2(math.sin(self.theta + w * dt), math.cos(self.theta + w * dt))
+
+    def pose(self):
+        """Поза (x, y, theta) на текущий момент"""
+        with self.lock:
+            self.advance(self.clock.monotonic())
+            return self.x, self.y, self.theta
+
+    # ---------- GPIO ----------
+
+    def _encoder_level(self, distance):
+        ticks = distance / self.circumference * self.config['ticks_per_rev']
+        return 1 if (ticks - math.floor(ticks)) < 0.5 else 0
+
+    def read_levels(self):
+        """Уровни всех пинов банка 0 на текущий момент"""
+        now = self.clock.monotonic()
+        cfg = self.config
+        with self.lock:
+            self.advance(now)
+            levels = 0
+            for pin, level in self.outputs.items():
+                if level:
+                    levels |= 1 << pin
+            if self._encoder_level(self.dist_left):
+                levels |= 1 << cfg['left_encoder_pin']
+            if self._encoder_level(self.dist_right):
+                levels |= 1 << cfg['right_encoder_pin']
+            for sonar in self.sonars.values():
+                if sonar.rise <= now < sonar.fall:
+                    levels |= 1 << sonar.echo_pin
+        return levels
+
+    def input(self, pin):
+        return (self.read_levels() >> pin) & 1
+
+    def output(self, pin, value):
+        level = 1 if value else 0
+        with self.lock:
+            self.outputs[pin] = level
+            sonar = self.sonars.get(pin)
+            if sonar is None:
+                return
+            if sonar.trig_level and not level:
+                self._trigger(sonar)
+            sonar.trig_level = level
+
+    def _trigger(self, sonar):
+        """Спад импульса запуска: планируем эхо по геометрии"""
+        now = self.clock.monotonic()
+        self.advance(now)
+        cfg = self.config
+        cos_t, sin_t = math.cos(self.theta), math.sin(self.theta)
+        sx = self.x + sonar.mount_x * cos_t - sonar.mount_y * sin_t
+        sy = self.y + sonar.mount_x * sin_t + sonar.mount_y * cos_t
+        sonar_yaw = self._sonar_yaw(sonar, now)
+        yaw = self.theta + sonar_yaw
+        half = cfg['sonar_fov'] / 2.0
+        distance = min(self.room.raycast(sx, sy, yaw + a, cfg['sonar_max_range'])
+                       for a in (-half, 0.0, half))
+        if distance >= cfg['sonar_max_range']:
+            width = 0.038  # Нет препятствия: импульс эха 38 мс
+        else:
+            width = 2.0 * distance / SOUND_SPEED
+        for other in self.sonars.values():
+            if (other is not sonar and now < max(other.fired + cfg['sonar_residual'], other.fall)
+                    and abs(math.remainder(self._sonar_yaw(other, now) - sonar_yaw, math.tau))
+                    < cfg['sonar_crosstalk_angle']):
+                self.crosstalk += 1
+        sonar.fired = now
+        sonar.rise = now + 0.0005
+        sonar.fall = sonar.rise + width
+        self._schedule(sonar.rise, sonar.echo_pin, 1)
+        self._schedule(sonar.fall, sonar.echo_pin, 0)
+
+    # ---------- события фронтов ----------
+
+    def add_event_detect(self, pin, edge, callback):
+        with self.lock:
+            self.callbacks[pin] = (edge, callback)
+
+    def remove_event_detect(self, pin):
+        with self.lock:
+            self.callbacks.pop(pin, None)
+
+    def _schedule(self, when, pin, level):
+        heapq.heappush(self._events, (when, pin, level))
+
+    def start(self):
+        """Поток событий фронтов и проверки столкновений"""
+        with self.lock:  # Пины настраиваются из нескольких потоков запуска
+            if self._thread is not None:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._event_loop, name='sim_world')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _event_loop(self):
+        step = self.config['physics_step']
+        while self._running:
+            now = self.clock.monotonic()
+            due = []
+            with self.lock:
+                self.advance(now)
+                while self._events and self._events[0][0] <= now:
+                    due.append(heapq.heappop(self._events))
+                next_event = self._events[0][0] if self._events else now + step
+            for when, pin, level in due:
+                handler = self.callbacks.get(pin)
+                if handler is None:
+                    continue
+                edge, callback = handler
+                if edge == 'both' or (edge == 'rising') == bool(level):
+                    # Колбэк видит время самого фронта, а не время доставки
+                    with self.clock.frozen_at(when):
+                        callback(pin)
+            self.clock.sleep(max(min(next_event, now + step) - now, 0.0))
@@ -4,45 +4,143 @@ Hardware Node для ROS2 робота
 Одометрия + TF + Датчики + Моторы
 
 Функции:
-- Управление моторами через /cmd_vel
-- Публикация одометрии в /odom (30 Hz)
+- Управление моторами через /cmd_vel (разомкнуто или ПИД по энкодерам, wheel_control)
+- Публикация одометрии в /odom (odom_rate, 30 Hz; поза интегрируется на каждом тике)
+- На стоянке (нет тиков и команд дольше motion_idle_after) /odom и TF -
+  с частотой odom_idle_rate, heartbeat - раз в heartbeat_idle_period,
+  без отладочных логов энкодеров; первый тик или команда возвращают
+  полную частоту сразу (публикация без ожидания периода). Частота и
+  сэкономленные публикации - в /diagnostics, publish_rate
 - TF трансформация odom → base_footprint
-- Ультразвуковые датчики (3 шт, 10 Hz)
-- Энкодеры на polling-опросе (без прерываний)
+- Ультразвуковые датчики (3 шт, отдельный поток, метки времени эха)
+- Режим развёртки (front_sonar='scan'): передний датчик на сервоприводе
+  пана проходит дугу scan_arc, показания - sensor_msgs/LaserScan в scan
+  секторами по scan_sector углов (частота сканов и разрешение - в
+  /diagnostics, sonar_sweep). Сервопривод пана (scan_servo) занят узлом:
+  servo_controller в том же процессе с ним не запустится, отдельному
+  процессу его нужно убрать из joint_servos
+- Энкодеры на polling-опросе (без прерываний, общий mmap-опросчик GPIO)
+- Имена топиков относительные (пространство имён узла, несколько роботов
+  в одном домене ROS), кадры TF с префиксом frame_prefix
+- Профилировщик стеков всех потоков по сервису ~/profile (std_srvs/SetBool)
+- Поза, скорость и метка каждой /odom - ещё и в разделяемую память
+  (pose_shm, my_robot.pose_channel) для процессов на той же машине
+- След робота: прореженная история позы фиксированного размера
+  (PoseTrail, старые участки грубее) - nav_msgs/Path в trail (trail_rate)
+- Быстрый запуск: издатели и watchdog сразу, устройства параллельно в фоне
+  (длительности фаз и время до первой /odom - в /diagnostics, startup)
+
+Группы колбэков (многопоточный PriorityExecutor, параметр executor):
+- control: /cmd_vel, cmd_vel/trace и watchdog - команда моторов не ждёт
+  остальные колбэки
+- odometry: таймер /odom и TF, публикация следа
+- background: публикация датчиков по таймеру, heartbeat, /diagnostics, ~/profile
+Потоки executor'а получают executor_priority (SCHED_FIFO) и ядра
+executor_cpus, потоки устройств (энкодеры, сонар, выходной каскад,
+регулятор) - ядра hardware_cpus; без прав настройка пропускается.
+Худшая задержка /cmd_vel -> запись в мотор при загруженной фоновой группе:
+один колбэк control (доли мс) + ожидание GIL до интервала переключения
+(5 мс, уменьшается по выбору: gil_switch_interval:=0.001) на каждую
+передачу между потоками + период выходного каскада; с одним потоком
+(executor='single') к ней добавляется самый долгий фоновый колбэк.
+Замер - benchmark/bench_executor.py.
 """
 
 import rclpy
+from rclpy.callback_groups import MutuallyExclusiveCallbackGroup
+from rclpy.duration import Duration
+from rclpy.executors import SingleThreadedExecutor
+from rclpy.logging import LoggingSeverity
 from rclpy.node import Node
+from rclpy.time import Time
 from rclpy.qos import QoSProfile, QoSReliabilityPolicy, QoSHistoryPolicy
-from geometry_msgs.msg import Twist, TransformStamped
-from sensor_msgs.msg import Range
-from nav_msgs.msg import Odometry as NavOdometry
-import RPi.GPIO as GPIO
+from rcl_interfaces.msg import SetParametersResult
+from geometry_msgs.msg import PoseStamped, Twist, TransformStamped
+from sensor_msgs.msg import LaserScan, Range
+from std_msgs.msg import Header
+from nav_msgs.msg import Odometry as NavOdometry, Path
 import atexit
-import time
 import math
 import threading
-from Raspi_MotorHAT import Raspi_MotorHAT
+from my_robot import composition
+from my_robot.diagnostics import CallbackDiagnostics, LatencyTrace, StartupProfile
+from my_robot.executor import PriorityExecutor
+from my_robot.pose_channel import PoseWriter, default_path
+from my_robot.profiler_service import ProfilerService
+from my_robot.realtime import configure_thread, parse_cpus
+from my_robot.hardware.hal import GPIO, Raspi_MotorHAT, clock, open_gpio_bank
 from my_robot.hardware.encoder_counter import EncoderCounter
+from my_robot.hardware.gpio_sampler import GpioSampler
+from my_robot.hardware.motor_output import MotorOutputStage, convert_speed
+from my_robot.hardware.kinematics import KINEMATICS_PARAMETERS, KinematicsModel, open_loop_percent
+from my_robot.hardware.odometry import OdometryIntegrator
+from my_robot.hardware.pose_trail import PoseTrail
+from my_robot.hardware.publish_rate import AdaptivePublishRate
+from my_robot.hardware.sonar import SonarAcquisition, SonarSensor
+from my_robot.hardware.sonar_scheduler import SonarScheduler
+from my_robot.hardware.sonar_sweep import SonarSweep
+from my_robot.hardware.servos import Servos, claim_servos
+from my_robot.hardware.velocity_estimator import WheelVelocityEstimator
 from tf2_ros import TransformBroadcaster
 
+# Ковариации одометрии (неизменны, задаются один раз)
+POSE_COVARIANCE = (
+    0.01, 0.0, 0.0, 0.0, 0.0, 0.0,
+    0.0, 0.01, 0.0, 0.0, 0.0, 0.0,
+    0.0, 0.0, 0.01, 0.0, 0.0, 0.0,
+    0.0, 0.0, 0.0, 0.1, 0.0, 0.0,
+    0.0, 0.0, 0.0, 0.0, 0.1, 0.0,
+    0.0, 0.0, 0.0, 0.0, 0.0, 0.1
+)
+TWIST_COVARIANCE = (
+    0.001, 0.0, 0.0, 0.0, 0.0, 0.0,
+    0.0, 0.001, 0.0, 0.0, 0.0, 0.0,
+    0.0, 0.0, 0.001, 0.0, 0.0, 0.0,
+    0.0, 0.0, 0.0, 0.1, 0.0, 0.0,
+    0.0, 0.0, 0.0, 0.0, 0.1, 0.0,
+    0.0, 0.0, 0.0, 0.0, 0.0, 0.1
+)
+
+# Потоки устройств (привязка к ядрам hardware_cpus)
+DEVICE_THREADS = ('gpio_sampler', 'sonar', 'motor_output', 'wheel_controller')
+
 
 class HardwareNode(Node):
     def __init__(self):
-        super().__init__('hardware_node')
+        # Фазы запуска и время до первой /odom (от старта процесса)
+        self.startup = StartupProfile()
+        self.startup.milestone('node_init')  # Импорт модулей и rclpy.init
+        with self.startup.phase('node'):
+            super().__init__('hardware_node')
         
         # ===========================================
         # ПАРАМЕТРЫ (можно менять без пересборки)
         # ===========================================
-        self.declare_parameter('motorhat_addr', 0x6F)
-        self.declare_parameter('wheel_base', 0.12)          # Расстояние между колёсами (м)
-        self.declare_parameter('wheel_diameter', 0.065)     # Диаметр колеса (м) - 65мм для TT motor
-        self.declare_parameter('ticks_per_rev', 20)       # Тиков на оборот (зависит от энкодера)
+        with self.startup.phase('parameters'):
+            self.declare_parameters()
+
+            # Модель кинематики: считается один раз, обновляется при смене параметров
+            self.kinematics = KinematicsModel.from_node(self)
+            self.add_on_set_parameters_callback(self.on_set_parameters)
         
         # ===========================================
-        # ИНИЦИАЛИЗАЦИЯ ЖЕЛЕЗА
+        # УСТРОЙСТВА (поднимаются в init_robot после издателей и watchdog;
+        # до готовности колбэки их пропускают)
         # ===========================================
-        self.init_robot()
+        self.recorder = None
+        self.motor_output = None
+        self.wheel_controller = None
+        self.gpio_sampler = None
+        self.sonar = None
+        self.odometry = None            # Задаётся последним из энкодерных объектов
+        self.drive_ready = False        # Команды /cmd_vel принимаются
+        self.motors_released = True
+        self.commands_before_ready = 0  # Команды, пришедшие до готовности моторов
+        self.gpio_pins = []             # Свои пины (освобождаются при остановке)
+        self.hardware_failed = []       # Устройства, не поднявшиеся при запуске
+        self.hardware_ready = threading.Event()
+        self.hardware_thread = None
+        self.first_odom_sent = False
         
         # ===========================================
         # ОДОМЕТРИЯ (переменные состояния)
@@ -53,26 +151,197 @@ class HardwareNode(Node):
         self.last_left_ticks = 0        # Последние тики левого энкодера
         self.last_right_ticks = 0       # Последние тики правого энкодера
         self.last_time = self.get_clock().now()  # Время последнего обновления
+        self.left_ticks = 0
+        self.right_ticks = 0
+
+        # Переменные для отслеживания скорости
+        self.current_left_speed = 0
+        self.current_right_speed = 0
+
+        # Кадры робота (с префиксом, если роботов несколько)
+        self.frame_prefix = self.get_parameter('frame_prefix').value
+        odom_frame = f'{self.frame_prefix}odom'
+        base_frame = f'{self.frame_prefix}base_footprint'
+
+        # Сообщения одометрии и TF создаются один раз и переиспользуются
+        self.odom_msg = NavOdometry()
+        self.odom_msg.header.frame_id = odom_frame
+        self.odom_msg.child_frame_id = base_frame
+        self.odom_msg.pose.covariance = POSE_COVARIANCE
+        self.odom_msg.twist.covariance = TWIST_COVARIANCE
+        self.odom_transform = TransformStamped()
+        self.odom_transform.header.frame_id = odom_frame
+        self.odom_transform.child_frame_id = base_frame
+        self.next_log_time = 0.0  # Троттлинг отладочных логов (clock.monotonic)
         
         # Блокировка для потокобезопасного чтения энкодеров
         self.encoder_lock = threading.Lock()
         
         # ===========================================
-        # ПУБЛИКАТОРЫ И ТАЙМЕРЫ
+        # ПУБЛИКАТОРЫ И ТАЙМЕРЫ (до железа: /odom и watchdog работают сразу)
         # ===========================================
-        # Одометрия (30 Hz = 0.033 сек)
-        self.odom_pub = self.create_publisher(NavOdometry, '/odom', 10)
-        self.update_timer = self.create_timer(0.033, self.update_odometry)
+        with self.startup.phase('publishers'):
+            self.create_interfaces()
+
+        # Регистрация остановки при выходе
+        atexit.register(self.stop_all)
+        
+        # ===========================================
+        # ИНИЦИАЛИЗАЦИЯ ЖЕЛЕЗА
+        # ===========================================
+        self.init_robot()
+        
+        self.get_logger().info('Hardware Node запущен! (Одометрия + TF + Датчики)')
+
+    def declare_parameters(self):
+        """Объявление параметров узла"""
+        self.declare_parameter('motorhat_addr', 0x6F)
+        self.declare_parameter('wheel_base', 0.12)          # Расстояние между колёсами (м)
+        self.declare_parameter('wheel_diameter', 0.065)     # Диаметр колеса (м) - 65мм для TT motor
+        self.declare_parameter('ticks_per_rev', 20)       # Тиков на оборот (зависит от энкодера)
+        self.declare_parameter('encoder_sampler', 'mmap')   # 'mmap' - общий опросчик, 'threads' - поток на пин
+        self.declare_parameter('gpiomem_path', '/dev/gpiomem')
+        self.declare_parameter('velocity_window', 0.1)      # Окно счёта тиков на большой скорости (с)
+        self.declare_parameter('velocity_switch_rate', 40.0)  # Тиков/с, выше - счёт в окне, ниже - по периоду
+        self.declare_parameter('diagnostics_period', 2.0)   # Период публикации /diagnostics (с), 0 - выкл
+        self.declare_parameter('odom_rate', 30.0)           # Частота публикации /odom и TF (Гц)
+        self.declare_parameter('odom_idle_rate', 1.0)       # Частота /odom и TF на стоянке (Гц), 0 - всегда odom_rate
+        self.declare_parameter('motion_idle_after', 2.0)    # Без тиков и команд дольше (с) - стоянка
+        self.declare_parameter('heartbeat_idle_period', 30.0)  # Период heartbeat на стоянке (с)
+        self.declare_parameter('odom_integration', 'arc')   # 'arc', 'midpoint' или 'euler' (шаг на каждом тике)
+        self.declare_parameter('motor_output_rate', 50.0)   # Макс. частота записи в Motor HAT (Гц)
+        self.declare_parameter('motor_refresh_period', 1.0)  # Повтор записи моторов в движении (с), 0 - нет
+        self.declare_parameter('wheel_control', 'open_loop')  # 'open_loop' или 'pid' (замкнутый по энкодерам)
+        self.declare_parameter('wheel_control_rate', 100.0)   # Частота регулятора (50-200 Гц)
+        self.declare_parameter('wheel_control_priority', 0)   # Приоритет SCHED_FIFO потока, 0 - обычный
+        self.declare_parameter('wheel_kp', 150.0)           # ШИМ на м/с ошибки
+        self.declare_parameter('wheel_ki', 600.0)
+        self.declare_parameter('wheel_kd', 0.0)
+        self.declare_parameter('wheel_kff', 300.0)          # Прямая связь: ШИМ на м/с уставки
+        self.declare_parameter('wheel_min_pwm', 60.0)       # ШИМ трогания (вместо порога 50%)
+        self.declare_parameter('sensor_publish', 'immediate')  # 'immediate' - сразу после эха, 'timer' - 20 Hz
+        self.declare_parameter('sonar_min_rate', 5.0)       # Частота датчика на месте (Гц)
+        self.declare_parameter('sonar_max_rate', 30.0)      # Частота датчика по ходу движения (Гц)
+        self.declare_parameter('sonar_crosstalk_angle', 0.8)  # Оси ближе (рад) - датчики не запускаются вместе
+        self.declare_parameter('sonar_settle', 0.025)       # Затухание отражений после пинга (с)
+        self.declare_parameter('front_sonar', 'fixed')      # 'fixed' или 'scan' - развёртка сервоприводом пана
+        self.declare_parameter('scan_arc', 2.094)           # Дуга развёртки (рад), 120°
+        self.declare_parameter('scan_step', 0.1745)         # Шаг развёртки (рад), 10°
+        self.declare_parameter('scan_sector', 4)            # Углов в сообщении scan, 0 - полный проход
+        self.declare_parameter('scan_pipelined', True)      # Поворот к следующему углу во время ожидания эха
+        self.declare_parameter('scan_servo', 0)             # Индекс сервопривода пана (канал 0)
+        self.declare_parameter('scan_servo_speed', 6.0)     # Скорость сервопривода (рад/с)
+        self.declare_parameter('scan_servo_settle', 0.015)  # Успокоение после поворота (с)
+        self.declare_parameter('servo_addr', 0x6F)
+        self.declare_parameter('deflect_90_in_ms', 0.8)     # Калибровка сервопривода (как в servo_controller)
+        self.declare_parameter('record_dir', '')            # Каталог записи сырых событий, '' - не писать
+        self.declare_parameter('record_capacity', 262144)   # Событий в одном файле (24 байта каждое)
+        self.declare_parameter('record_max_files', 4)       # Сколько файлов хранить при ротации
+        self.declare_parameter('hardware_startup', 'parallel')  # 'parallel' - устройства в потоках, 'serial' - по очереди
+        self.declare_parameter('frame_prefix', '')          # Префикс кадров TF, например 'robot1/'
+        self.declare_parameter('pose_shm', 'auto')          # Файл канала позы, 'auto' - по пространству имён, '' - выкл
+        self.declare_parameter('trail_rate', 0.5)           # Частота публикации следа trail (Гц), 0 - выкл
+        self.declare_parameter('trail_capacity', 1024)      # Точек на уровень следа
+        self.declare_parameter('trail_levels', 3)           # Уровней следа (шаг каждого в 4 раза крупнее)
+        self.declare_parameter('trail_min_distance', 0.05)  # Шаг свежего следа (м)
+        self.declare_parameter('trail_min_angle', 0.26)     # Поворот, после которого точка тоже пишется (рад)
+        self.declare_parameter('executor', 'multi')         # 'multi' - группы колбэков параллельно, 'single' - по одному
+        self.declare_parameter('executor_threads', 3)       # Потоков executor'а (по группам)
+        self.declare_parameter('executor_priority', 0)      # SCHED_FIFO потоков executor'а, 0 - обычный
+        self.declare_parameter('executor_cpus', '')         # Ядра потоков executor'а, например '2,3'; '' - любые
+        self.declare_parameter('hardware_cpus', '')         # Ядра потоков устройств, например '1'; '' - любые
+        self.declare_parameter('gil_switch_interval', 0.0)  # Интервал переключения GIL (с), 0 - не менять (5 мс)
+
+    def create_interfaces(self):
+        """Диагностика, издатели, таймеры, подписки и watchdog"""
+        # Группы колбэков: команда моторов и watchdog не ждут одометрию
+        # и фоновые колбэки (при многопоточном executor'е)
+        self.control_group = MutuallyExclusiveCallbackGroup()
+        self.odometry_group = MutuallyExclusiveCallbackGroup()
+        self.background_group = MutuallyExclusiveCallbackGroup()
+
+        # Диагностика колбэков (время выполнения, джиттер, перегрузки)
+        self.diagnostics = CallbackDiagnostics(
+            self, self.get_parameter('diagnostics_period').value, self.background_group)
+        instrument = self.diagnostics.instrument
+        self.diagnostics.add_source('startup', self.startup_stats)
+        # Трассировка задержки реакции: эхо -> Range -> /cmd_vel -> запись в мотор
+        self.latency = LatencyTrace(('echo_to_range', 'echo_to_cmd', 'echo_to_motor'))
+        self.diagnostics.add_source('latency', self.latency.stats)
+        self.pending_trace = None
+
+        # Одометрия (по умолчанию 30 Hz): только снимок позы, интегрирование - в потоке энкодеров
+        odom_period = 1.0 / self.get_parameter('odom_rate').value
+        self.odom_pub = self.create_publisher(NavOdometry, 'odom', 10)
+        # Та же поза для локальных читателей без DDS (PoseReader)
+        self.pose_writer = None
+        pose_shm = self.get_parameter('pose_shm').value
+        if pose_shm:
+            path = default_path(self.get_namespace()) if pose_shm == 'auto' else pose_shm
+            try:
+                self.pose_writer = PoseWriter(path)
+            except (OSError, ValueError) as e:
+                self.get_logger().warn(f'Канал позы {path} недоступен: {e}')
+        update_odometry = instrument('update_odometry', self.update_odometry, odom_period)
+        self.update_stats = update_odometry.stats
+        self.update_timer = self.create_timer(
+            odom_period, update_odometry, callback_group=self.odometry_group)
+
+        # Частота /odom, TF и heartbeat по движению: выход из покоя по тику
+        # или команде будит группу odometry через guard condition
+        self.publish_rate = None
+        odom_idle_rate = self.get_parameter('odom_idle_rate').value
+        if 0.0 < odom_idle_rate < 1.0 / odom_period:
+            self.publish_rate = AdaptivePublishRate(
+                1.0 / odom_period, odom_idle_rate, self.get_parameter('motion_idle_after').value)
+            self.motion_guard = self.create_guard_condition(
+                self.on_motion, callback_group=self.odometry_group)
+            self.publish_rate.wake = self.motion_guard.trigger
+            self.diagnostics.add_source('publish_rate', self.publish_rate.stats)
+
+        # След робота (прореживается при вставке из update_odometry)
+        self.trail = None
+        trail_rate = self.get_parameter('trail_rate').value
+        if trail_rate > 0.0:
+            get = self.get_parameter
+            self.trail = PoseTrail(
+                get('trail_capacity').value, get('trail_levels').value,
+                get('trail_min_distance').value, get('trail_min_angle').value)
+            self.trail_pub = self.create_publisher(Path, 'trail', 1)
+            self.trail_msg = Path()
+            self.trail_msg.header.frame_id = self.odom_msg.header.frame_id
+            self.trail_poses = {}       # seq точки -> PoseStamped (новые точки создаются один раз)
+            self.trail_head = PoseStamped()  # Текущая поза в конце следа
+            self.trail_head.header.frame_id = self.odom_msg.header.frame_id
+            self.trail_published = -1   # Номер последней точки на момент публикации
+            # Группа odometry: чтение следа не пересекается со вставкой
+            self.trail_timer = self.create_timer(
+                1.0 / trail_rate, instrument('publish_trail', self.publish_trail, 1.0 / trail_rate),
+                callback_group=self.odometry_group)
+            self.diagnostics.add_source('trail', self.trail.stats)
         
-        # Датчики (10 Hz = 0.1 сек)
-        self.dist_pub = self.create_publisher(Range, '/sensors/distance', 10)
-        self.sensor_timer = self.create_timer(0.1, self.publish_sensors)
+        # Датчики: опрос в отдельном потоке; публикация сразу из него
+        # или выборкой очереди по таймеру (20 Hz)
+        self.dist_pub = composition.create_publisher(self, Range, 'sensors/distance', 10)
+        self.sensor_publish_immediate = self.get_parameter('sensor_publish').value == 'immediate'
+        self.scan_pub = None
+        if self.get_parameter('front_sonar').value == 'scan':
+            # Сразу, до фонового запуска устройств: составной servo_controller
+            # создаётся позже и не займёт сервопривод пана
+            claim_servos(self.get_parameter('servo_addr').value,
+                         [self.get_parameter('scan_servo').value], 'hardware_node front_sonar=scan')
+            self.scan_pub = self.create_publisher(LaserScan, 'scan', 10)
+        if not self.sensor_publish_immediate:
+            self.sensor_timer = self.create_timer(
+                0.05, instrument('publish_sensors', self.publish_sensors, 0.05),
+                callback_group=self.background_group)
         
         # TF Broadcast (трансформация координат)
         self.tf_broadcaster = TransformBroadcaster(self)
         
         # Heartbeat (1 Hz)
-        self.heartbeat = self.create_timer(1.0, self.heartbeat_callback)
+        self.heartbeat = self.create_timer(
+            1.0, self.heartbeat_callback, callback_group=self.background_group)
         
         cmd_vel_qos = QoSProfile(
             reliability=QoSReliabilityPolicy.BEST_EFFORT,  # Не ждать подтверждений
@@ -80,155 +349,389 @@ class HardwareNode(Node):
             depth=10
         )
         # Подписка на команды скорости
-        self.subscription = self.create_subscription(
-            Twist, '/cmd_vel', self.cmd_callback, cmd_vel_qos)
+        self.subscription = composition.create_subscription(
+            self, Twist, 'cmd_vel', instrument('cmd_callback', self.cmd_callback), cmd_vel_qos,
+            self.control_group)
+        # Метка времени эха, на которое отвечает следующая команда (трассировка)
+        self.trace_subscription = composition.create_subscription(
+            self, Header, 'cmd_vel/trace', self.trace_callback, cmd_vel_qos,
+            self.control_group)
         
         # Watchdog для cmd_vel
         self.cmd_timeout = 5.0  # сек
         self.last_cmd_time = self.get_clock().now()
-        self.cmd_watchdog = self.create_timer(0.1, self.cmd_watchdog_callback)
+        self.cmd_watchdog = self.create_timer(
+            0.1, instrument('cmd_watchdog_callback', self.cmd_watchdog_callback, 0.1),
+            callback_group=self.control_group)
 
-        # Регистрация остановки при выходе
-        atexit.register(self.stop_all)
-        
-        self.get_logger().info('Hardware Node запущен! (Одометрия + TF + Датчики)')
+        # Профилирование по запросу (~/profile)
+        self.profiler_service = ProfilerService(self, self.background_group)
 
     def init_robot(self):
-        """Инициализация всего железа (моторы, GPIO, энкодеры)"""
-        addr = self.get_parameter('motorhat_addr').value
-        
-        # Motor HAT
-        self._mh = Raspi_MotorHAT(addr=addr)
-        self.left_motor = self._mh.getMotor(1)
-        self.right_motor = self._mh.getMotor(2)
-        
-        # GPIO Настройки
+        """
+        Инициализация железа: Motor HAT, датчики и энкодеры независимы и
+        поднимаются параллельно в потоках (hardware_startup='parallel'),
+        регулятор колёс - когда готовы моторы и энкодеры. Узел к этому
+        моменту уже публикует /odom и принимает /cmd_vel.
+        """
+        # Запись сырых событий (фронты, эхо, /cmd_vel, ШИМ) для replay
+        record_dir = self.get_parameter('record_dir').value
+        if record_dir:
+            from my_robot.hardware.event_recorder import EventRecorder
+            self.recorder = EventRecorder(
+                record_dir, self.get_parameter('record_capacity').value,
+                self.get_parameter('record_max_files').value)
+            self.get_logger().info(f'Запись событий: {self.recorder.path}')
+
+        # GPIO Настройки. Без GPIO.cleanup(): он сбрасывает и пины других
+        # процессов; при остановке освобождаются только свои (self.gpio_pins)
         GPIO.setwarnings(False)
-        GPIO.cleanup()
         GPIO.setmode(GPIO.BCM)
-        
-        # Пины датчиков (HC-SR04)
-        self.trig_left = 27
-        self.echo_left = 17
-        self.trig_right = 6
-        self.echo_right = 5
-        self.trig_front = 23
-        self.echo_front = 24
-        
-        # Настройка пинов датчиков
-        for pin in [self.trig_left, self.trig_right, self.trig_front]:
-            GPIO.setup(pin, GPIO.OUT)
-            GPIO.output(pin, GPIO.LOW)
-        
-        for pin in [self.echo_left, self.echo_right, self.echo_front]:
-            GPIO.setup(pin, GPIO.IN)
-        
-        time.sleep(0.1)  # Стабилизация
-        
-        # ===========================================
-        # ЭНКОДЕРЫ (Polling-опрос, без прерываний)
-        # ===========================================
-        # Левый энкодер: GPIO 12 (или 4, проверь по схеме)
-        # Правый энкодер: GPIO 26
-        self.left_encoder = EncoderCounter(12)
-        self.right_encoder = EncoderCounter(26)
-        
-        # Устанавливаем константы для конвертации тиков в расстояние
-        wheel_diameter = self.get_parameter('wheel_diameter').value
-        ticks_per_rev = self.get_parameter('ticks_per_rev').value
-        EncoderCounter.set_constants(wheel_diameter * 1000, ticks_per_rev)  # мм
-        
-        self.left_ticks = 0
-        self.right_ticks = 0
-        
-        # Переменные для отслеживания скорости
-        self.current_left_speed = 0
-        self.current_right_speed = 0
-        
-        self.get_logger().info(f'Энкодеры инициализированы: wheel_diameter={wheel_diameter}м, ticks_per_rev={ticks_per_rev}')
 
-    def get_distance(self, trig_pin, echo_pin):
-        """Измерение дистанции ультразвуковым датчиком (метод опроса)"""
+        steps = (self.init_motors, self.init_sonar, self.init_encoders)
+        if self.get_parameter('hardware_startup').value == 'serial':
+            for step in steps:
+                step()
+            self.finish_hardware()
+            return
+        self.hardware_thread = threading.Thread(
+            target=self.run_hardware_init, args=(steps,), name='hardware_init')
+        self.hardware_thread.daemon = True
+        self.hardware_thread.start()
+
+    def run_hardware_init(self, steps):
+        """Поток запуска: устройства параллельно, затем регулятор"""
+        threads = [threading.Thread(target=self.run_init_step, args=(step,),
+                                    name=step.__name__, daemon=True)
+                   for step in steps]
+        with self.startup.phase('hardware'):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.finish_hardware()
+
+    def run_init_step(self, step):
+        """Одно устройство; ошибка не останавливает остальные"""
         try:
-            GPIO.output(trig_pin, True)
-            time.sleep(0.00001)  # 10 мкс
-            GPIO.output(trig_pin, False)
-            
-            pulse_start = time.time()
-            timeout = pulse_start + 0.1  # Таймаут 100 мс
-            
-            # Ждём нарастающий фронт
-            while GPIO.input(echo_pin) == 0:
-                if time.time() > timeout:
-                    return float('inf')
-                pulse_start = time.time()
+            step()
+        except Exception as e:
+            self.hardware_failed.append(step.__name__)
+            self.get_logger().error(f'Ошибка запуска {step.__name__}: {e}')
+
+    def init_motors(self):
+        """Motor HAT и выходной каскад"""
+        with self.startup.phase('motors'):
+            self._mh = Raspi_MotorHAT(addr=self.get_parameter('motorhat_addr').value)
+            self.left_motor = self._mh.getMotor(1)
+            self.right_motor = self._mh.getMotor(2)
+
+            # Запись в моторы только через выходной каскад (без повторов, пачкой)
+            motor_output = MotorOutputStage(
+                self._mh, max_rate=self.get_parameter('motor_output_rate').value,
+                refresh_period=self.get_parameter('motor_refresh_period').value)
+            motor_output.recorder = self.recorder
+            motor_output.trace_callback = self.trace_motor_write
+            motor_output.start()
+            self.diagnostics.add_source('motor_output', motor_output.stats)
+            self.motor_output = motor_output
+            if self.get_parameter('wheel_control').value != 'pid':
+                self.drive_ready = True
+
+    def init_sonar(self):
+        """Пины HC-SR04 и поток опроса датчиков"""
+        with self.startup.phase('sonar'):
+            # Пины датчиков (HC-SR04)
+            self.trig_left = 27
+            self.echo_left = 17
+            self.trig_right = 6
+            self.echo_right = 5
+            self.trig_front = 23
+            self.echo_front = 24
             
-            # Ждём спадающий фронт
-            pulse_end = time.time()
-            while GPIO.input(echo_pin) == 1:
-                if time.time() > timeout:
-                    return float('inf')
-                pulse_end = time.time()
+            # Настройка пинов датчиков
+            for pin in [self.trig_left, self.trig_right, self.trig_front]:
+                GPIO.setup(pin, GPIO.OUT)
+                GPIO.output(pin, GPIO.LOW)
             
-            duration = pulse_end - pulse_start
-            distance = duration * 17150  # см (скорость звука 343 м/с)
+            for pin in [self.echo_left, self.echo_right, self.echo_front]:
+                GPIO.setup(pin, GPIO.IN)
+            self.gpio_pins.extend([self.trig_left, self.echo_left, self.trig_right,
+                                   self.echo_right, self.trig_front, self.echo_front])
             
-            # Фильтр недостоверных значений
-            if distance > 200 or distance < 2:
-                return float('inf')
+            clock.sleep(0.1)  # Стабилизация (параллельно с моторами и энкодерами)
+
+            # Опрос датчиков вне executor'а (фронты эха с метками времени),
+            # частоты датчиков следуют за движением (set_motion из cmd_callback)
+            sensors = [
+                SonarSensor('left', self.trig_left, self.echo_left, yaw=0.6),
+                SonarSensor('right', self.trig_right, self.echo_right, yaw=-0.6),
+                SonarSensor('front', self.trig_front, self.echo_front, yaw=0.0),
+            ]
+            scheduler = SonarScheduler(
+                [(sensor.position, sensor.yaw) for sensor in sensors],
+                min_rate=self.get_parameter('sonar_min_rate').value,
+                max_rate=self.get_parameter('sonar_max_rate').value,
+                crosstalk_angle=self.get_parameter('sonar_crosstalk_angle').value,
+                settle=self.get_parameter('sonar_settle').value)
+            sonar = SonarAcquisition(sensors, scheduler, sweep=self.create_sweep())
+            sonar.recorder = self.recorder
+            if self.sensor_publish_immediate:
+                # Из потока опроса на каждое измерение (подписка: без периода)
+                sonar.on_result = self.diagnostics.instrument('publish_sensors', self.publish_sensors)
+            self.sonar = sonar
+            sonar.start()
+            self.diagnostics.add_source('sonar', sonar.stats)
+            if sonar.sweep is not None:
+                self.diagnostics.add_source('sonar_sweep', sonar.sweep.stats)
+                self.get_logger().info(
+                    f'Развёртка переднего датчика: {len(sonar.sweep.bearings)} углов '
+                    f'через {math.degrees(sonar.sweep.step):.1f}°')
+
+    def create_sweep(self):
+        """Развёртка переднего датчика сервоприводом пана (или None)"""
+        if self.scan_pub is None:
+            return None
+        get = self.get_parameter
+        servos = Servos(get('servo_addr').value, get('deflect_90_in_ms').value)
+        sweep = SonarSweep(
+            servos, 'front', joint=get('scan_servo').value,
+            arc=get('scan_arc').value, step=get('scan_step').value,
+            servo_speed=get('scan_servo_speed').value,
+            servo_settle=get('scan_servo_settle').value,
+            sector=get('scan_sector').value, pipelined=get('scan_pipelined').value)
+        sweep.on_sector = self.publish_scan
+        return sweep
+
+    def init_encoders(self):
+        """Энкодеры, интегратор позы и оценка скорости колёс"""
+        with self.startup.phase('encoders'):
+            # ===========================================
+            # ЭНКОДЕРЫ (Polling-опрос, без прерываний)
+            # ===========================================
+            # Левый энкодер: GPIO 12 (или 4, проверь по схеме)
+            # Правый энкодер: GPIO 26
+            sampler = self.create_gpio_sampler()
+            left_encoder = EncoderCounter(12, sampler=sampler)
+            right_encoder = EncoderCounter(26, sampler=sampler)
+            left_encoder.recorder = self.recorder
+            right_encoder.recorder = self.recorder
+            self.gpio_pins.extend([12, 26])
+
+            # Поза интегрируется на каждом тике (до запуска опроса)
+            odometry = OdometryIntegrator(
+                self.kinematics, self.get_parameter('odom_integration').value)
+            odometry.attach(left_encoder, right_encoder)
+            if self.publish_rate is not None:
+                odometry.on_tick = self.publish_rate.activity
             
-            return distance / 100.0  # метры
-        except Exception as e:
-            self.get_logger().error(f'Ошибка датчика: {e}')
-            return float('inf')
-
-    def convert_speed(self, speed_percent):
-        """Конвертация скорости из процентов в режим и ШИМ (0-255)"""
-        mode = Raspi_MotorHAT.RELEASE
-        if speed_percent > 0:
-            mode = Raspi_MotorHAT.FORWARD
-        elif speed_percent < 0:
-            mode = Raspi_MotorHAT.BACKWARD
-            speed_percent = -speed_percent
+            # Устанавливаем константы для конвертации тиков в расстояние
+            EncoderCounter.set_kinematics(self.kinematics)
+
+            # Оценка скорости колёс по меткам времени тиков
+            meters_per_tick = self.kinematics.meters_per_tick
+            window = self.get_parameter('velocity_window').value
+            switch_rate = self.get_parameter('velocity_switch_rate').value
+            self.left_velocity = WheelVelocityEstimator(
+                left_encoder.ticks, meters_per_tick, window, switch_rate)
+            self.right_velocity = WheelVelocityEstimator(
+                right_encoder.ticks, meters_per_tick, window, switch_rate)
+            self.left_encoder = left_encoder
+            self.right_encoder = right_encoder
+
+            if sampler is not None:
+                sampler.set_active(not self.motors_released)
+                sampler.start()
+                self.diagnostics.add_source('gpio_sampler', sampler.stats)
+                self.gpio_sampler = sampler
+            self.odometry = odometry  # Последним: update_odometry видит готовые энкодеры
         
-        output_speed = int((speed_percent * 255) // 100)
-        output_speed = min(255, max(0, output_speed))
-        return mode, output_speed
+        self.get_logger().info(
+            f'Энкодеры инициализированы: wheel_diameter={self.kinematics.wheel_diameter}м, '
+            f'ticks_per_rev={self.kinematics.ticks_per_rev}')
+
+    def finish_hardware(self):
+        """Регулятор колёс (нужны моторы и энкодеры) и итог запуска"""
+        if (self.get_parameter('wheel_control').value == 'pid'
+                and self.motor_output is not None and self.odometry is not None):
+            with self.startup.phase('wheel_controller'):
+                self.init_wheel_controller()
+            self.drive_ready = True
+        self.pin_device_threads()
+        self.startup.milestone('hardware_ready')
+        self.hardware_ready.set()
+        if self.hardware_failed:
+            self.get_logger().error(f'Не запущены: {", ".join(self.hardware_failed)}')
+        self.get_logger().info(f'Железо готово: {self.startup.summary()}')
+
+    def init_wheel_controller(self):
+        """Замкнутый регулятор скорости колёс в своём потоке"""
+        from my_robot.hardware.wheel_controller import WheelSpeedController
+        gains = {
+            'kp': self.get_parameter('wheel_kp').value,
+            'ki': self.get_parameter('wheel_ki').value,
+            'kd': self.get_parameter('wheel_kd').value,
+            'kff': self.get_parameter('wheel_kff').value,
+            'offset': self.get_parameter('wheel_min_pwm').value,
+        }
+        controller = WheelSpeedController(
+            self.motor_output,
+            (self.left_encoder, self.right_encoder),
+            (self.left_velocity, self.right_velocity),
+            gains,
+            rate=self.get_parameter('wheel_control_rate').value,
+            priority=self.get_parameter('wheel_control_priority').value)
+        controller.start()
+        if controller.priority > 0:
+            clock.sleep(0.01)  # Поток успевает выставить SCHED_FIFO
+            if not controller.realtime:
+                self.get_logger().warn('SCHED_FIFO недоступен, регулятор на обычном приоритете')
+        self.diagnostics.add_source('wheel_controller', controller.stats)
+        self.wheel_controller = controller
+
+    def pin_device_threads(self):
+        """Привязка потоков устройств к ядрам hardware_cpus"""
+        cpus = parse_cpus(self.get_parameter('hardware_cpus').value)
+        if not cpus:
+            return
+        pinned = []
+        for thread in threading.enumerate():
+            if thread.name in DEVICE_THREADS and thread.native_id is not None:
+                if configure_thread(thread.native_id, cpus=cpus)[1]:
+                    pinned.append(thread.name)
+        if pinned:
+            self.get_logger().info(f'Потоки {", ".join(pinned)} на ядрах {sorted(cpus)}')
+        else:
+            self.get_logger().warn(f'Не удалось привязать потоки устройств к ядрам {sorted(cpus)}')
+
+    def create_executor(self):
+        """Executor узла по параметрам executor_* (для main)"""
+        get = self.get_parameter
+        if get('executor').value == 'single':
+            return SingleThreadedExecutor()
+        executor = PriorityExecutor(
+            num_threads=get('executor_threads').value,
+            priority=get('executor_priority').value,
+            cpus=parse_cpus(get('executor_cpus').value),
+            switch_interval=get('gil_switch_interval').value)
+        self.diagnostics.add_source('executor', executor.stats)
+        return executor
+
+    def wait_for_hardware(self, timeout=None):
+        """Дождаться запуска железа (для тестов и бенчмарков)"""
+        return self.hardware_ready.wait(timeout)
+
+    def startup_stats(self):
+        """Сводка запуска для /diagnostics"""
+        stats = self.startup.stats()
+        stats['commands_before_ready'] = self.commands_before_ready
+        if self.hardware_failed:
+            stats['failed'] = ','.join(self.hardware_failed)
+        return stats
+
+    def on_set_parameters(self, params):
+        """Пересчёт модели кинематики при изменении параметров"""
+        changes = {p.name: p.value for p in params if p.name in KINEMATICS_PARAMETERS}
+        if not changes:
+            return SetParametersResult(successful=True)
+        try:
+            model = self.kinematics.replace(**changes)
+        except (TypeError, ValueError) as e:
+            return SetParametersResult(successful=False, reason=str(e))
+        self.apply_kinematics(model)
+        return SetParametersResult(successful=True)
+
+    def apply_kinematics(self, model):
+        """Подменить модель кинематики для всех потребителей"""
+        self.kinematics = model
+        EncoderCounter.set_kinematics(model)
+        if self.odometry is not None:
+            self.odometry.kinematics = model
+        if hasattr(self, 'left_velocity'):
+            self.left_velocity.meters_per_tick = model.meters_per_tick
+            self.right_velocity.meters_per_tick = model.meters_per_tick
+
+    def create_gpio_sampler(self):
+        """Общий опросчик энкодеров через /dev/gpiomem (или None)"""
+        if self.get_parameter('encoder_sampler').value != 'mmap':
+            return None
+        path = self.get_parameter('gpiomem_path').value
+        try:
+            return GpioSampler(open_gpio_bank(path), clock=clock)
+        except OSError as e:
+            self.get_logger().warn(
+                f'{path} недоступен ({e}), энкодеры опрашиваются потоками')
+            return None
+
+    def trace_callback(self, msg):
+        """Метка эха для следующей команды /cmd_vel"""
+        self.pending_trace = (Time.from_msg(msg.stamp), clock.monotonic())
+
+    def take_trace_origin(self, now):
+        """Момент эха (clock.monotonic) для текущей команды или None"""
+        trace = self.pending_trace
+        if trace is None:
+            return None
+        self.pending_trace = None
+        stamp, received = trace
+        if clock.monotonic() - received > 0.05:
+            return None  # Метка от другой команды
+        age = (now - stamp).nanoseconds * 1e-9
+        self.latency.record('echo_to_cmd', age)
+        return clock.monotonic() - age
+
+    def trace_motor_write(self, origin, write_time):
+        """Колбэк выходного каскада: команда с трассировкой записана"""
+        self.latency.record('echo_to_motor', write_time - origin)
 
     def cmd_callback(self, msg):
         """Обработка команд скорости из /cmd_vel"""
+        if not self.drive_ready:
+            self.commands_before_ready += 1  # Моторы ещё запускаются
+            return
         self.last_cmd_time = self.get_clock().now()
-        self.get_logger().debug(f'Команда: linear.x={msg.linear.x:.2f}, angular.z={msg.angular.z:.2f}')
-        
-        wheel_base = self.get_parameter('wheel_base').value
+        origin = self.take_trace_origin(self.last_cmd_time)
+        if self.recorder is not None:
+            self.recorder.cmd_vel(clock.monotonic(), msg.linear.x, msg.angular.z)
+        if self.sonar is not None:
+            self.sonar.set_motion(msg.linear.x, msg.angular.z)  # Частоты датчиков по движению
+        if self.publish_rate is not None:
+            self.publish_rate.command(msg.linear.x != 0.0 or msg.angular.z != 0.0)
+        if self.get_logger().is_enabled_for(LoggingSeverity.DEBUG):
+            self.get_logger().debug(f'Команда: linear.x={msg.linear.x:.2f}, angular.z={msg.angular.z:.2f}')
         
-        # === КОЭФФИЦИЕНТ УСИЛЕНИЯ ПОВОРОТА ===
-        linear_scale = 1.5   # Усиление линейной скорости
-        turn_scale = 2.0  # Усиление поворота
-            
-        # Дифференциальная кинематика с усилением
-        left = (msg.linear.x * linear_scale) - (msg.angular.z * turn_scale) * (wheel_base / 2.0)
-        right = (msg.linear.x * linear_scale) + (msg.angular.z * turn_scale) * (wheel_base / 2.0)       
-        # Конвертация в проценты
-        left_percent = left * 100
-        right_percent = right * 100
-
-        # === МИНИМАЛЬНАЯ СКОРОСТЬ (критично для 4.8V!) ===
-        min_speed = 50  # Проценты 
+        if self.wheel_controller is not None:
+            # Уставка скоростей колёс, ШИМ подбирает регулятор
+            left, right = self.kinematics.wheel_speeds(msg.linear.x, msg.angular.z)
+            self.wheel_controller.set_target(left, right)
+            self.motors_released = False
+            if self.gpio_sampler is not None:
+                self.gpio_sampler.set_active(left != 0.0 or right != 0.0)
+            return
 
-        if abs(left_percent) > 0 and abs(left_percent) < min_speed:
-            left_percent = min_speed if left_percent > 0 else -min_speed
-        if abs(right_percent) > 0 and abs(right_percent) < min_speed:
-            right_percent = min_speed if right_percent > 0 else -min_speed
+        # Проценты с усилением и минимальной скоростью (общий код с replay)
+        left_percent, right_percent = open_loop_percent(
+            self.kinematics, msg.linear.x, msg.angular.z)
 
         # Применяем к моторам
-        mode_l, speed_l = self.convert_speed(left_percent)
-        mode_r, speed_r = self.convert_speed(right_percent)
+        mode_l, speed_l = convert_speed(left_percent)
+        mode_r, speed_r = convert_speed(right_percent)
         
-        self.left_motor.setSpeed(speed_l)
-        self.left_motor.run(mode_l)
-        self.right_motor.setSpeed(speed_r)
-        self.right_motor.run(mode_r)
+        self.motor_output.submit((mode_l, speed_l), (mode_r, speed_r), origin)
+        self.motors_released = False
+
+        # Знак тиков одометрии по команде (в режиме pid его задаёт регулятор).
+        # При RELEASE колесо катится накатом - направление не меняем
+        if self.odometry is not None:
+            for encoder, mode in ((self.left_encoder, mode_l), (self.right_encoder, mode_r)):
+                if mode == Raspi_MotorHAT.FORWARD:
+                    encoder.set_direction(1)
+                elif mode == Raspi_MotorHAT.BACKWARD:
+                    encoder.set_direction(-1)
+
+        if self.gpio_sampler is not None:
+            moving = mode_l != Raspi_MotorHAT.RELEASE or mode_r != Raspi_MotorHAT.RELEASE
+            self.gpio_sampler.set_active(moving)
         
         self.current_left_speed = left_percent
         self.current_right_speed = right_percent
@@ -238,19 +741,41 @@ class HardwareNode(Node):
         """Остановить моторы если не было команд более cmd_timeout"""
         now = self.get_clock().now()
         dt = (now - self.last_cmd_time).nanoseconds / 1e9
-        if dt > self.cmd_timeout:
-            self.left_motor.run(Raspi_MotorHAT.RELEASE)
-            self.right_motor.run(Raspi_MotorHAT.RELEASE)
+        # Срабатывает один раз на переход в таймаут, а не каждые 100 мс
+        if dt > self.cmd_timeout and not self.motors_released:
+            self.motors_released = True
+            if self.wheel_controller is not None:
+                self.wheel_controller.set_target(0.0, 0.0)
+            else:
+                self.motor_output.release()
+            if self.gpio_sampler is not None:
+                self.gpio_sampler.set_active(False)
+            if self.publish_rate is not None:
+                self.publish_rate.command(False)
+
+    def on_motion(self):
+        """Guard condition: робот тронулся - полная частота и поза сразу"""
+        self.apply_publish_rate()
+        self.update_odometry()
+
+    def apply_publish_rate(self):
+        """Периоды таймеров /odom и heartbeat по состоянию стоянки"""
+        rate = self.publish_rate
+        period = rate.period
+        self.update_timer.timer_period_ns = int(period * 1e9)
+        self.update_timer.reset()
+        self.update_stats.set_period(period)
+        heartbeat = self.get_parameter('heartbeat_idle_period').value if rate.idle else 1.0
+        self.heartbeat.timer_period_ns = int(heartbeat * 1e9)
+        self.heartbeat.reset()
 
     def update_odometry(self):
         """
-        Расчёт и публикация одометрии (30 Hz)
-        Использует дифференциальную кинематику
+        Публикация одометрии и TF (odom_rate)
+        Поза уже проинтегрирована по тикам в OdometryIntegrator.
+        Пока энкодеры запускаются, публикуется начальная поза (робот стоит)
         """
-        # Проверяем наличие энкодеров
-        if not hasattr(self, 'left_encoder') or not hasattr(self, 'right_encoder'):
-            return
-        
+        odometry = self.odometry
         current_time = self.get_clock().now()
         dt = (current_time - self.last_time).nanoseconds / 1e9  # дельта времени (сек)
         
@@ -258,130 +783,130 @@ class HardwareNode(Node):
         if dt < 0.001:
             return
         
-        # === ЧТЕНИЕ ЭНКОДЕРОВ (потокобезопасно) ===
-        with self.encoder_lock:
-            left_ticks = self.left_encoder.get_count()
-            right_ticks = self.right_encoder.get_count()
-        
-        # Разница тиков с прошлого цикла
-        diff_left = left_ticks - self.last_left_ticks
-        diff_right = right_ticks - self.last_right_ticks
+        now = clock.monotonic()
+        kinematics = self.kinematics  # Один снимок модели на цикл
+        if odometry is not None:
+            # === ЧТЕНИЕ ЭНКОДЕРОВ (потокобезопасно) ===
+            with self.encoder_lock:
+                left_ticks = self.left_encoder.get_count()
+                right_ticks = self.right_encoder.get_count()
+            
+            # Разница тиков с прошлого цикла
+            diff_left = left_ticks - self.last_left_ticks
+            diff_right = right_ticks - self.last_right_ticks
 
-        # Обновляем последние значения
-        self.last_left_ticks = left_ticks
-        self.last_right_ticks = right_ticks
+            # Обновляем последние значения
+            self.last_left_ticks = left_ticks
+            self.last_right_ticks = right_ticks
+            
+            # === ПОЗА: снимок из интегратора (обновляется на каждом тике) ===
+            self.x, self.y, self.theta = odometry.pose()
+
+            # Скорость (по периодам между тиками, а не по разнице за цикл)
+            v_left = self.left_velocity.estimate(now)
+            v_right = self.right_velocity.estimate(now)
+        else:
+            left_ticks = right_ticks = diff_left = diff_right = 0
+            v_left = v_right = 0.0
         self.last_time = current_time
         
-        # === КОНВЕРТАЦИЯ ТИКОВ В МЕТРЫ ===
-        wheel_diameter = self.get_parameter('wheel_diameter').value
-        ticks_per_rev = self.get_parameter('ticks_per_rev').value
-        ticks_to_m = (math.pi * wheel_diameter) / ticks_per_rev
-        
-        dist_left = diff_left * ticks_to_m
-        dist_right = diff_right * ticks_to_m
-        
-        # === ДИФФЕРЕНЦИАЛЬНАЯ КИНЕМАТИКА ===
-        wheel_base = self.get_parameter('wheel_base').value
-        dist_center = (dist_left + dist_right) / 2.0  # Пройденное расстояние центра
-        delta_theta = (dist_right - dist_left) / wheel_base  # Изменение угла
-        
-        # Обновляем позицию
-        self.theta += delta_theta
-        self.x += dist_center * math.cos(self.theta)
-        self.y += dist_center * math.sin(self.theta)
-        
-       
-        # === ПУБЛИКАЦИЯ ОДОМЕТРИИ ===
-        odom_msg = NavOdometry()
-        odom_msg.header.stamp = current_time.to_msg()
-        odom_msg.header.frame_id = 'odom'
-        odom_msg.child_frame_id = 'base_footprint'
-
-        # Позиция
-        odom_msg.pose.pose.position.x = self.x
-        odom_msg.pose.pose.position.y = self.y
-        odom_msg.pose.pose.position.z = 0.0
-
-        # Ориентация
-        odom_msg.pose.pose.orientation.z = math.sin(self.theta / 2.0)
-        odom_msg.pose.pose.orientation.w = math.cos(self.theta / 2.0)
-
-        # ИСПРАВЛЕННАЯ КОВАРИАЦИЯ (все значения явно float)
-        odom_msg.pose.covariance = [
-            0.01, 0.0, 0.0, 0.0, 0.0, 0.0,
-            0.0, 0.01, 0.0, 0.0, 0.0, 0.0,
-            0.0, 0.0, 0.01, 0.0, 0.0, 0.0,
-            0.0, 0.0, 0.0, 0.1, 0.0, 0.0,
-            0.0, 0.0, 0.0, 0.0, 0.1, 0.0,
-            0.0, 0.0, 0.0, 0.0, 0.0, 0.1
-        ]
+        # === ПУБЛИКАЦИЯ ОДОМЕТРИИ (сообщение переиспользуется) ===
+        nanoseconds = current_time.nanoseconds
+        stamp_sec = nanoseconds // 1000000000
+        stamp_nanosec = nanoseconds % 1000000000
+        quat_z = math.sin(self.theta / 2.0)
+        quat_w = math.cos(self.theta / 2.0)
+
+        odom_msg = self.odom_msg
+        odom_msg.header.stamp.sec = stamp_sec
+        odom_msg.header.stamp.nanosec = stamp_nanosec
+
+        # Позиция и ориентация
+        pose = odom_msg.pose.pose
+        pose.position.x = self.x
+        pose.position.y = self.y
+        pose.orientation.z = quat_z
+        pose.orientation.w = quat_w
 
         # Скорость
-        odom_msg.twist.twist.linear.x = dist_center / dt if dt > 0 else 0.0
-        odom_msg.twist.twist.linear.y = 0.0
-        odom_msg.twist.twist.angular.z = delta_theta / dt if dt > 0 else 0.0
-
-        # КОВАРИАЦИЯ СКОРОСТИ
-        odom_msg.twist.covariance = [
-            0.001, 0.0, 0.0, 0.0, 0.0, 0.0,
-            0.0, 0.001, 0.0, 0.0, 0.0, 0.0,
-            0.0, 0.0, 0.001, 0.0, 0.0, 0.0,
-            0.0, 0.0, 0.0, 0.1, 0.0, 0.0,
-            0.0, 0.0, 0.0, 0.0, 0.1, 0.0,
-            0.0, 0.0, 0.0, 0.0, 0.0, 0.1
-        ]
+        twist = odom_msg.twist.twist
+        twist.linear.x = (v_left + v_right) / 2.0
+        twist.angular.z = (v_right - v_left) * kinematics.inv_wheel_base
 
         self.odom_pub.publish(odom_msg)
+        if self.pose_writer is not None:
+            self.pose_writer.write(nanoseconds, self.x, self.y, self.theta,
+                                   twist.linear.x, twist.angular.z)
+        if self.trail is not None:
+            self.trail.add(nanoseconds, self.x, self.y, self.theta)
         
         # === TF TRANSFORM (odom → base_footprint) ===
-        transform = TransformStamped()
-        transform.header.stamp = current_time.to_msg()
-        transform.header.frame_id = 'odom'
-        transform.child_frame_id = 'base_footprint'
-        
+        transform = self.odom_transform
+        transform.header.stamp.sec = stamp_sec
+        transform.header.stamp.nanosec = stamp_nanosec
         transform.transform.translation.x = self.x
         transform.transform.translation.y = self.y
-        transform.transform.translation.z = 0.0
-        
-        transform.transform.rotation.z = math.sin(self.theta / 2.0)
-        transform.transform.rotation.w = math.cos(self.theta / 2.0)
+        transform.transform.rotation.z = quat_z
+        transform.transform.rotation.w = quat_w
         
         self.tf_broadcaster.sendTransform(transform)
+
+        if not self.first_odom_sent:
+            self.first_odom_sent = True
+            self.startup.milestone('first_odom')
+            self.get_logger().info(
+                f'Первая /odom через {self.startup.milestones["first_odom"]:.0f} мс от старта процесса')
         
-        # Логирование (раз в секунду, чтобы не спамить)
-        self.get_logger().debug(
-            f'Odom: x={self.x:.3f}м, y={self.y:.3f}м, theta={math.degrees(self.theta):.1f}°',
-            throttle_duration_sec=1.0
-        )
+        # Переход в покой - реже таймеры; на стоянке без логов энкодеров
+        rate = self.publish_rate
+        if rate is not None and rate.published_at(now):
+            self.apply_publish_rate()
+
+        # Логирование: строки форматируются только когда лог действительно пишется
+        if now >= self.next_log_time and (rate is None or not rate.idle):
+            self.next_log_time = now + 0.5
+            self.log_odometry(left_ticks, right_ticks, diff_left, diff_right)
+
+    def log_odometry(self, left_ticks, right_ticks, diff_left, diff_right):
+        """Отладочный лог одометрии и энкодеров (не чаще 2 раз в секунду)"""
+        logger = self.get_logger()
+        if logger.is_enabled_for(LoggingSeverity.DEBUG):
+            logger.debug(
+                f'Odom: x={self.x:.3f}м, y={self.y:.3f}м, theta={math.degrees(self.theta):.1f}°',
+                throttle_duration_sec=1.0
+            )
 
         # === DEBUG: Лог энкодеров (удалить после тестов) ===
-        self.get_logger().info(
+        meters_per_tick = self.kinematics.meters_per_tick
+        logger.info(
             f'DEBUG: left_ticks={left_ticks}, right_ticks={right_ticks}, '
             f'diff_l={diff_left}, diff_r={diff_right}, '
-            f'dist_l={dist_left:.4f}м, dist_r={dist_right:.4f}м',
-            throttle_duration_sec=0.5
+            f'dist_l={diff_left * meters_per_tick:.4f}м, dist_r={diff_right * meters_per_tick:.4f}м'
         )
 
     def publish_sensors(self):
-        """Публикация данных с ультразвуковых датчиков (10 Hz)"""
+        """Публикация готовых измерений датчиков (без ожидания эха)"""
         try:
-            left = self.get_distance(self.trig_left, self.echo_left)
-            time.sleep(0.05)  # Пауза между датчиками
-            right = self.get_distance(self.trig_right, self.echo_right)
-            time.sleep(0.05)
-            front = self.get_distance(self.trig_front, self.echo_front)
-            
-            self.publish_sensor('left', left)
-            self.publish_sensor('right', right)
-            self.publish_sensor('front', front)
+            sonar = self.sonar
+            if sonar is None:
+                return
+            now = self.get_clock().now()
+            now_mono = clock.monotonic()
+            for position, distance, echo_time in sonar.poll():
+                # Метка времени - момент прихода эха, а не публикации
+                age = Duration(nanoseconds=int((now_mono - echo_time) * 1e9))
+                self.publish_sensor(position, distance, now - age)
+                self.latency.record('echo_to_range', clock.monotonic() - echo_time)
         except Exception as e:
             self.get_logger().error(f'Ошибка датчиков: {e}')
 
-    def publish_sensor(self, position, distance):
-        """Публикация одного датчика в топик /sensors/distance"""
+    def publish_sensor(self, position, distance, stamp=None):
+        """Публикация одного датчика в топик sensors/distance"""
+        if stamp is None:
+            stamp = self.get_clock().now()
         msg = Range()
-        msg.header.stamp = self.get_clock().now().to_msg()
-        msg.header.frame_id = f'{position}_sensor'
+        msg.header.stamp = stamp.to_msg()
+        msg.header.frame_id = f'{self.frame_prefix}{position}_sensor'
         msg.radiation_type = Range.ULTRASOUND
         msg.field_of_view = 0.26  # ~15 градусов для HC-SR04
         msg.min_range = 0.02
@@ -389,6 +914,65 @@ class HardwareNode(Node):
         msg.range = distance if distance != float('inf') else 2.0
         self.dist_pub.publish(msg)
 
+    def publish_scan(self, angle_min, angle_increment, ranges, first_time, last_time):
+        """Сектор развёртки в scan (из потока опроса); угол 0 - ось front_sensor"""
+        now = self.get_clock().now()
+        age = Duration(nanoseconds=int((clock.monotonic() - first_time) * 1e9))
+        msg = LaserScan()
+        msg.header.stamp = (now - age).to_msg()  # Момент первого показания сектора
+        msg.header.frame_id = f'{self.frame_prefix}front_sensor'
+        msg.angle_min = angle_min
+        msg.angle_max = angle_min + angle_increment * (len(ranges) - 1)
+        msg.angle_increment = angle_increment  # Знак - направление прохода
+        if len(ranges) > 1:
+            msg.time_increment = (last_time - first_time) / (len(ranges) - 1)
+        msg.scan_time = self.sonar.sweep.pass_time
+        msg.range_min = 0.02
+        msg.range_max = 2.0
+        msg.ranges = ranges  # inf - нет эха в пределах range_max
+        self.scan_pub.publish(msg)
+
+    def publish_trail(self):
+        """
+        След в trail: сообщения создаются только для новых точек, точки,
+        ушедшие при прореживании, забываются. Без новых точек - не публикуется
+        """
+        trail = self.trail
+        if trail.seq == self.trail_published:
+            return
+        self.trail_published = trail.seq
+        cached = self.trail_poses
+        current = {}
+        poses = []
+        start_ns = trail.start_ns or 0
+        for seq, t, x, y, theta in trail.points():
+            pose = cached.get(seq)
+            if pose is None:
+                pose = self.set_trail_pose(PoseStamped(), start_ns + int(t * 1e9), x, y, theta)
+                pose.header.frame_id = self.trail_msg.header.frame_id
+            current[seq] = pose
+            poses.append(pose)
+        self.trail_poses = current
+
+        # Текущая поза (робот мог не отойти на шаг от последней точки)
+        now = self.get_clock().now().nanoseconds
+        poses.append(self.set_trail_pose(self.trail_head, now, self.x, self.y, self.theta))
+
+        msg = self.trail_msg
+        msg.header.stamp = self.trail_head.header.stamp
+        msg.poses = poses
+        self.trail_pub.publish(msg)
+
+    def set_trail_pose(self, pose, stamp_ns, x, y, theta):
+        """Заполнить PoseStamped точки следа"""
+        pose.header.stamp.sec = stamp_ns // 1000000000
+        pose.header.stamp.nanosec = stamp_ns % 1000000000
+        pose.pose.position.x = x
+        pose.pose.position.y = y
+        pose.pose.orientation.z = math.sin(theta / 2.0)
+        pose.pose.orientation.w = math.cos(theta / 2.0)
+        return pose
+
     def heartbeat_callback(self):
         """Heartbeat лог (раз в секунду)"""
         self.get_logger().info(
@@ -397,21 +981,42 @@ class HardwareNode(Node):
         )
 
     def stop_all(self):
-        """Остановка всех устройств и очистка GPIO"""
+        """Остановка всех устройств и освобождение своих пинов GPIO"""
         self.get_logger().info('Остановка робота...')
+
+        # Дождаться запуска железа, иначе устройство поднимется после остановки
+        if self.hardware_thread is not None:
+            self.hardware_thread.join(timeout=5.0)
         
-        # Остановка моторов
-        self.left_motor.run(Raspi_MotorHAT.RELEASE)
-        self.right_motor.run(Raspi_MotorHAT.RELEASE)
+        # Остановка моторов (поток вывода останавливается и отпускает моторы)
+        if self.wheel_controller is not None:
+            self.wheel_controller.stop()
+        if self.motor_output is not None:
+            self.motor_output.stop()
+        elif hasattr(self, 'left_motor'):
+            self.left_motor.run(Raspi_MotorHAT.RELEASE)
+            self.right_motor.run(Raspi_MotorHAT.RELEASE)
         
+        # Остановка опроса датчиков
+        if self.sonar is not None:
+            self.sonar.stop()
+
         # Остановка энкодеров
         if hasattr(self, 'left_encoder'):
             self.left_encoder.stop()
         if hasattr(self, 'right_encoder'):
             self.right_encoder.stop()
+        if self.gpio_sampler is not None:
+            self.gpio_sampler.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.pose_writer is not None:
+            self.pose_writer.close()
+            self.pose_writer = None
         
-        # Очистка GPIO
-        GPIO.cleanup()
+        # Освобождение только своих пинов
+        if self.gpio_pins:
+            GPIO.cleanup(self.gpio_pins)
         
         self.get_logger().info('Все устройства остановлены')
 
@@ -420,13 +1025,16 @@ def main(args=None):
     """Точка входа узла"""
     rclpy.init(args=args)
     node = HardwareNode()
+    executor = node.create_executor()
+    executor.add_node(node)
     
     try:
-        rclpy.spin(node)
+        executor.spin()
     except KeyboardInterrupt:
         node.get_logger().info('Получен сигнал остановки (Ctrl+C)')
     finally:
         node.stop_all()
+        executor.remove_node(node)
         node.destroy_node()
         rclpy.shutdown()
 
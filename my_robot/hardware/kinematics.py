@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Модель дифференциальной кинематики робота
+
+Все производные константы считаются один раз при создании. Объект не
+меняется: при смене параметров создаётся новый и подменяется одной
+операцией присваивания, поэтому читатели всегда видят согласованный набор.
+"""
+
+import math
+
+# Параметры узла, из которых строится модель
+KINEMATICS_PARAMETERS = ('wheel_base', 'wheel_diameter', 'ticks_per_rev')
+
+MIN_SPEED_PERCENT = 50  # Минимальная скорость разомкнутого управления (критично для 4.8V!)
+
+
+class KinematicsModel:
+    """Предрасчитанные константы кинематики"""
+
+    __slots__ = ('wheel_base', 'wheel_diameter', 'ticks_per_rev',
+                 'linear_scale', 'turn_scale', 'meters_per_tick',
+                 'mm_per_tick', 'half_base', 'inv_wheel_base')
+
+    def __init__(self, wheel_base, wheel_diameter, ticks_per_rev,
+                 linear_scale=1.5, turn_scale=2.0):
+        """
+        wheel_base: расстояние между колёсами (м)
+        wheel_diameter: диаметр колеса (м)
+        ticks_per_rev: тиков энкодера на оборот
+        linear_scale, turn_scale: усиление линейной скорости и поворота
+        """
+        if wheel_base <= 0 or wheel_diameter <= 0 or ticks_per_rev <= 0:
+            raise ValueError('wheel_base, wheel_diameter и ticks_per_rev должны быть > 0')
+        self.wheel_base = float(wheel_base)
+        self.wheel_diameter = float(wheel_diameter)
+        self.ticks_per_rev = int(ticks_per_rev)
+        self.linear_scale = linear_scale
+        self.turn_scale = turn_scale
+        self.meters_per_tick = (math.pi * self.wheel_diameter) / self.ticks_per_rev
+        self.mm_per_tick = self.meters_per_tick * 1000.0
+        self.half_base = self.wheel_base / 2.0
+        self.inv_wheel_base = 1.0 / self.wheel_base
+
+    @classmethod
+    def from_node(cls, node):
+        """Построить модель по параметрам узла"""
+        values = [node.get_parameter(name).value for name in KINEMATICS_PARAMETERS]
+        return cls(*values)
+
+    def replace(self, **changes):
+        """Новая модель с изменёнными параметрами"""
+        values = {name: getattr(self, name) for name in KINEMATICS_PARAMETERS}
+        values['linear_scale'] = self.linear_scale
+        values['turn_scale'] = self.turn_scale
+        values.update(changes)
+        return KinematicsModel(**values)
+
+    def wheel_command(self, linear, angular):
+        """Команда колёсам (left, right) по /cmd_vel с усилением"""
+        forward = linear * self.linear_scale
+        turn = angular * self.turn_scale * self.half_base
+        return forward - turn, forward + turn
+
+    def wheel_speeds(self, linear, angular):
+        """Линейные скорости колёс (left, right) в м/с по /cmd_vel, без усиления"""
+        turn = angular * self.half_base
+        return linear - turn, linear + turn
+
+    def ticks_to_motion(self, diff_left, diff_right):
+        """Путь центра (м) и поворот (рад) по приращениям тиков"""
+        dist_left = diff_left * self.meters_per_tick
+        dist_right = diff_right * self.meters_per_tick
+        return ((dist_left + dist_right) * 0.5,
+                (dist_right - dist_left) * self.inv_wheel_base)
+
+
+def open_loop_percent(kinematics, linear, angular):
+    """Скорости колёс в процентах по /cmd_vel (с усилением и порогом трогания)"""
+    # Дифференциальная кинематика с усилением (см. KinematicsModel)
+    left, right = kinematics.wheel_command(linear, angular)
+    left_percent = left * 100
+    right_percent = right * 100
+    min_speed = MIN_SPEED_PERCENT
+    if abs(left_percent) > 0 and abs(left_percent) < min_speed:
+        left_percent = min_speed if left_percent > 0 else -min_speed
+    if abs(right_percent) > 0 and abs(right_percent) < min_speed:
+        right_percent = min_speed if right_percent > 0 else -min_speed
+    return left_percent, right_percent
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Выходной каскад моторов Motor HAT
+
+- Помнит применённые режим и ШИМ каждого мотора и не повторяет записи
+- Команды сливаются по принципу "последняя побеждает": одиночная команда
+  пишется сразу, поток команд - не чаще max_rate
+- Изменённые каналы обоих моторов уходят одной блочной записью I2C
+  с автоинкрементом адреса PCA9685. Бит AI в MODE1 проверяется при
+  запуске и после каждого сброса или периодической перезаписи; если он
+  не устанавливается, каналы пишутся по одному через API Motor HAT
+- Ту же PCA9685 открывают и сервоприводы: инициализация PWM() обнуляет все
+  каналы. Запомненное состояние при этом уже не совпадает с микросхемой,
+  поэтому оно записывается заново - сразу, если микросхему открыли в этом
+  процессе (chip_reset), и раз в refresh_period, пока моторы крутятся
+  (другой процесс, например servo_controller)
+"""
+
+import threading
+import weakref
+
+from my_robot.histogram import FixedHistogram
+from my_robot.hardware.hal import Raspi_MotorHAT, clock
+
+# Регистры PCA9685
+MODE1 = 0x00
+MODE1_AI = 0x20
+LED0_ON_L = 0x06
+FULL = 0x1000  # Бит FULL ON / FULL OFF
+
+# Каналы PCA9685 моторов Motor HAT: номер -> (PWM, IN1, IN2)
+MOTOR_CHANNELS = {1: (8, 10, 9), 2: (13, 11, 12), 3: (2, 4, 3), 4: (7, 5, 6)}
+
+
+def convert_speed(speed_percent):
+    """Конвертация скорости из процентов в режим и ШИМ (0-255)"""
+    mode = Raspi_MotorHAT.RELEASE
+    if speed_percent > 0:
+        mode = Raspi_MotorHAT.FORWARD
+    elif speed_percent < 0:
+        mode = Raspi_MotorHAT.BACKWARD
+        speed_percent = -speed_percent
+    output_speed = int((speed_percent * 255) // 100)
+    output_speed = min(255, max(0, output_speed))
+    return mode, output_speed
+
+
+# Кто помнит записанное в PCA9685 (address, invalidate()): каскады моторов,
+# траектории и развёртка сервоприводов
+_chip_users = weakref.WeakSet()
+
+
+def watch_chip_reset(user):
+    """Вызывать user.invalidate() при сбросе микросхемы user.address"""
+    _chip_users.add(user)
+
+
+def unwatch_chip_reset(user):
+    _chip_users.discard(user)
+
+
+def chip_reset(address):
+    """PCA9685 по адресу address переинициализирована (PWM()) в этом процессе"""
+    for user in list(_chip_users):
+        if user.address == address:
+            user.invalidate()
+
+
+def _pin_words(level):
+    """(on, off) канала, используемого как цифровой выход"""
+    return (FULL, 0) if level else (0, FULL)
+
+
+class MotorOutputStage:
+    """Дедупликация и слияние команд моторов с блочной записью"""
+
+    def __init__(self, motor_hat, left=1, right=2, max_rate=50.0, refresh_period=1.0):
+        """
+        motor_hat: Raspi_MotorHAT
+        left, right: номера моторов колёс
+        max_rate: максимальная частота записи при потоке команд (Гц)
+        refresh_period: период повторной записи состояния, пока моторы
+        крутятся (с), 0 - не повторять
+        """
+        self._hat = motor_hat
+        self._motors = (left, right)
+        self.min_interval = 1.0 / max_rate
+        self.refresh_period = refresh_period
+        self.address = getattr(getattr(motor_hat, '_pwm', None), 'address', None)
+        self._stale = False  # Микросхема сброшена, состояние записать заново
+        self.lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+
+        # Применённое и ожидающее состояние: [(mode, speed), (mode, speed)]
+        self._applied = [None, None]
+        self._pending = None
+        self._pending_time = 0.0
+        self._pending_origin = None
+        # trace_callback(origin, write_time): команда с меткой origin записана
+        self.trace_callback = None
+        self.recorder = None  # EventRecorder для записи ШИМ (опционально)
+        self._last_write = -1.0
+
+        # Блочная запись возможна, если у драйвера есть доступ к I2C
+        # и в MODE1 включён автоинкремент (проверяется перед записью)
+        self._i2c = getattr(getattr(motor_hat, '_pwm', None), 'i2c', None)
+        self._auto_increment = False
+        if self._i2c is not None:
+            self._check_auto_increment()
+
+        # Метрики
+        self.i2c_writes = 0
+        self.commands = 0
+        self.skipped = 0       # Команда совпала с применённой
+        self.coalesced = 0     # Команда вытеснена более новой до записи
+        self.refreshes = 0     # Повторные записи состояния (сброс микросхемы, период)
+        self.latency_us = FixedHistogram()
+        self._window_writes = 0
+        self._window_start = clock.monotonic()
+
+    def start(self):
+        """Запустить поток записи"""
+        self._running = True
+        watch_chip_reset(self)
+        self._thread = threading.Thread(target=self._output_loop, name='motor_output')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Остановить поток и отпустить моторы"""
+        self._running = False
+        unwatch_chip_reset(self)
+        self._wake.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        self.apply((Raspi_MotorHAT.RELEASE, 0), (Raspi_MotorHAT.RELEASE, 0))
+
+    def submit(self, left, right, origin=None):
+        """
+        Новая команда ((mode, speed) для каждого колеса), последняя побеждает
+        origin: момент события-причины (clock.monotonic) для трассировки задержки
+        """
+        now = clock.monotonic()
+        with self.lock:
+            self.commands += 1
+            if self._pending is not None:
+                self.coalesced += 1
+            elif self._applied[0] == left and self._applied[1] == right:
+                self.skipped += 1
+                return
+            else:
+                self._pending_time = now
+            self._pending = (left, right)
+            self._pending_origin = origin
+        self._wake.set()
+
+    def release(self):
+        """Отпустить оба мотора (через ту же очередь)"""
+        self.submit((Raspi_MotorHAT.RELEASE, 0), (Raspi_MotorHAT.RELEASE, 0))
+
+    def apply(self, left, right):
+        """Немедленно записать команду (вызывающий поток)"""
+        with self.lock:
+            self._write([left, right])
+
+    def invalidate(self):
+        """Микросхема сброшена: записать применённое состояние заново (в потоке записи)"""
+        self._auto_increment = False  # PWM() сбрасывает и MODE1
+        self._stale = True
+        self._wake.set()
+
+    def stats(self):
+        """Метрики выходного каскада"""
+        now = clock.monotonic()
+        window = max(now - self._window_start, 1e-9)
+        result = {
+            'i2c_writes': self.i2c_writes,
+            'i2c_writes_per_sec': round(self._window_writes / window, 2),
+            'commands': self.commands,
+            'skipped': self.skipped,
+            'coalesced': self.coalesced,
+            'refreshes': self.refreshes,
+            'cmd_to_wheel_p50_us': self.latency_us.percentile(0.5),
+            'cmd_to_wheel_p99_us': self.latency_us.percentile(0.99),
+            'cmd_to_wheel_max_us': self.latency_us.max,
+        }
+        self._window_writes = 0
+        self._window_start = now
+        self.latency_us.reset()
+        return result
+
+    def _moving(self):
+        release = Raspi_MotorHAT.RELEASE
+        return any(applied is not None and applied[0] != release for applied in self._applied)
+
+    def _output_loop(self):
+        while self._running:
+            timeout = self.refresh_period if self.refresh_period > 0 and self._moving() else None
+            if not self._wake.wait(timeout) and self._running:
+                self._stale = True  # Моторы крутятся, записей не было refresh_period
+            self._wake.clear()
+            if not self._running:
+                break
+            if self._stale:
+                self._refresh()
+            # Не чаще min_interval: пока ждём, команда может обновиться
+            delay = self._last_write + self.min_interval - clock.monotonic()
+            if delay > 0:
+                clock.sleep(delay)
+            with self.lock:
+                if self._pending is None:
+                    continue
+                command, submitted = self._pending, self._pending_time
+                origin = self._pending_origin
+                self._pending = None
+                self._write(list(command))
+            self._last_write = clock.monotonic()
+            self.latency_us.record((self._last_write - submitted) * 1e6)
+            if origin is not None and self.trace_callback is not None:
+                self.trace_callback(origin, self._last_write)
+
+    def _refresh(self):
+        """Записать применённое состояние целиком (после сброса микросхемы)"""
+        with self.lock:
+            self._stale = False
+            applied = self._applied
+            if applied[0] is None and applied[1] is None:
+                return
+            # Инициализация PWM() другим процессом сбрасывает и автоинкремент
+            self._auto_increment = False
+            self._applied = [None, None]
+            self._write(applied)
+            self.refreshes += 1
+        self._last_write = clock.monotonic()
+
+    def _write(self, command):
+        """Записать только изменившиеся моторы (под self.lock)"""
+        changed = [i for i in (0, 1) if command[i] != self._applied[i]]
+        if not changed:
+            return
+        if self._i2c is not None and (self._auto_increment or self._check_auto_increment()):
+            self._write_burst(command, changed)
+        else:
+            self._write_motors(command, changed)
+        for i in changed:
+            self._applied[i] = command[i]
+        if self.recorder is not None:
+            now = clock.monotonic()
+            for i in changed:
+                self.recorder.pwm(now, i, command[i][0], command[i][1])
+
+    def _check_auto_increment(self):
+        """Включить и проверить бит AI в MODE1 (без него блок ляжет в один регистр)"""
+        mode1 = self._i2c.readU8(MODE1)
+        if mode1 >= 0 and not mode1 & MODE1_AI:
+            self._i2c.write8(MODE1, mode1 | MODE1_AI)
+            mode1 = self._i2c.readU8(MODE1)
+        # Драйвер Raspi_I2C при ошибке шины возвращает -1
+        self._auto_increment = mode1 >= 0 and bool(mode1 & MODE1_AI)
+        return self._auto_increment
+
+    def _write_burst(self, command, changed):
+        """Изменённые каналы одной записью с автоинкрементом"""
+        words = {}
+        for i in changed:
+            mode, speed = command[i]
+            applied = self._applied[i]
+            pwm_ch, in1, in2 = MOTOR_CHANNELS[self._motors[i]]
+            if applied is None or applied[1] != speed:
+                words[pwm_ch] = (0, speed * 16)
+            if applied is None or applied[0] != mode:
+                level1 = mode in (Raspi_MotorHAT.FORWARD, Raspi_MotorHAT.BRAKE)
+                level2 = mode in (Raspi_MotorHAT.BACKWARD, Raspi_MotorHAT.BRAKE)
+                words[in1] = _pin_words(level1)
+                words[in2] = _pin_words(level2)
+
+        # Непрерывный диапазон каналов; неизменённые внутри него - текущими значениями
+        first, last = min(words), max(words)
+        current = self._current_words()
+        data = []
+        for channel in range(first, last + 1):
+            on, off = words.get(channel, current.get(channel, (0, FULL)))
+            data += [on & 0xFF, on >> 8, off & 0xFF, off >> 8]
+        self._i2c.writeList(LED0_ON_L + 4 * first, data)
+        self.i2c_writes += 1
+        self._window_writes += 1
+
+    def _current_words(self):
+        """Значения каналов по применённому состоянию"""
+        words = {}
+        for i, applied in enumerate(self._applied):
+            if applied is None:
+                continue
+            mode, speed = applied
+            pwm_ch, in1, in2 = MOTOR_CHANNELS[self._motors[i]]
+            words[pwm_ch] = (0, speed * 16)
+            words[in1] = _pin_words(mode in (Raspi_MotorHAT.FORWARD, Raspi_MotorHAT.BRAKE))
+            words[in2] = _pin_words(mode in (Raspi_MotorHAT.BACKWARD, Raspi_MotorHAT.BRAKE))
+        return words
+
+    def _write_motors(self, command, changed):
+        """Запасной путь через API Motor HAT (4 записи I2C на setPWM)"""
+        for i in changed:
+            mode, speed = command[i]
+            applied = self._applied[i]
+            motor = self._hat.getMotor(self._motors[i])
+            if applied is None or applied[1] != speed:
+                motor.setSpeed(speed)
+                self.i2c_writes += 4
+                self._window_writes += 4
+            if applied is None or applied[0] != mode:
+                motor.run(mode)
+                self.i2c_writes += 8
+                self._window_writes += 8
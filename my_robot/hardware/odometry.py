@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Интегрирование позы по каждому тику энкодера
+
+Поза обновляется прямо в потоке опроса энкодеров на каждом фронте
+(точная дуга или средняя точка), поэтому точность не зависит от частоты
+публикации /odom. Узел лишь берёт согласованный снимок позы.
+
+Тики колёс приходят по очереди. Чтобы шаг от тика одного колеса не
+превращался в поворот вокруг второго, путь второго колеса на момент тика
+экстраполируется по его последнему периоду (не дальше одного тика);
+расхождение снимается, когда приходит его собственный тик.
+"""
+
+import math
+import threading
+
+ARC = 'arc'
+MIDPOINT = 'midpoint'
+EULER = 'euler'  # Прежняя схема: сначала поворот, затем шаг по новому курсу
+INTEGRATION_METHODS = (ARC, MIDPOINT, EULER)
+
+
+def integrate_step(x, y, theta, dist_center, delta_theta, method=ARC):
+    """Один шаг дифференциальной кинематики, возвращает (x, y, theta)"""
+    if method == ARC and abs(delta_theta) > 1e-9:
+        radius = dist_center / delta_theta
+        new_theta = theta + delta_theta
+        x += radius * (math.sin(new_theta) - math.sin(theta))
+        y -= radius * (math.cos(new_theta) - math.cos(theta))
+        return x, y, new_theta
+    if method == EULER:
+        theta += delta_theta
+        return (x + dist_center * math.cos(theta),
+                y + dist_center * math.sin(theta), theta)
+    # Средняя точка (и предел дуги при delta_theta -> 0)
+    heading = theta + delta_theta * 0.5
+    return (x + dist_center * math.cos(heading),
+            y + dist_center * math.sin(heading), theta + delta_theta)
+
+
+class OdometryIntegrator:
+    """Поза робота, обновляемая колбэками энкодеров"""
+
+    def __init__(self, kinematics, method=ARC):
+        """
+        kinematics: KinematicsModel (подменяется целиком при смене параметров)
+        method: ARC, MIDPOINT или EULER
+        """
+        if method not in INTEGRATION_METHODS:
+            raise ValueError(f'Неизвестный метод интегрирования: {method}')
+        self.kinematics = kinematics
+        self.method = method
+        self.x = 0.0
+        self.y = 0.0
+        self.theta = 0.0
+        self.ticks = 0
+        self.stale_after = 0.5  # Без тиков дольше (с) колесо считается стоящим
+        # Путь колёс: по тикам, уже учтённый в позе, время и период тиков
+        self._tick_dist = [0.0, 0.0]
+        self._integrated = [0.0, 0.0]
+        self._last_time = [None, None]
+        self._period = [None, None]
+        self._direction = [1, 1]
+        self.lock = threading.Lock()
+        self._left = None
+        self._right = None
+        self.on_tick = None  # on_tick(timestamp) после каждого тика (поток энкодеров)
+
+    def attach(self, left_encoder, right_encoder):
+        """Подписаться на тики энкодеров (через их callback)"""
+        self._left = left_encoder
+        self._right = right_encoder
+        left_encoder.callback = self._left_tick
+        right_encoder.callback = self._right_tick
+
+    def _left_tick(self):
+        ticks = self._left.ticks
+        self.add_tick(0, ticks.timestamp(ticks.count - 1), self._left.direction)
+
+    def _right_tick(self):
+        ticks = self._right.ticks
+        self.add_tick(1, ticks.timestamp(ticks.count - 1), self._right.direction)
+
+    def add_tick(self, side, timestamp, direction):
+        """Тик колеса side (0 - левое, 1 - правое) в момент timestamp"""
+        kinematics = self.kinematics
+        step = kinematics.meters_per_tick
+        other = 1 - side
+        with self.lock:
+            last = self._last_time[side]
+            if last is not None and timestamp - last < self.stale_after:
+                self._period[side] = timestamp - last
+            else:
+                self._period[side] = None
+            self._last_time[side] = timestamp
+            self._direction[side] = direction
+            self._tick_dist[side] += direction * step
+
+            # Где сейчас второе колесо (по его последнему периоду)
+            target = [0.0, 0.0]
+            target[side] = self._tick_dist[side]
+            target[other] = self._tick_dist[other]
+            period = self._period[other]
+            if period is not None:
+                elapsed = timestamp - self._last_time[other]
+                if elapsed < 2.0 * period:
+                    fraction = elapsed / period
+                    target[other] += self._direction[other] * step * (fraction if fraction < 1.0 else 1.0)
+
+            dist_left = target[0] - self._integrated[0]
+            dist_right = target[1] - self._integrated[1]
+            self._integrated[0] = target[0]
+            self._integrated[1] = target[1]
+            self.x, self.y, self.theta = integrate_step(
+                self.x, self.y, self.theta,
+                (dist_left + dist_right) * 0.5,
+                (dist_right - dist_left) * kinematics.inv_wheel_base,
+                self.method)
+            self.ticks += 1
+        if self.on_tick is not None:
+            self.on_tick(timestamp)
+
+    def add_ticks(self, left, right):
+        """Учесть приращение тиков колёс без меток времени (без экстраполяции)"""
+        kinematics = self.kinematics
+        dist_center, delta_theta = kinematics.ticks_to_motion(left, right)
+        with self.lock:
+            self.x, self.y, self.theta = integrate_step(
+                self.x, self.y, self.theta, dist_center, delta_theta, self.method)
+            self.ticks += 1
+
+    def pose(self):
+        """Согласованный снимок (x, y, theta)"""
+        with self.lock:
+            return self.x, self.y, self.theta
+
+    def reset(self, x=0.0, y=0.0, theta=0.0):
+        with self.lock:
+            self.x, self.y, self.theta = x, y, theta
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+След робота: история позы фиксированного размера
+
+Точки (время, x, y, theta) хранятся в float32 в кольцевых буферах array,
+выделенных один раз, - 16 байт на точку плюс 4 байта номера. Память не
+растёт при любой длительности работы (только при прореживании последнего
+уровня - временная копия его буфера).
+
+Прореживание при вставке: точка принимается, если робот сместился на
+min_distance или повернулся на min_angle от последней принятой. История
+многоуровневая: уровень 0 - свежая история с мелким шагом; точка,
+вытесненная из заполненного уровня, переходит на следующий с шагом в
+factor раз крупнее (или отбрасывается прореживанием). Последний уровень
+при заполнении прореживается вдвое на месте (каждая вторая точка, шаг
+удваивается), так что след покрывает весь прогон - чем старше участок,
+тем грубее. Время хранится от первой точки: разрешение float32 - 1 мс
+на часе работы, 60 мс на 10 сутках.
+
+Без блокировок: add() и points() вызываются из одной группы колбэков
+(не одновременно).
+"""
+
+from array import array
+import math
+
+_FIELDS = 4  # t, x, y, theta
+
+
+class _Level:
+    """Кольцевой буфер одного уровня с порогами прореживания"""
+
+    def __init__(self, capacity, min_distance, min_angle):
+        self.capacity = capacity
+        self.min_distance = min_distance
+        self.min_angle = min_angle
+        self.data = array('f', bytes(4 * _FIELDS * capacity))
+        self.seqs = array('I', bytes(array('I').itemsize * capacity))
+        self.head = 0   # Ячейка самой старой точки
+        self.size = 0
+        self.last = None  # (x, y, theta) последней принятой точки
+
+    def accepts(self, x, y, theta):
+        """Точка достаточно далеко от последней принятой"""
+        last = self.last
+        if last is None:
+            return True
+        turn = abs(math.remainder(theta - last[2], math.tau))
+        return (turn >= self.min_angle
+                or math.hypot(x - last[0], y - last[1]) >= self.min_distance)
+
+    def append(self, seq, t, x, y, theta):
+        """Добавить в конец (буфер не заполнен)"""
+        slot = (self.head + self.size) % self.capacity
+        base = slot * _FIELDS
+        data = self.data
+        data[base] = t
+        data[base + 1] = x
+        data[base + 2] = y
+        data[base + 3] = theta
+        self.seqs[slot] = seq
+        self.size += 1
+        self.last = (x, y, theta)
+
+    def pop_oldest(self):
+        """Самая старая точка (seq, t, x, y, theta)"""
+        slot = self.head
+        base = slot * _FIELDS
+        point = (self.seqs[slot],) + tuple(self.data[base:base + _FIELDS])
+        self.head = (slot + 1) % self.capacity
+        self.size -= 1
+        return point
+
+    def compact(self):
+        """Оставить каждую вторую точку, шаг вдвое крупнее"""
+        data = self.data
+        seqs = self.seqs
+        if self.head:
+            # Поворот буфера: самая старая точка в ячейке 0
+            cut = self.head * _FIELDS
+            data[:] = data[cut:] + data[:cut]
+            seqs[:] = seqs[self.head:] + seqs[:self.head]
+        keep = range(0, self.size, 2)  # Через одну, начало прогона сохраняется
+        for i, slot in enumerate(keep):
+            # slot >= i - источник ещё не затёрт
+            data[i * _FIELDS:(i + 1) * _FIELDS] = data[slot * _FIELDS:(slot + 1) * _FIELDS]
+            seqs[i] = seqs[slot]
+        self.head = 0
+        self.size = len(keep)
+        base = (self.size - 1) * _FIELDS
+        self.last = tuple(data[base + 1:base + _FIELDS])
+        self.min_distance *= 2.0
+        self.min_angle *= 2.0
+
+    def points(self):
+        """Точки уровня от старых к новым"""
+        data = self.data
+        seqs = self.seqs
+        result = []
+        for i in range(self.size):
+            slot = (self.head + i) % self.capacity
+            base = slot * _FIELDS
+            result.append((seqs[slot], data[base], data[base + 1], data[base + 2], data[base + 3]))
+        return result
+
+
+class PoseTrail:
+    """Прореженная многоуровневая история позы"""
+
+    def __init__(self, capacity=1024, levels=3, min_distance=0.05,
+                 min_angle=0.26, factor=4.0):
+        """
+        capacity: точек на уровень
+        levels: число уровней (>= 1)
+        min_distance, min_angle: шаг уровня 0 (м, рад)
+        factor: во сколько раз шаг каждого следующего уровня крупнее
+        """
+        if capacity < 2 or levels < 1:
+            raise ValueError('capacity >= 2, levels >= 1')
+        self.levels = [_Level(capacity, min_distance * factor ** i, min_angle * factor ** i)
+                       for i in range(levels)]
+        self.start_ns = None  # Время ROS первой точки
+        self.seq = 0          # Номер последней принятой точки (растёт)
+        self.offered = 0      # Все предложенные позы
+        self.dropped = 0      # Точки, отброшенные прореживанием старших уровней
+        self.compactions = 0
+
+    def add(self, stamp_ns, x, y, theta):
+        """Предложить позу (время ROS в нс); True - точка принята"""
+        self.offered += 1
+        level = self.levels[0]
+        if not level.accepts(x, y, theta):
+            return False
+        if self.start_ns is None:
+            self.start_ns = stamp_ns
+        self.seq += 1
+        self._insert(0, (self.seq, (stamp_ns - self.start_ns) * 1e-9, x, y, theta))
+        return True
+
+    def _insert(self, index, point):
+        level = self.levels[index]
+        if level.size == level.capacity:
+            if index + 1 < len(self.levels):
+                oldest = level.pop_oldest()
+                following = self.levels[index + 1]
+                if following.accepts(*oldest[2:]):
+                    self._insert(index + 1, oldest)
+                else:
+                    self.dropped += 1
+            else:
+                level.compact()
+                self.compactions += 1
+        level.append(*point)
+
+    def __len__(self):
+        return sum(level.size for level in self.levels)
+
+    @property
+    def nbytes(self):
+        """Память буферов (байт), постоянна"""
+        return sum(level.data.itemsize * len(level.data)
+                   + level.seqs.itemsize * len(level.seqs) for level in self.levels)
+
+    def points(self):
+        """Весь след (seq, t, x, y, theta) от старых к новым; t - с от start_ns"""
+        result = []
+        for level in reversed(self.levels):
+            result.extend(level.points())
+        return result
+
+    def stats(self):
+        """Заполнение и шаг уровней (для /diagnostics)"""
+        result = {
+            'points': len(self),
+            'offered': self.offered,
+            'accepted': self.seq,
+            'dropped': self.dropped,
+            'compactions': self.compactions,
+            'bytes': self.nbytes,
+        }
+        for i, level in enumerate(self.levels):
+            result[f'level{i}'] = f'{level.size}/{level.capacity} шаг {level.min_distance:.2f} м'
+        return result
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Частота публикации /odom и TF по движению робота
+
+В движении - полная частота. Стоящий робот (нет тиков энкодеров дольше
+idle_after и нет ненулевой команды) публикует редко, только чтобы
+подписчики видели, что узел жив. Первый тик или команда выводят из покоя
+сразу: activity() вызывает wake (из любого потока), узел переключает
+таймеры и публикует позу, не дожидаясь периода.
+
+Переход в покой (поток таймера) и activity() (поток энкодеров) без
+блокировки: каждая сторона сначала пишет своё поле, затем читает чужое,
+так что тик во время перехода не теряется.
+"""
+
+from my_robot.hardware.hal import clock
+
+
+class AdaptivePublishRate:
+    """Полная частота в движении, редкая на стоянке"""
+
+    def __init__(self, full_rate, idle_rate, idle_after=2.0):
+        """
+        full_rate, idle_rate: частоты публикации в движении и на стоянке (Гц)
+        idle_after: без тиков и команд дольше (с) - стоянка
+        """
+        self.full_period = 1.0 / full_rate
+        self.idle_period = 1.0 / idle_rate
+        self.idle_after = idle_after
+        self.idle = False
+        self.commanded = False   # Последняя команда ненулевая
+        self.wake = None         # Выход из покоя (вызывается из потока события)
+        self._last_activity = clock.monotonic()
+        self._last_publish = None
+
+        # Метрики
+        self.published = 0
+        self.saved = 0           # Публикаций меньше, чем на полной частоте
+        self.wakeups = 0
+        self.idle_time = 0.0     # Суммарное время на стоянке (с)
+        self._idle_since = None
+
+    @property
+    def period(self):
+        """Текущий период публикации (с)"""
+        return self.idle_period if self.idle else self.full_period
+
+    def activity(self, now=None):
+        """Тик энкодера или команда; True - робот выведен из покоя"""
+        self._last_activity = clock.monotonic() if now is None else now
+        if not self.idle:
+            return False
+        self.idle = False
+        self.wakeups += 1
+        if self._idle_since is not None:
+            self.idle_time += self._last_activity - self._idle_since
+            self._idle_since = None
+        if self.wake is not None:
+            self.wake()
+        return True
+
+    def command(self, moving, now=None):
+        """Новая команда скорости (moving - ненулевая)"""
+        self.commanded = moving
+        if moving:
+            self.activity(now)
+
+    def published_at(self, now):
+        """Публикация выполнена; True - робот только что перешёл в покой"""
+        last = self._last_publish
+        if last is not None:
+            missed = round((now - last) / self.full_period) - 1
+            if missed > 0:
+                self.saved += missed
+        self._last_publish = now
+        self.published += 1
+
+        if self.idle or self.commanded:
+            return False
+        activity = self._last_activity
+        if now - activity < self.idle_after:
+            return False
+        self.idle = True
+        if self._last_activity != activity:
+            self.idle = False  # Тик пришёл во время перехода
+            return False
+        self._idle_since = now
+        return True
+
+    def stats(self):
+        """Текущая частота и сэкономленные публикации (для /diagnostics)"""
+        idle_time = self.idle_time
+        if self._idle_since is not None:
+            idle_time += clock.monotonic() - self._idle_since
+        return {
+            'rate_hz': round(1.0 / self.period, 2),
+            'idle': self.idle,
+            'published': self.published,
+            'saved': self.saved,
+            'wakeups': self.wakeups,
+            'idle_time_s': round(idle_time, 1),
+        }
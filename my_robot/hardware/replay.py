@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Воспроизведение записи сырых событий (EventRecorder)
+
+Фронты энкодеров прогоняются через OdometryIntegrator, команды /cmd_vel -
+через тот же код разомкнутого управления, что и в HardwareNode
+(open_loop_percent, convert_speed), и сравниваются с записанным ШИМ.
+По умолчанию без пауз (быстрее реального времени), --speed N - в N раз
+быстрее записи. Параметры кинематики и метод интегрирования можно
+подменить, чтобы проверить гипотезу о причине ухода одометрии:
+
+    ros2 run my_robot replay_events /var/log/my_robot/events --ticks-per-rev 40
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+
+os.environ.setdefault('MY_ROBOT_BACKEND', 'sim')  # Железо для воспроизведения не нужно
+
+from my_robot.hardware.event_recorder import (  # noqa: E402
+    CMD_VEL, ECHO, EDGE, KIND_NAMES, PWM, read_files)
+from my_robot.hardware.hal import Raspi_MotorHAT  # noqa: E402
+from my_robot.hardware.kinematics import KinematicsModel, open_loop_percent  # noqa: E402
+from my_robot.hardware.motor_output import convert_speed  # noqa: E402
+from my_robot.hardware.odometry import INTEGRATION_METHODS, OdometryIntegrator  # noqa: E402
+
+
+def replay(records, kinematics, method, pins, speed=0.0, writer=None):
+    """Прогнать записи, вернуть сводку"""
+    odometry = OdometryIntegrator(kinematics, method)
+    sides = {pins[0]: 0, pins[1]: 1}
+    counts = {name: 0 for name in KIND_NAMES.values()}
+    expected = [None, None]
+    pwm_checked = pwm_mismatches = pwm_releases = 0
+    first = last = None
+    started = time.perf_counter()
+
+    for t, kind, channel, a, x, y, b in records:
+        if first is None:
+            first = t
+        last = t
+        if speed > 0.0:
+            delay = (t - first) / speed - (time.perf_counter() - started)
+            if delay > 0.0:
+                time.sleep(delay)
+        name = KIND_NAMES.get(kind)
+        if name is None:
+            continue  # Неизвестный тип (запись новой версии)
+        counts[name] += 1
+
+        if kind == EDGE:
+            side = sides.get(channel)
+            if side is not None:
+                odometry.add_tick(side, t, a)
+                if writer is not None:
+                    writer.writerow((f'{t:.6f}', *(f'{v:.5f}' for v in odometry.pose())))
+        elif kind == CMD_VEL:
+            left, right = open_loop_percent(kinematics, x, y)
+            expected = [convert_speed(left), convert_speed(right)]
+        elif kind == PWM:
+            if a == Raspi_MotorHAT.RELEASE and b == 0:
+                pwm_releases += 1  # Watchdog или остановка узла, не /cmd_vel
+            elif expected[channel] is not None:
+                pwm_checked += 1
+                if expected[channel] != (a, b):
+                    pwm_mismatches += 1
+        elif kind == ECHO:
+            pass  # Пока только подсчёт
+
+    elapsed = time.perf_counter() - started
+    x, y, theta = odometry.pose()
+    duration = (last - first) if first is not None else 0.0
+    return {
+        'events': counts,
+        'recorded_seconds': round(duration, 3),
+        'replay_seconds': round(elapsed, 3),
+        'speedup': round(duration / elapsed, 1) if elapsed > 0 else None,
+        'pose': {'x': round(x, 4), 'y': round(y, 4), 'theta': round(theta, 4)},
+        'pwm_checked': pwm_checked,
+        'pwm_mismatches': pwm_mismatches,  # Ненулевое в режиме ПИД - ожидаемо
+        'pwm_releases': pwm_releases,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='+', help='файлы записи или каталог')
+    parser.add_argument('--wheel-base', type=float, default=0.12)
+    parser.add_argument('--wheel-diameter', type=float, default=0.065)
+    parser.add_argument('--ticks-per-rev', type=int, default=20)
+    parser.add_argument('--method', choices=INTEGRATION_METHODS, default='arc')
+    parser.add_argument('--left-pin', type=int, default=12)
+    parser.add_argument('--right-pin', type=int, default=26)
+    parser.add_argument('--speed', type=float, default=0.0, help='0 - без пауз')
+    parser.add_argument('--csv', help='поза после каждого фронта (t, x, y, theta)')
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.paths:
+        paths += glob.glob(os.path.join(path, '*.bin')) if os.path.isdir(path) else [path]
+    kinematics = KinematicsModel(args.wheel_base, args.wheel_diameter, args.ticks_per_rev)
+    pins = (args.left_pin, args.right_pin)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            summary = replay(read_files(paths), kinematics, args.method, pins,
+                             args.speed, csv.writer(f))
+    else:
+        summary = replay(read_files(paths), kinematics, args.method, pins, args.speed)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Servo Controller Node для ROS2 робота
+Сервоприводы (пан/тилт и др.) на PCA9685 Motor HAT
+
+Функции:
+- Цели trajectory_msgs/JointTrajectory в /servo_controller/joint_trajectory
+  (положения в радианах, 0 - среднее положение)
+- Интерполяция в фоновом потоке (servo_rate, 50 Hz), колбэки не блокируются
+- В I2C пишутся только изменившиеся каналы, блочной записью
+- Текущие положения в /servo_controller/joint_states
+- Суставы - сервоприводы joint_servos; занятый другим узлом процесса
+  (пан развёртки hardware_node в составном режиме) - отказ запуска
+"""
+
+import math
+
+import rclpy
+from rclpy.node import Node
+from rclpy.time import Time
+from sensor_msgs.msg import JointState
+from trajectory_msgs.msg import JointTrajectory
+
+from my_robot.diagnostics import CallbackDiagnostics
+from my_robot.hardware.hal import clock
+from my_robot.hardware.servo_trajectory import ServoTrajectoryEngine
+from my_robot.hardware.servos import Servos, claim_servos
+from my_robot.profiler_service import ProfilerService
+
+
+class ServoControllerNode(Node):
+    def __init__(self):
+        super().__init__('servo_controller')
+
+        self.declare_parameter('servo_addr', 0x6F)
+        self.declare_parameter('deflect_90_in_ms', 0.8)     # Калибровка: импульс поворота на 90° (мс)
+        self.declare_parameter('servo_rate', 50.0)          # Частота интерполяции и записи (Гц)
+        self.declare_parameter('joint_names', ['pan', 'tilt', 'servo_2', 'servo_3'])
+        self.declare_parameter('joint_servos', [0, 1, 2, 3])  # Индексы сервоприводов суставов (Servos.channels)
+        self.declare_parameter('state_rate', 10.0)          # Частота /joint_states (Гц)
+        self.declare_parameter('diagnostics_period', 2.0)   # Период /diagnostics (с), 0 - выкл
+
+        self.joint_names = list(self.get_parameter('joint_names').value)
+        self.joint_servos = list(self.get_parameter('joint_servos').value)
+        if len(self.joint_servos) != len(self.joint_names):
+            raise ValueError('joint_servos и joint_names разной длины')
+        self.joint_index = dict(zip(self.joint_names, self.joint_servos))
+
+        # Сервопривод пана развёртки hardware_node (составной режим) - отказ запуска
+        servo_addr = self.get_parameter('servo_addr').value
+        claim_servos(servo_addr, self.joint_servos, 'servo_controller')
+        self.servos = Servos(servo_addr, self.get_parameter('deflect_90_in_ms').value)
+        self.engine = ServoTrajectoryEngine(
+            self.servos, len(self.servos.channels), self.get_parameter('servo_rate').value)
+        for servo in self.joint_servos:
+            self.engine.hold(servo, 0.0)
+        self.engine.start()
+
+        self.diagnostics = CallbackDiagnostics(
+            self, self.get_parameter('diagnostics_period').value)
+        self.diagnostics.add_source('servo_trajectory', self.engine.stats)
+
+        self.create_subscription(
+            JointTrajectory, '~/joint_trajectory',
+            self.diagnostics.instrument('trajectory_callback', self.trajectory_callback), 10)
+
+        self.state_msg = JointState()
+        self.state_msg.name = self.joint_names
+        self.state_pub = self.create_publisher(JointState, '~/joint_states', 10)
+        state_period = 1.0 / self.get_parameter('state_rate').value
+        self.create_timer(state_period, self.publish_state)
+        self.profiler_service = ProfilerService(self)  # ~/profile
+
+        self.get_logger().info(f'Servo Controller запущен: {", ".join(self.joint_names)}')
+
+    def trajectory_callback(self, msg):
+        """Новая цель: траектории перечисленных суставов заменяются"""
+        joints = []
+        for name in msg.joint_names:
+            if name not in self.joint_index:
+                self.get_logger().warn(f'Неизвестный сервопривод: {name}, цель отклонена')
+                return
+            joints.append(self.joint_index[name])
+
+        points = []
+        for point in msg.points:
+            if len(point.positions) != len(joints):
+                self.get_logger().warn('Число положений не совпадает с joint_names, цель отклонена')
+                return
+            time_from_start = point.time_from_start.sec + point.time_from_start.nanosec * 1e-9
+            angles = [math.degrees(p) for p in point.positions]
+            velocities = None
+            if len(point.velocities) == len(joints):
+                velocities = [math.degrees(v) for v in point.velocities]
+            points.append((time_from_start, angles, velocities))
+
+        # header.stamp = 0 - начать сразу, иначе в указанный момент
+        start = None
+        stamp = Time.from_msg(msg.header.stamp)
+        if stamp.nanoseconds > 0:
+            delay = (stamp - self.get_clock().now()).nanoseconds * 1e-9
+            start = clock.monotonic() + max(delay, 0.0)
+        self.engine.set_trajectory(joints, points, start)
+
+    def publish_state(self):
+        """Текущие (интерполированные) положения"""
+        self.state_msg.header.stamp = self.get_clock().now().to_msg()
+        positions = self.engine.positions
+        self.state_msg.position = [math.radians(positions[servo]) for servo in self.joint_servos]
+        self.state_pub.publish(self.state_msg)
+
+    def stop_all(self):
+        """Остановка потока и снятие импульсов с сервоприводов"""
+        self.engine.stop()
+        self.servos.stop_all()
+
+
+def main(args=None):
+    """Точка входа узла"""
+    rclpy.init(args=args)
+    node = ServoControllerNode()
+
+    try:
+        rclpy.spin(node)
+    except KeyboardInterrupt:
+        node.get_logger().info('Получен сигнал остановки (Ctrl+C)')
+    finally:
+        node.stop_all()
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
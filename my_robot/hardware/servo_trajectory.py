@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Потоковое исполнение траекторий сервоприводов
+
+Траектория каждого сервопривода - список точек (время, угол, скорость).
+Фоновый поток с фиксированным периодом интерполирует положение
+(кубически, если заданы скорости, иначе линейно), переводит его в такты
+ШИМ и пишет только каналы, у которых такт изменился. Изменённые каналы
+уходят блочной записью Servos.write_steps(), поэтому плавное движение
+стоит ограниченной и предсказуемой полосы I2C, а в покое - нисколько.
+"""
+
+import threading
+
+from my_robot.histogram import FixedHistogram
+from my_robot.hardware.hal import clock
+from my_robot.hardware.motor_output import unwatch_chip_reset, watch_chip_reset
+
+
+def _interpolate(p0, p1, now):
+    """Положение между точками p0 и p1 = (t, angle, velocity)"""
+    t0, a0, v0 = p0
+    t1, a1, v1 = p1
+    span = t1 - t0
+    if span <= 0.0:
+        return a1
+    s = (now - t0) / span
+    if v0 is None or v1 is None:
+        return a0 + (a1 - a0) * s
+    # Кубический эрмитов сплайн
+    s2 = s * s
+    s3 = s2 * s
+    return ((2 * s3 - 3 * s2 + 1) * a0 + (s3 - 2 * s2 + s) * span * v0
+            + (-2 * s3 + 3 * s2) * a1 + (s3 - s2) * span * v1)
+
+
+class ServoTrajectoryEngine:
+    """Интерполяция траекторий и запись изменившихся каналов"""
+
+    def __init__(self, servos, joint_count=4, rate=50.0):
+        """
+        servos: Servos (angle_to_steps, write_steps)
+        joint_count: число сервоприводов
+        rate: частота интерполяции и записи (Гц)
+        """
+        self.servos = servos
+        self.address = getattr(servos, 'address', None)
+        self.period = 1.0 / rate
+        self.lock = threading.Lock()
+        self.positions = [0.0] * joint_count   # Текущий угол (°)
+        self._points = [[] for _ in range(joint_count)]
+        self._written = [None] * joint_count    # Последние записанные такты
+        self._running = False
+        self._thread = None
+
+        # Метрики
+        self.ticks = 0
+        self.channel_writes = 0
+        self.jitter_us = FixedHistogram()
+        self._window_ticks = 0
+        self._window_start = clock.monotonic()
+
+    def set_trajectory(self, joints, points, start=None):
+        """
+        Заменить траектории сервоприводов joints (индексы)
+        points: [(время от start (с), [углы °], [скорости °/с] или None)]
+        start: момент начала (clock.monotonic), None - сейчас
+        Движение начинается из текущего положения; до start (если он в
+        будущем) сервопривод стоит в текущем положении.
+        """
+        now = clock.monotonic()
+        if start is None:
+            start = now
+        with self.lock:
+            for k, joint in enumerate(joints):
+                velocity = None if points and points[0][2] is None else 0.0
+                track = [(now, self.positions[joint], velocity)]
+                if start > now:
+                    track.append((start, self.positions[joint], velocity))
+                held = len(track)
+                for time_from_start, angles, velocities in points:
+                    t = start + time_from_start
+                    if t <= now:
+                        continue  # Точка уже в прошлом
+                    velocity = None if velocities is None else velocities[k]
+                    track.append((t, min(90.0, max(-90.0, angles[k])), velocity))
+                if len(track) == held and points:
+                    # Все точки в прошлом - сразу в последнюю
+                    angle = min(90.0, max(-90.0, points[-1][1][k]))
+                    track = [(now, angle, None)]
+                    self.positions[joint] = angle
+                self._points[joint] = track
+
+    def hold(self, joint, angle):
+        """Встать в угол без интерполяции"""
+        with self.lock:
+            angle = min(90.0, max(-90.0, angle))
+            self._points[joint] = [(clock.monotonic(), angle, None)]
+            self.positions[joint] = angle
+
+    def start(self):
+        """Запустить поток интерполяции"""
+        self._running = True
+        watch_chip_reset(self)
+        self._thread = threading.Thread(target=self._stream_loop, name='servo_trajectory')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Остановить поток"""
+        self._running = False
+        unwatch_chip_reset(self)
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+    def invalidate(self):
+        """Микросхема сброшена: на следующем такте записать все каналы заново"""
+        with self.lock:
+            self._written = [None] * len(self._written)
+
+    def stats(self):
+        """Метрики за окно с прошлого вызова"""
+        now = clock.monotonic()
+        window = max(now - self._window_start, 1e-9)
+        result = {
+            'rate_hz': round(self._window_ticks / window, 2),
+            'ticks': self.ticks,
+            'i2c_writes': self.servos.i2c_writes,
+            'channel_writes': self.channel_writes,
+            'jitter_p99_us': self.jitter_us.percentile(0.99),
+            'jitter_max_us': self.jitter_us.max,
+        }
+        self._window_ticks = 0
+        self._window_start = now
+        self.jitter_us.reset()
+        return result
+
+    def _stream_loop(self):
+        """Цикл по абсолютным дедлайнам"""
+        monotonic = clock.monotonic
+        period = self.period
+        deadline = monotonic()
+        while self._running:
+            delay = deadline - monotonic()
+            if delay > 0.0:
+                clock.sleep(delay)
+            now = monotonic()
+            late = now - deadline
+            if late > period:
+                deadline = now
+            self.jitter_us.record(late * 1e6 if late > 0.0 else 0)
+            self.step(now)
+            self.ticks += 1
+            self._window_ticks += 1
+            deadline += period
+
+    def step(self, now):
+        """Один такт: интерполяция и запись изменившихся каналов"""
+        changed = {}
+        with self.lock:
+            for joint, track in enumerate(self._points):
+                if not track:
+                    continue
+                # Пройденные сегменты отбрасываются, последняя точка - удержание
+                while len(track) > 1 and track[1][0] <= now:
+                    track.pop(0)
+                if len(track) > 1:
+                    angle = _interpolate(track[0], track[1], now)
+                else:
+                    angle = track[0][1]
+                self.positions[joint] = angle
+                steps = self.servos.angle_to_steps(angle)
+                if steps != self._written[joint]:
+                    self._written[joint] = steps
+                    changed[joint] = steps
+        if changed:
+            self.servos.write_steps(changed)
+            self.channel_writes += len(changed)
@@ -1,4 +1,23 @@
-from Raspi_MotorHAT.Raspi_PWM_Servo_Driver import PWM
+from my_robot.hardware.hal import PWM
+from my_robot.hardware.motor_output import LED0_ON_L, MODE1, MODE1_AI, chip_reset
+
+_claims = {}  # (адрес, индекс сервопривода) -> владелец в этом процессе
+
+
+def claim_servos(address, indices, owner):
+    """
+    Занять сервоприводы indices микросхемы address для owner
+    Сервопривод, уже занятый другим владельцем в этом процессе
+    (составной режим), - ValueError: два писателя одного канала
+    дёргали бы сервопривод между своими положениями.
+    """
+    taken = {index: _claims[(address, index)] for index in indices
+             if _claims.get((address, index), owner) != owner}
+    if taken:
+        details = ', '.join(f'{index} ({who})' for index, who in sorted(taken.items()))
+        raise ValueError(f'Сервоприводы 0x{address:02X} уже заняты: {details}')
+    for index in indices:
+        _claims[(address, index)] = owner
 
 class Servos: 
     """PCA 9865 Servo motors"""
@@ -8,6 +27,7 @@ class Servos:
         deflect_90_in_ms: устанавливаем значение, полученное при калибровке сервопривода.
         это значение соответствует повороту на 90°
         (длительность соответствующего импульса в мс)"""
+        self.address = addr
         self._pwm = PWM(addr)
         # Устанавливаем временной базис
         pwm_frequency = 100 
@@ -27,6 +47,16 @@ class Servos:
           # Map for channels
         self.channels = [0, 1, 14, 15]
 
+        # Блочная запись каналов, если у драйвера есть доступ к I2C
+        self._i2c = getattr(self._pwm, 'i2c', None)
+        if self._i2c is not None:
+            mode1 = self._i2c.readU8(MODE1)
+            self._i2c.write8(MODE1, mode1 | MODE1_AI)
+        self.i2c_writes = 0
+        # PWM() обнулил все каналы микросхемы: моторы Motor HAT, траектории
+        # и развёртка других Servos этого процесса записывают своё заново
+        chip_reset(addr)
+
     def stop_all(self):
         # 0 in start is nothing
         off_bit = 4096  # bit 12 is the OFF bit.
@@ -37,6 +67,36 @@ class Servos:
 
     def _convert_degrees_to_steps(self, position):
         return int(self.servo_mid_point_steps + (position * self.steps_per_degree))
+
+    def angle_to_steps(self, angle):
+        """Угол (-90..90°) в такты ШИМ с ограничением диапазона"""
+        angle = min(90.0, max(-90.0, angle))
+        return self._convert_degrees_to_steps(angle)
+
+    def write_steps(self, steps):
+        """
+        Записать несколько сервоприводов: steps - {индекс сервопривода: такты}
+        Соседние каналы PCA9685 уходят одной записью с автоинкрементом.
+        Чужие каналы (моторы Motor HAT на той же микросхеме) не затрагиваются,
+        поэтому на каждый непрерывный участок каналов - своя запись.
+        """
+        by_channel = sorted((self.channels[index], off) for index, off in steps.items())
+        if self._i2c is None:
+            for channel, off in by_channel:
+                self._pwm.setPWM(channel, 0, off)
+                self.i2c_writes += 4
+            return
+        start = 0
+        while start < len(by_channel):
+            end = start + 1
+            while end < len(by_channel) and by_channel[end][0] == by_channel[end - 1][0] + 1:
+                end += 1
+            data = []
+            for channel, off in by_channel[start:end]:
+                data += [0, 0, off & 0xFF, off >> 8]
+            self._i2c.writeList(LED0_ON_L + 4 * by_channel[start][0], data)
+            self.i2c_writes += 1
+            start = end
         
     def set_servo_angle(self, channel, angle):
         """ position: The position in degrees from the center. -90 to 90 """
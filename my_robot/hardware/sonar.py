@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Неблокирующий опрос ультразвуковых датчиков HC-SR04
+
+Отдельный поток запускает датчики по расписанию SonarScheduler (своя
+частота у каждого, одновременно - только не мешающие друг другу), фронты
+эха ловятся колбэками GPIO с метками времени. Результат выдаётся, как
+только пришло эхо или истекло время эха на max_cm, не дожидаясь конца
+38-мс импульса "нет препятствия". Готовые измерения передаются узлу
+через очередь без блокировок (deque: append/popleft атомарны).
+
+Датчик на сервоприводе пана (sweep, SonarSweep) после каждого пинга
+поворачивается на следующий угол (в конвейере - сразу после запуска);
+планировщик не запускает его раньше прихода сервопривода, а соседей по
+взаимным помехам считает по новому направлению с освобождения датчика.
+"""
+
+import collections
+import threading
+
+from my_robot.hardware.hal import GPIO, clock
+from my_robot.hardware.sonar_scheduler import SonarScheduler
+
+SOUND_SPEED_CM_PER_SEC = 17150  # Половина скорости звука (туда и обратно)
+ECHO_START_WAIT = 0.003         # Ожидание начала эха после запуска (с)
+
+
+class SonarSensor:
+    """Один датчик HC-SR04 и состояние текущего измерения"""
+
+    __slots__ = ('position', 'trig_pin', 'echo_pin', 'yaw', 'rise_time',
+                 'fall_time', 'done', 'fired_at', 'reported', 'notify')
+
+    def __init__(self, position, trig_pin, echo_pin, yaw=0.0):
+        """yaw: направление оси датчика относительно робота (рад)"""
+        self.position = position
+        self.trig_pin = trig_pin
+        self.echo_pin = echo_pin
+        self.yaw = yaw
+        self.rise_time = None
+        self.fall_time = None
+        self.done = threading.Event()
+        self.fired_at = 0.0
+        self.reported = False
+        self.notify = None  # Общее событие "был фронт" потока опроса
+
+    def arm(self):
+        """Подготовить к новому измерению"""
+        self.rise_time = None
+        self.fall_time = None
+        self.reported = False
+        self.done.clear()
+
+    def on_edge(self, channel):
+        """Колбэк фронта эха: первый фронт - нарастающий, второй - спадающий"""
+        now = clock.monotonic()
+        if self.done.is_set():
+            return
+        if self.rise_time is None:
+            self.rise_time = now
+        else:
+            self.fall_time = now
+            self.done.set()
+            if self.notify is not None:
+                self.notify.set()
+
+
+class SonarAcquisition:
+    """Поток опроса датчиков с передачей результатов через очередь"""
+
+    def __init__(self, sensors, scheduler=None, timeout=0.06, queue_size=32,
+                 min_cm=2, max_cm=200, sweep=None):
+        """
+        sensors: список SonarSensor
+        scheduler: SonarScheduler (по умолчанию - по yaw датчиков)
+        sweep: SonarSweep датчика на сервоприводе пана (опционально)
+        timeout: предел занятости датчика без спада эха (с); без препятствия
+        HC-SR04 держит эхо ~38 мс и до его конца не запускается
+        queue_size: ёмкость очереди результатов (старые вытесняются)
+        """
+        self.sensors = list(sensors)
+        self.scheduler = scheduler or SonarScheduler(
+            [(sensor.position, sensor.yaw) for sensor in self.sensors])
+        self.timeout = timeout
+        self.min_cm = min_cm
+        self.max_cm = max_cm
+        self.max_echo = max_cm / SOUND_SPEED_CM_PER_SEC  # Длительность эха на max_cm (с)
+        # Элементы: (position, distance_m, echo_time по clock.monotonic)
+        self.results = collections.deque(maxlen=queue_size)
+        # Вызывается из потока опроса после каждого измерения (опционально)
+        self.on_result = None
+        self.recorder = None  # EventRecorder для записи эха (опционально)
+        self.sweep = sweep
+        self._edge = threading.Event()
+        self._index = {sensor.position: i for i, sensor in enumerate(self.sensors)}
+        self._running = False
+        self._thread = None
+        self._use_events = True
+
+    def start(self):
+        """Подключить колбэки фронтов и запустить поток опроса"""
+        for sensor in self.sensors:
+            sensor.notify = self._edge
+            try:
+                GPIO.add_event_detect(sensor.echo_pin, GPIO.BOTH,
+                                      callback=sensor.on_edge)
+            except RuntimeError:
+                # Детектор фронтов недоступен - ловим эхо опросом пина
+                self._use_events = False
+        if self.sweep is not None:
+            self.scheduler.set_rate(self.sweep.name, self.sweep.rate)
+            self.scheduler.hold(self.sweep.name, self.sweep.start())
+            self._update_sweep_yaw()
+        self._running = True
+        self._thread = threading.Thread(target=self._acquisition_loop,
+                                        name='sonar')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Остановить поток и снять колбэки"""
+        self._running = False
+        self._edge.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        if self._use_events:
+            for sensor in self.sensors:
+                try:
+                    GPIO.remove_event_detect(sensor.echo_pin)
+                except RuntimeError:
+                    pass
+
+    def set_motion(self, linear, angular):
+        """Скорость робота (м/с, рад/с) для частот датчиков"""
+        self.scheduler.set_motion(linear, angular)
+
+    def stats(self):
+        """Целевые и достигнутые частоты датчиков (для /diagnostics)"""
+        return self.scheduler.stats(clock.monotonic())
+
+    def poll(self):
+        """Забрать все готовые измерения (вызывается из узла)"""
+        results = self.results
+        while results:
+            yield results.popleft()
+
+    def fire(self, sensor):
+        """Импульс запуска 10 мкс"""
+        sensor.arm()
+        GPIO.output(sensor.trig_pin, True)
+        clock.sleep(0.00001)  # 10 мкс
+        GPIO.output(sensor.trig_pin, False)
+        sensor.fired_at = clock.monotonic()
+
+    def report_deadline(self, sensor):
+        """Момент, после которого эха в пределах max_cm уже не будет"""
+        start = sensor.rise_time
+        if start is None:
+            start = sensor.fired_at + ECHO_START_WAIT
+        return start + self.max_echo
+
+    def measure(self, sensor):
+        """Одно измерение с ожиданием: (дистанция в м или inf, время прихода эха)"""
+        self.fire(sensor)
+        if self._use_events:
+            sensor.done.wait(ECHO_START_WAIT + self.max_echo)
+        else:
+            self._poll_echo(sensor)
+        return self._result(sensor)
+
+    def _result(self, sensor):
+        if sensor.fall_time is None:
+            return float('inf'), clock.monotonic()
+
+        duration = sensor.fall_time - sensor.rise_time
+        distance = duration * SOUND_SPEED_CM_PER_SEC  # см
+        if distance > self.max_cm or distance < self.min_cm:
+            return float('inf'), sensor.fall_time
+        return distance / 100.0, sensor.fall_time
+
+    def _poll_echo(self, sensor):
+        """Запасной вариант: ловим фронты опросом пина в своём потоке"""
+        deadline = sensor.fired_at + ECHO_START_WAIT
+        while GPIO.input(sensor.echo_pin) == 0:
+            if clock.monotonic() > deadline:
+                return
+        sensor.rise_time = clock.monotonic()
+        deadline = sensor.rise_time + self.max_echo
+        while GPIO.input(sensor.echo_pin) == 1:
+            if clock.monotonic() > deadline:
+                return
+        sensor.fall_time = clock.monotonic()
+
+    def _update_sweep_yaw(self):
+        """Направление датчика развёртки для модели взаимных помех"""
+        sweep = self.sweep
+        yaw = self.sensors[self._index[sweep.name]].yaw + sweep.bearing
+        self.scheduler.set_yaw(sweep.name, yaw)
+
+    def _sweep_fired(self, sensor):
+        """Пинг датчика развёртки запущен: в конвейере - сразу следующий угол"""
+        sweep = self.sweep
+        if sweep is None or sensor.position != sweep.name:
+            return
+        sweep.fired()
+        if sweep.pipelined:
+            self.scheduler.hold(sweep.name, sweep.advance())
+
+    def _release_sweep(self, sensor):
+        """Датчик развёртки освободился: без конвейера - поворот сейчас"""
+        sweep = self.sweep
+        if sweep is None or sensor.position != sweep.name:
+            return
+        if not sweep.pipelined:
+            self.scheduler.hold(sweep.name, sweep.advance())
+        self._update_sweep_yaw()
+
+    def _emit(self, sensor):
+        """Выдать результат измерения (один раз на запуск)"""
+        sensor.reported = True
+        distance, echo_time = self._result(sensor)
+        if self.recorder is not None:
+            width = 0.0
+            if sensor.fall_time is not None:
+                width = sensor.fall_time - sensor.rise_time
+            self.recorder.echo(echo_time, self._index[sensor.position], distance, width)
+        sweep = self.sweep
+        if sweep is not None and sensor.position == sweep.name:
+            # В скан - всегда, в Range датчика - только около прямо вперёд
+            if not sweep.record(distance, echo_time):
+                return
+        self.results.append((sensor.position, distance, echo_time))
+        if self.on_result is not None:
+            self.on_result()
+
+    def _collect(self, sensor, now):
+        """Результат запущенного датчика; True - датчик свободен"""
+        if not sensor.reported and (sensor.fall_time is not None
+                                    or now >= self.report_deadline(sensor)):
+            self._emit(sensor)
+        if sensor.done.is_set() or now >= sensor.fired_at + self.timeout:
+            if not sensor.reported:
+                self._emit(sensor)
+            self._release_sweep(sensor)
+            return True
+        return False
+
+    def _acquisition_loop(self):
+        """Запуски по расписанию, результаты по мере прихода эха"""
+        if not self._use_events:
+            self._polling_loop()
+            return
+        scheduler = self.scheduler
+        by_name = {sensor.position: sensor for sensor in self.sensors}
+        in_flight = []
+        while self._running:
+            now = clock.monotonic()
+            for sensor in list(in_flight):
+                try:
+                    released = self._collect(sensor, now)
+                except RuntimeError:
+                    released = True
+                if released:
+                    in_flight.remove(sensor)
+                    scheduler.finished(sensor.position)
+
+            for name in scheduler.select(clock.monotonic()):
+                sensor = by_name[name]
+                try:
+                    self.fire(sensor)
+                except RuntimeError:
+                    sensor.fired_at = clock.monotonic()  # Результат - inf по таймауту
+                scheduler.fired(name, sensor.fired_at)
+                self._sweep_fired(sensor)
+                in_flight.append(sensor)
+
+            # Спим до фронта эха, срока результата или готовности датчика
+            wake = scheduler.next_time(clock.monotonic())
+            for sensor in in_flight:
+                deadline = sensor.fired_at + self.timeout
+                if not sensor.reported:
+                    deadline = self.report_deadline(sensor)
+                wake = deadline if wake is None else min(wake, deadline)
+            delay = 0.05 if wake is None else min(wake - clock.monotonic(), 0.05)
+            if delay > 0:
+                self._edge.wait(delay)
+            self._edge.clear()
+
+    def _polling_loop(self):
+        """Без детектора фронтов: по одному датчику, эхо опросом пина"""
+        scheduler = self.scheduler
+        by_name = {sensor.position: sensor for sensor in self.sensors}
+        while self._running:
+            names = scheduler.select(clock.monotonic())
+            if not names:
+                wake = scheduler.next_time(clock.monotonic())
+                delay = 0.05 if wake is None else min(wake - clock.monotonic(), 0.05)
+                if delay > 0:
+                    clock.sleep(delay)
+                continue
+            sensor = by_name[names[0]]
+            try:
+                self.fire(sensor)
+                scheduler.fired(sensor.position, sensor.fired_at)
+                self._sweep_fired(sensor)
+                self._poll_echo(sensor)
+                self._emit(sensor)
+                # Датчик свободен после спада эха (или по таймауту)
+                deadline = sensor.fired_at + self.timeout
+                while GPIO.input(sensor.echo_pin) == 1 and clock.monotonic() < deadline:
+                    clock.sleep(0.0005)
+                self._release_sweep(sensor)
+            except RuntimeError:
+                pass
+            scheduler.finished(sensor.position)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Планировщик запусков ультразвуковых датчиков
+
+У каждого датчика своя целевая частота, она следует за движением робота:
+передний (|yaw| <= front_cone) быстрее при движении вперёд, боковые -
+при повороте. Из готовых к запуску первым идёт самый просроченный.
+
+Модель взаимных помех: датчики с осями ближе crosstalk_angle слышат
+пинги друг друга. Такой датчик запускается, только когда у всех
+"соседей" (и у него самого) нет пинга в полёте и с их последнего пинга
+прошло settle (затухание отражений от дальних стен). Датчики с
+расходящимися осями запускаются одновременно.
+
+Ось датчика на сервоприводе (развёртка) меняется между пингами: set_yaw
+пересчитывает соседей, hold откладывает запуск до прихода сервопривода,
+set_rate закрепляет частоту (set_motion её не меняет).
+"""
+
+import math
+
+
+class _SensorState:
+    """Расписание одного датчика"""
+
+    __slots__ = ('name', 'yaw', 'rate', 'fixed', 'next_due', 'fired_at', 'in_flight',
+                 'neighbours', 'count', 'window_count')
+
+    def __init__(self, name, yaw, rate):
+        self.name = name
+        self.yaw = yaw
+        self.rate = rate
+        self.fixed = False      # Частота задана set_rate
+        self.next_due = 0.0
+        self.fired_at = -math.inf
+        self.in_flight = False
+        self.neighbours = ()
+        self.count = 0          # Измерений всего
+        self.window_count = 0   # Измерений с последней сводки
+
+
+class SonarScheduler:
+    """Какие датчики запускать и когда"""
+
+    def __init__(self, sensors, min_rate=5.0, max_rate=30.0, crosstalk_angle=0.8,
+                 settle=0.025, front_cone=0.3, speed_ref=0.2, turn_ref=1.0):
+        """
+        sensors: [(имя, yaw оси датчика относительно робота, рад)]
+        min_rate, max_rate: пределы целевой частоты датчика (Гц)
+        crosstalk_angle: оси ближе этого угла - датчики мешают друг другу (рад)
+        settle: пауза от пинга до запуска мешающего датчика (с)
+        speed_ref, turn_ref: скорость (м/с) и угловая скорость (рад/с),
+        при которых частота достигает max_rate
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.crosstalk_angle = crosstalk_angle
+        self.settle = settle
+        self.front_cone = front_cone
+        self.speed_ref = speed_ref
+        self.turn_ref = turn_ref
+        self.states = {name: _SensorState(name, yaw, min_rate) for name, yaw in sensors}
+        self._update_neighbours()
+        self.window_start = None
+
+    def _update_neighbours(self):
+        for state in self.states.values():
+            state.neighbours = tuple(
+                other for other in self.states.values()
+                if abs(math.remainder(other.yaw - state.yaw, math.tau)) < self.crosstalk_angle)
+
+    def crosstalk(self, a, b):
+        """Мешают ли датчики a и b друг другу"""
+        return self.states[b] in self.states[a].neighbours
+
+    def set_yaw(self, name, yaw):
+        """Новое направление оси датчика (рад)"""
+        self.states[name].yaw = yaw
+        self._update_neighbours()
+
+    def hold(self, name, until):
+        """Не запускать датчик раньше until"""
+        state = self.states[name]
+        state.next_due = max(state.next_due, until)
+
+    def set_rate(self, name, rate):
+        """Постоянная частота датчика (Гц), не зависящая от движения"""
+        state = self.states[name]
+        state.rate = rate
+        state.fixed = True
+
+    def set_motion(self, linear, angular):
+        """Целевые частоты по скорости робота (м/с, рад/с)"""
+        forward = min(max(linear, 0.0) / self.speed_ref, 1.0)
+        turn = min(abs(angular) / self.turn_ref, 1.0)
+        span = self.max_rate - self.min_rate
+        for state in self.states.values():
+            if state.fixed:
+                continue
+            demand = forward if abs(state.yaw) <= self.front_cone else turn
+            rate = self.min_rate + span * demand
+            if rate > state.rate:
+                # Ускорение действует сразу, а не после старого периода
+                state.next_due = min(state.next_due, state.fired_at + 1.0 / rate)
+            state.rate = rate
+
+    def _clear_at(self, state):
+        """Момент, с которого датчик не мешают пинги соседей (inf - пинг в полёте)"""
+        clear = 0.0
+        for other in state.neighbours:
+            if other.in_flight:
+                return math.inf
+            clear = max(clear, other.fired_at + self.settle)
+        return clear
+
+    def select(self, now):
+        """Датчики для запуска сейчас (самый просроченный первым)"""
+        if self.window_start is None:
+            self.window_start = now
+        due = sorted((s for s in self.states.values() if s.next_due <= now and not s.in_flight),
+                     key=lambda s: s.next_due)
+        chosen = []
+        for state in due:
+            if self._clear_at(state) > now:
+                continue
+            if any(other in state.neighbours for other in chosen):
+                continue
+            chosen.append(state)
+        return [state.name for state in chosen]
+
+    def next_time(self, now):
+        """Ближайший момент, когда какой-то датчик может стать готовым (или None)"""
+        best = None
+        for state in self.states.values():
+            if state.in_flight:
+                continue
+            when = max(state.next_due, self._clear_at(state))
+            if when != math.inf and (best is None or when < best):
+                best = when
+        return best
+
+    def fired(self, name, now):
+        state = self.states[name]
+        state.fired_at = now
+        state.in_flight = True
+        state.next_due = now + 1.0 / state.rate
+
+    def finished(self, name):
+        """Эхо закончилось (или датчик сброшен по таймауту)"""
+        state = self.states[name]
+        state.in_flight = False
+        state.count += 1
+        state.window_count += 1
+
+    def stats(self, now):
+        """Целевые и достигнутые частоты за окно (Гц)"""
+        result = {}
+        elapsed = now - self.window_start if self.window_start is not None else 0.0
+        for name, state in self.states.items():
+            result[f'{name}_target_hz'] = round(state.rate, 1)
+            result[f'{name}_hz'] = round(state.window_count / elapsed, 1) if elapsed > 0 else 0.0
+            state.window_count = 0
+        self.window_start = now
+        return result
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Развёртка ультразвукового датчика сервоприводом пана (виртуальный лидар)
+
+Датчик на сервоприводе проходит дугу arc с шагом step туда и обратно,
+крайний угол - общий для двух соседних проходов. Запуски делает
+SonarAcquisition через общий планировщик (взаимные помехи с боковыми
+датчиками учитываются по текущему направлению оси).
+
+Конвейер: сервопривод получает следующий угол сразу после запуска пинга,
+поворот идёт во время ожидания эха, занятости датчика (эхо "нет
+препятствия" держится ~38 мс) и затухания отражений (settle
+планировщика). Новый импульс ШИМ сервопривод видит не раньше следующего
+периода PCA9685 (10 мс), так что за время эха на 2 м (~12 мс) ось
+уходит на единицы градусов - меньше ширины луча. Следующий пинг - после
+прихода сервопривода: шаг / servo_speed + servo_settle. pipelined=False -
+поворот только после освобождения датчика (для сравнения).
+
+Показания собираются в секторы по sector углов в порядке прохода
+(angle_increment со знаком направления) и отдаются колбэком on_sector
+сразу, не дожидаясь конца прохода; sector=0 - только полные проходы.
+Угловое разрешение ограничено и шагом, и шириной луча HC-SR04 (~15°).
+"""
+
+import math
+
+from my_robot.hardware.hal import clock
+from my_robot.hardware.motor_output import watch_chip_reset
+
+
+class SonarSweep:
+    """Углы развёртки, команды сервоприводу и сборка секторов скана"""
+
+    def __init__(self, servos, name='front', joint=0, arc=math.radians(120),
+                 step=math.radians(10), servo_speed=6.0, servo_settle=0.015,
+                 sector=4, pipelined=True, rate=50.0, forward_cone=0.3, beam_width=0.26):
+        """
+        servos: Servos (angle_to_steps, write_steps)
+        name: датчик SonarAcquisition на сервоприводе
+        joint: индекс сервопривода пана в Servos
+        arc, step: дуга и шаг развёртки (рад), шаг подгоняется под целое число углов
+        servo_speed: скорость сервопривода (рад/с), servo_settle: успокоение после поворота (с)
+        sector: углов в одном сообщении (0 - полный проход)
+        rate: предел частоты пингов (Гц)
+        forward_cone: показания при |угол| <= forward_cone идут и в Range датчика
+        beam_width: ширина луча датчика (рад)
+        """
+        self.servos = servos
+        self.address = getattr(servos, 'address', None)
+        self.name = name
+        self.joint = joint
+        count = max(int(round(arc / step)), 1) + 1
+        self.step = arc / (count - 1)
+        self.bearings = [-arc / 2.0 + i * self.step for i in range(count)]
+        self.servo_speed = servo_speed
+        self.servo_settle = servo_settle
+        self.sector = sector
+        self.pipelined = pipelined
+        self.rate = rate
+        self.forward_cone = forward_cone
+        self.beam_width = beam_width
+        # on_sector(angle_min, angle_increment, ranges, first_time, last_time)
+        # вызывается из потока опроса; времена - clock.monotonic
+        self.on_sector = None
+
+        self._index = 0           # Угол, выданный сервоприводу
+        self._direction = 1
+        self._ping_index = 0      # Угол последнего пинга
+        self._pass_direction = 1  # Направление собираемого прохода
+        self._ranges = []
+        self._sector_start = (0.0, 1, 0.0)  # (угол, направление, время) первого показания
+        self._last_time = 0.0
+        self._pass_start = None
+
+        # Метрики
+        self.passes = 0
+        self.readings = 0
+        self.pass_time = 0.0      # Длительность последнего полного прохода (с)
+        self._window_passes = 0
+        self._window_readings = 0
+        self._window_start = clock.monotonic()
+
+    @property
+    def bearing(self):
+        """Угол пана, выданный сервоприводу (рад)"""
+        return self.bearings[self._index]
+
+    def start(self):
+        """Сервопривод в начало дуги; момент прихода (clock.monotonic)"""
+        self._index = 0
+        self._direction = 1
+        self._pass_direction = 1
+        watch_chip_reset(self)
+        return self._move(abs(self.bearings[0]))  # Из среднего положения
+
+    def invalidate(self):
+        """Микросхема сброшена: вернуть сервопривод на выданный угол"""
+        self._move(0.0)
+
+    def fired(self):
+        """Пинг запущен на текущем угле"""
+        self._ping_index = self._index
+
+    def record(self, distance, echo_time):
+        """Показание последнего пинга; True - ось около прямо вперёд"""
+        bearing = self.bearings[self._ping_index]
+        direction = self._pass_direction
+        if not self._ranges:
+            self._sector_start = (bearing, direction, echo_time)
+            if self._pass_start is None:
+                self._pass_start = echo_time
+        self._ranges.append(distance)
+        self._last_time = echo_time
+        self.readings += 1
+        self._window_readings += 1
+
+        if self._ping_index == (len(self.bearings) - 1 if direction > 0 else 0):
+            # Конец прохода: крайний угол начинает и следующий проход
+            # (один он сам по себе не отдаётся - придёт с первым сектором)
+            if len(self._ranges) > 1 or self.sector == 1:
+                self._flush()
+            self._ranges = []
+            self.passes += 1
+            self._window_passes += 1
+            self.pass_time = echo_time - self._pass_start
+            self._pass_start = echo_time
+            self._pass_direction = -direction
+            self._ranges.append(distance)
+            self._sector_start = (bearing, -direction, echo_time)
+        elif self.sector and len(self._ranges) >= self.sector:
+            self._flush()
+        return abs(bearing) <= self.forward_cone
+
+    def advance(self):
+        """Команда следующего угла; момент прихода сервопривода"""
+        index = self._index + self._direction
+        if not 0 <= index < len(self.bearings):
+            self._direction = -self._direction
+            index = self._index + self._direction
+        self._index = index
+        return self._move(self.step)
+
+    def _move(self, travel):
+        steps = self.servos.angle_to_steps(math.degrees(self.bearing))
+        self.servos.write_steps({self.joint: steps})
+        return clock.monotonic() + travel / self.servo_speed + self.servo_settle
+
+    def _flush(self):
+        ranges = self._ranges
+        self._ranges = []
+        angle, direction, first_time = self._sector_start
+        if self.on_sector is not None:
+            self.on_sector(angle, self.step * direction, ranges, first_time, self._last_time)
+
+    def stats(self):
+        """Частота сканов и углов, разрешение (для /diagnostics)"""
+        now = clock.monotonic()
+        elapsed = now - self._window_start
+        result = {
+            'scan_hz': round(self._window_passes / elapsed, 2) if elapsed > 0 else 0.0,
+            'bearings_hz': round(self._window_readings / elapsed, 1) if elapsed > 0 else 0.0,
+            'pass_time_ms': round(self.pass_time * 1000.0),
+            'resolution_deg': round(math.degrees(self.step), 1),
+            'beam_deg': round(math.degrees(self.beam_width), 1),
+            'points': len(self.bearings),
+            'pipelined': self.pipelined,
+        }
+        self._window_passes = 0
+        self._window_readings = 0
+        self._window_start = now
+        return result
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Кольцевой буфер меток времени тиков энкодера
+
+Фиксированный размер на массивах array: память не растёт при любой
+длительности работы. Один писатель (поток опроса), читатели - без блокировок.
+"""
+
+from array import array
+
+
+class TickRingBuffer:
+    """Метки времени (monotonic) и направления последних тиков"""
+
+    def __init__(self, capacity=256):
+        """capacity: ёмкость буфера (округляется вверх до степени двойки)"""
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self.capacity = size
+        self._mask = size - 1
+        self._times = array('d', bytes(8 * size))
+        self._directions = array('b', bytes(size))
+        # Общее число записанных тиков (монотонно растёт)
+        self.count = 0
+
+    def append(self, timestamp, direction=1):
+        """Добавить тик (вызывается только из потока опроса)"""
+        index = self.count & self._mask
+        self._times[index] = timestamp
+        self._directions[index] = direction
+        # Счётчик увеличивается последним - читатель не увидит пустую ячейку
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def timestamp(self, seq):
+        """Метка времени тика с порядковым номером seq (0..count-1)"""
+        return self._times[seq & self._mask]
+
+    def direction(self, seq):
+        """Направление тика с порядковым номером seq"""
+        return self._directions[seq & self._mask]
+
+    def last(self, n):
+        """Метки времени последних n тиков (от старых к новым)"""
+        end = self.count
+        start = max(end - min(n, self.capacity), 0)
+        return [self._times[i & self._mask] for i in range(start, end)]
+
+    def clear(self):
+        """Сбросить буфер"""
+        self.count = 0
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Оценка скорости колеса по меткам времени тиков
+
+На малой скорости скорость считается по периоду между соседними фронтами
+(без квантования окном публикации), на большой - по числу тиков в окне.
+"""
+
+
+class WheelVelocityEstimator:
+    """Скорость колеса (м/с) по кольцевому буферу TickRingBuffer"""
+
+    def __init__(self, ticks, meters_per_tick, window=0.1, switch_rate=40.0,
+                 timeout=0.5):
+        """
+        ticks: TickRingBuffer энкодера
+        meters_per_tick: путь колеса за один тик (м)
+        window: окно счёта тиков на большой скорости (с)
+        switch_rate: частота тиков (Гц), выше которой используется счёт в окне
+        timeout: без тиков дольше этого времени колесо считается стоящим (с)
+        """
+        self.ticks = ticks
+        self.meters_per_tick = meters_per_tick
+        self.window = window
+        self.switch_rate = switch_rate
+        self.timeout = timeout
+
+    def estimate(self, now):
+        """Скорость колеса на момент now (в тех же часах, что и метки тиков) в м/с"""
+        ticks = self.ticks
+        count = ticks.count
+        if count < 2:
+            return 0.0
+
+        last = count - 1
+        last_time = ticks.timestamp(last)
+        since_last = now - last_time
+        if since_last > self.timeout:
+            return 0.0
+
+        # Период между двумя последними фронтами. Если новый фронт
+        # запаздывает, скорость не больше 1 / (время с последнего фронта)
+        period = last_time - ticks.timestamp(last - 1)
+        if since_last > period:
+            period = since_last
+        if period <= 0.0:
+            return 0.0
+        rate = 1.0 / period
+
+        if rate >= self.switch_rate:
+            rate = self._count_rate(last, last_time, now)
+
+        return ticks.direction(last) * rate * self.meters_per_tick
+
+    def _count_rate(self, last, last_time, now):
+        """Частота тиков по числу фронтов в окне"""
+        ticks = self.ticks
+        start = now - self.window
+        first = last - 1
+        oldest = max(ticks.count - ticks.capacity, 0)
+        while first > oldest and ticks.timestamp(first - 1) >= start:
+            first -= 1
+        span = last_time - ticks.timestamp(first)
+        if span <= 0.0:
+            return 0.0
+        return (last - first) / span
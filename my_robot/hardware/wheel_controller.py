@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Замкнутый регулятор скорости колёс
+
+Для каждого колеса - ПИД с прямой связью по уставке и защитой от
+насыщения интегратора. Цикл работает в отдельном потоке с фиксированным
+периодом (50-200 Hz) по абсолютным дедлайнам, поэтому не зависит от
+загрузки executor'а и частоты /cmd_vel. Скорость берётся из меток времени
+тиков энкодеров, ШИМ пишется в Motor HAT через выходной каскад.
+
+Энкодеры одноканальные: знак скорости задаёт направление вращения,
+которое выбрал регулятор.
+"""
+
+import threading
+
+from my_robot.histogram import FixedHistogram
+from my_robot.hardware.hal import Raspi_MotorHAT, clock
+from my_robot.realtime import configure_thread
+
+MIN_RATE = 50.0
+MAX_RATE = 200.0
+PWM_MAX = 255
+
+
+class PidController:
+    """ПИД с прямой связью и условным интегрированием (anti-windup)"""
+
+    def __init__(self, kp, ki, kd=0.0, kff=0.0, offset=0.0, limit=PWM_MAX):
+        """
+        kp, ki, kd: коэффициенты (ШИМ на м/с ошибки)
+        kff: прямая связь (ШИМ на м/с уставки)
+        offset: ШИМ трогания, добавляется со знаком уставки
+        limit: предел выхода (+-)
+        """
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.kff = kff
+        self.offset = offset
+        self.limit = limit
+        self.integral = 0.0
+        self._last_error = None
+
+    def update(self, setpoint, measured, dt):
+        """Выход (ШИМ со знаком) за шаг dt"""
+        error = setpoint - measured
+        derivative = 0.0
+        if self._last_error is not None and dt > 0.0:
+            derivative = (error - self._last_error) / dt
+        self._last_error = error
+
+        feed_forward = self.kff * setpoint
+        if setpoint > 0.0:
+            feed_forward += self.offset
+        elif setpoint < 0.0:
+            feed_forward -= self.offset
+
+        integral = self.integral + error * dt
+        output = feed_forward + self.kp * error + self.ki * integral + self.kd * derivative
+        if output > self.limit:
+            output = self.limit
+            if error < 0.0:
+                self.integral = integral  # Ошибка уводит из насыщения
+        elif output < -self.limit:
+            output = -self.limit
+            if error > 0.0:
+                self.integral = integral
+        else:
+            self.integral = integral
+        return output
+
+    def reset(self):
+        self.integral = 0.0
+        self._last_error = None
+
+
+class WheelSpeedController:
+    """Поток регулирования скорости обоих колёс"""
+
+    def __init__(self, motor_output, encoders, estimators, gains, rate=100.0,
+                 priority=0):
+        """
+        motor_output: MotorOutputStage
+        encoders: (левый, правый) EncoderCounter
+        estimators: (левый, правый) WheelVelocityEstimator
+        gains: dict kp, ki, kd, kff, offset для PidController
+        rate: частота цикла (Гц), ограничивается 50-200
+        priority: приоритет SCHED_FIFO (0 - обычный планировщик)
+        """
+        self.motor_output = motor_output
+        self.encoders = encoders
+        self.estimators = estimators
+        self.pids = (PidController(**gains), PidController(**gains))
+        self.period = 1.0 / min(max(rate, MIN_RATE), MAX_RATE)
+        self.priority = priority
+        self.realtime = False
+
+        self.lock = threading.Lock()
+        self._target = (0.0, 0.0)
+        self._running = False
+        self._thread = None
+
+        # Метрики
+        self.loops = 0
+        self.overruns = 0          # Пропущенные периоды
+        self.jitter_us = FixedHistogram()     # Опоздание пробуждения от дедлайна
+        self.exec_us = FixedHistogram()
+        self.tracking_mm_s = FixedHistogram()  # |уставка - скорость| по колёсам
+        self.measured = (0.0, 0.0)
+        self._window_loops = 0
+        self._window_start = clock.monotonic()
+
+    def set_target(self, left, right):
+        """Уставка скоростей колёс (м/с)"""
+        with self.lock:
+            self._target = (left, right)
+
+    def start(self):
+        """Запустить поток регулятора"""
+        self._running = True
+        self._thread = threading.Thread(target=self._control_loop, name='wheel_controller')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Остановить поток (моторы отпускает выходной каскад)"""
+        self._running = False
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+    def stats(self):
+        """Метрики цикла за окно с прошлого вызова"""
+        now = clock.monotonic()
+        window = max(now - self._window_start, 1e-9)
+        result = {
+            'rate_hz': round(self._window_loops / window, 2),
+            'loops': self.loops,
+            'overruns': self.overruns,
+            'realtime': self.realtime,
+            'jitter_p50_us': self.jitter_us.percentile(0.5),
+            'jitter_p99_us': self.jitter_us.percentile(0.99),
+            'jitter_max_us': self.jitter_us.max,
+            'exec_p99_us': self.exec_us.percentile(0.99),
+            'tracking_p50_mm_s': self.tracking_mm_s.percentile(0.5),
+            'tracking_p99_mm_s': self.tracking_mm_s.percentile(0.99),
+        }
+        self._window_loops = 0
+        self._window_start = now
+        self.jitter_us.reset()
+        self.exec_us.reset()
+        self.tracking_mm_s.reset()
+        return result
+
+    def _set_realtime(self):
+        """SCHED_FIFO для текущего потока (нужны права CAP_SYS_NICE)"""
+        self.realtime, _ = configure_thread(0, self.priority)
+
+    def _control_loop(self):
+        """Цикл по абсолютным дедлайнам: ошибка сна не накапливается"""
+        self._set_realtime()
+        monotonic = clock.monotonic
+        period = self.period
+        deadline = monotonic() + period
+        last = deadline - period
+        while self._running:
+            delay = deadline - monotonic()
+            if delay > 0.0:
+                clock.sleep(delay)
+            now = monotonic()
+            late = now - deadline
+            if late > period:
+                # Пропущены периоды - дедлайны заново от текущего момента
+                self.overruns += int(late / period)
+                deadline = now
+            self.jitter_us.record(late * 1e6 if late > 0.0 else 0)
+
+            # Реальный шаг: при опоздании интегратор не недосчитывает
+            self._step(now, now - last)
+            last = now
+            self.exec_us.record((monotonic() - now) * 1e6)
+            self.loops += 1
+            self._window_loops += 1
+            deadline += period
+
+    def _step(self, now, dt):
+        """Один шаг регулирования обоих колёс"""
+        with self.lock:
+            target = self._target
+        command = []
+        measured = []
+        for i in (0, 1):
+            setpoint = target[i]
+            speed = self.estimators[i].estimate(now)
+            measured.append(speed)
+            self.tracking_mm_s.record(abs(setpoint - speed) * 1000.0)
+            if setpoint == 0.0:
+                self.pids[i].reset()
+                command.append((Raspi_MotorHAT.RELEASE, 0))
+                continue
+            output = self.pids[i].update(setpoint, speed, dt)
+            pwm = int(abs(output))
+            if output >= 0.0:
+                mode, direction = Raspi_MotorHAT.FORWARD, 1
+            else:
+                mode, direction = Raspi_MotorHAT.BACKWARD, -1
+            self.encoders[i].set_direction(direction)
+            command.append((mode, pwm if pwm < PWM_MAX else PWM_MAX))
+        self.measured = (measured[0], measured[1])
+        self.motor_output.apply(command[0], command[1])
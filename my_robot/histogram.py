@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Гистограмма фиксированного размера для метрик задержек
+
+Логарифмические корзины (4 на октаву): память не растёт, запись -
+несколько арифметических операций. Без зависимостей от ROS, поэтому
+годится и для потоков железа, и для бенчмарков без робота.
+"""
+
+from array import array
+
+_SUB_BUCKETS = 4
+_LINEAR = 8
+_OCTAVES = 32
+_BUCKETS = _LINEAR + (_OCTAVES - 3) * _SUB_BUCKETS
+
+
+class FixedHistogram:
+    """Гистограмма целых значений (мкс) с относительной точностью ~25%"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = array('L', bytes(array('L').itemsize * _BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def _index(value):
+        if value < _LINEAR:
+            return value if value > 0 else 0
+        bits = value.bit_length()
+        index = _LINEAR + (bits - 4) * _SUB_BUCKETS + ((value >> (bits - 3)) & 3)
+        return index if index < _BUCKETS else _BUCKETS - 1
+
+    @staticmethod
+    def _upper_bound(index):
+        if index < _LINEAR:
+            return index
+        octave, sub = divmod(index - _LINEAR, _SUB_BUCKETS)
+        return ((5 + sub) << (octave + 1)) - 1
+
+    def record(self, value):
+        """Добавить значение (целое, обычно микросекунды)"""
+        value = int(value)
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """Оценка перцентиля (верхняя граница корзины, не больше max)"""
+        if self.count == 0:
+            return 0
+        rank = fraction * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self):
+        for i in range(_BUCKETS):
+            self.counts[i] = 0
+        self.count = 0
+        self.total = 0
+        self.max = 0
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Occupancy Mapper Node для ROS2 робота
+Карта занятости по ультразвуковым датчикам и одометрии
+
+Функции:
+- Конусы /sensors/distance (left, right, front) с позой из /odom
+  накапливаются в разреженной log-odds карте (SparseLogOddsGrid)
+- pose_source='shm': поза - снимок канала разделяемой памяти hardware_node
+  на момент измерения (my_robot.pose_channel), без подписки на /odom
+- Полная карта nav_msgs/OccupancyGrid в /map (при росте границ и
+  раз в map_publish_period)
+- Инкрементальные обновления изменённых плиток в /map_updates
+  (map_msgs/OccupancyGridUpdate, как ожидает RViz)
+"""
+
+import math
+from array import array
+
+import rclpy
+from rclpy.node import Node
+from rclpy.qos import QoSDurabilityPolicy, QoSProfile
+from map_msgs.msg import OccupancyGridUpdate
+from nav_msgs.msg import OccupancyGrid
+from nav_msgs.msg import Odometry as NavOdometry
+from sensor_msgs.msg import Range
+
+from my_robot.diagnostics import CallbackDiagnostics
+from my_robot.mapping.occupancy_grid import SENSOR_MOUNTS, SparseLogOddsGrid
+from my_robot.pose_channel import PoseReader, default_path
+from my_robot.profiler_service import ProfilerService
+
+
+class OccupancyMapperNode(Node):
+    def __init__(self):
+        super().__init__('occupancy_mapper')
+
+        self.declare_parameter('map_resolution', 0.05)      # Размер клетки (м)
+        self.declare_parameter('map_tile_size', 32)         # Сторона плитки (клеток)
+        self.declare_parameter('map_frame', 'odom')
+        self.declare_parameter('frame_prefix', '')          # Префикс кадров робота, например 'robot1/'
+        self.declare_parameter('map_update_period', 0.5)    # Период /map_updates (с)
+        self.declare_parameter('map_publish_period', 5.0)   # Период полной карты /map (с)
+        self.declare_parameter('diagnostics_period', 2.0)   # Период /diagnostics (с), 0 - выкл
+        self.declare_parameter('pose_source', 'odom')       # 'odom' - подписка, 'shm' - канал позы hardware_node
+        self.declare_parameter('pose_shm', 'auto')          # Файл канала позы, 'auto' - по пространству имён
+        self.declare_parameter('pose_max_age', 0.5)         # Поза старше (с) не используется
+
+        self.grid = SparseLogOddsGrid(
+            self.get_parameter('map_resolution').value,
+            self.get_parameter('map_tile_size').value)
+        self.frame = self.get_parameter('frame_prefix').value + self.get_parameter('map_frame').value
+        self.pose = None             # (x, y, theta) из /odom
+        self.published_bounds = None
+        self.changed_since_full = False
+
+        self.diagnostics = CallbackDiagnostics(
+            self, self.get_parameter('diagnostics_period').value)
+        instrument = self.diagnostics.instrument
+        self.diagnostics.add_source('occupancy_grid', self.grid_stats)
+
+        self.pose_reader = None
+        if self.get_parameter('pose_source').value == 'shm':
+            pose_shm = self.get_parameter('pose_shm').value
+            self.pose_reader = PoseReader(
+                default_path(self.get_namespace()) if pose_shm == 'auto' else pose_shm)
+            self.pose_max_age = self.get_parameter('pose_max_age').value
+        else:
+            self.create_subscription(NavOdometry, 'odom', self.odom_callback, 10)
+        self.create_subscription(
+            Range, 'sensors/distance', instrument('range_callback', self.range_callback), 10)
+
+        # Полная карта - с сохранением для поздних подписчиков
+        map_qos = QoSProfile(depth=1, durability=QoSDurabilityPolicy.TRANSIENT_LOCAL)
+        self.map_pub = self.create_publisher(OccupancyGrid, 'map', map_qos)
+        self.update_pub = self.create_publisher(OccupancyGridUpdate, 'map_updates', 10)
+
+        update_period = self.get_parameter('map_update_period').value
+        self.create_timer(update_period, instrument(
+            'publish_updates', self.publish_updates, update_period))
+        publish_period = self.get_parameter('map_publish_period').value
+        self.create_timer(publish_period, instrument(
+            'publish_full', self.publish_full, publish_period))
+
+        self.map_msg = OccupancyGrid()
+        self.map_msg.header.frame_id = self.frame
+        self.map_msg.info.resolution = self.grid.resolution
+        self.map_msg.info.origin.orientation.w = 1.0
+        self.update_msg = OccupancyGridUpdate()
+        self.update_msg.header.frame_id = self.frame
+        self.profiler_service = ProfilerService(self)  # ~/profile
+
+        self.get_logger().info('Occupancy Mapper запущен')
+
+    def odom_callback(self, msg):
+        pose = msg.pose.pose
+        q = pose.orientation
+        theta = math.atan2(2.0 * (q.w * q.z + q.x * q.y), 1.0 - 2.0 * (q.y * q.y + q.z * q.z))
+        self.pose = (pose.position.x, pose.position.y, theta)
+
+    def range_callback(self, msg):
+        """Конус датчика в карту"""
+        if self.pose_reader is not None:
+            snapshot = self.pose_reader.read(self.pose_max_age)
+            self.pose = None if snapshot is None else (snapshot.x, snapshot.y, snapshot.theta)
+        if self.pose is None or msg.range < msg.min_range:
+            return
+        frame = msg.header.frame_id.rsplit('/', 1)[-1]  # Без префикса робота
+        mount = SENSOR_MOUNTS.get(frame.replace('_sensor', ''))
+        if mount is None:
+            return
+        x, y, theta = self.pose
+        mx, my, myaw = mount
+        cos_t, sin_t = math.cos(theta), math.sin(theta)
+        self.grid.update_cone(
+            x + mx * cos_t - my * sin_t,
+            y + mx * sin_t + my * cos_t,
+            theta + myaw,
+            msg.range, msg.field_of_view, msg.max_range)
+        self.changed_since_full = True
+
+    def publish_updates(self):
+        """Изменённые плитки одним прямоугольником в /map_updates"""
+        dirty = self.grid.take_dirty()
+        if not dirty:
+            return
+        bounds = self.grid.bounds()
+        if bounds != self.published_bounds:
+            # Карта выросла - обновление не помещается, нужна полная
+            self.publish_full()
+            return
+        tx0 = min(t[0] for t in dirty)
+        ty0 = min(t[1] for t in dirty)
+        tx1 = max(t[0] for t in dirty)
+        ty1 = max(t[1] for t in dirty)
+        data = self.grid.render(tx0, ty0, tx1, ty1)
+        size = self.grid.tile_size
+        msg = self.update_msg
+        msg.header.stamp = self.get_clock().now().to_msg()
+        msg.x = (tx0 - bounds[0]) * size
+        msg.y = (ty0 - bounds[1]) * size
+        msg.height, msg.width = data.shape
+        msg.data = array('b', data.tobytes())
+        self.update_pub.publish(msg)
+
+    def publish_full(self):
+        """Полная карта по охватывающему прямоугольнику плиток"""
+        bounds = self.grid.bounds()
+        if bounds is None or (bounds == self.published_bounds and not self.changed_since_full):
+            return
+        self.grid.take_dirty()
+        data = self.grid.render(*bounds)
+        size = self.grid.tile_size
+        msg = self.map_msg
+        msg.header.stamp = self.get_clock().now().to_msg()
+        msg.info.map_load_time = msg.header.stamp
+        msg.info.height, msg.info.width = data.shape
+        msg.info.origin.position.x = bounds[0] * size * self.grid.resolution
+        msg.info.origin.position.y = bounds[1] * size * self.grid.resolution
+        msg.data = array('b', data.tobytes())
+        self.map_pub.publish(msg)
+        self.published_bounds = bounds
+        self.changed_since_full = False
+
+    def grid_stats(self):
+        """Размер карты для /diagnostics"""
+        bounds = self.grid.bounds()
+        cells = 0
+        if bounds is not None:
+            cells = (bounds[2] - bounds[0] + 1) * (bounds[3] - bounds[1] + 1) * self.grid.tile_size ** 2
+        return {
+            'updates': self.grid.updates,
+            'tiles': len(self.grid.tiles),
+            'memory_bytes': self.grid.memory_bytes(),
+            'bounding_box_bytes': cells * 4,
+        }
+
+
+def main(args=None):
+    rclpy.init(args=args)
+    node = OccupancyMapperNode()
+    try:
+        rclpy.spin(node)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
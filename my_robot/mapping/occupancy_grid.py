@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Разреженная карта занятости в log-odds
+
+Карта хранится плитками tile_size x tile_size клеток (float32), плитка
+создаётся при первом попадании в неё конуса датчика, поэтому память
+растёт с исследованной площадью, а не с охватывающим прямоугольником.
+Обновление конуса ультразвукового датчика векторизовано: для клеток
+прямоугольника, охватывающего конус, расстояние и пеленг считаются
+массивами NumPy, затем приращение раскладывается по плиткам срезами.
+
+Изменённые плитки помечаются, чтобы публиковать только их
+(map_msgs/OccupancyGridUpdate).
+"""
+
+import math
+
+import numpy as np
+
+# Расположение датчиков на роботе: (x, y, yaw) относительно base_footprint
+SENSOR_MOUNTS = {
+    'left': (0.05, 0.04, 0.6),
+    'right': (0.05, -0.04, -0.6),
+    'front': (0.06, 0.0, 0.0),
+}
+
+
+class SparseLogOddsGrid:
+    """Карта занятости из лениво создаваемых плиток"""
+
+    def __init__(self, resolution=0.05, tile_size=32, l_occupied=0.85,
+                 l_free=-0.4, l_min=-4.0, l_max=4.0):
+        """
+        resolution: размер клетки (м)
+        tile_size: сторона плитки в клетках
+        l_occupied, l_free: приращения log-odds для препятствия и свободной клетки
+        l_min, l_max: ограничение log-odds (карта не "застывает")
+        """
+        self.resolution = resolution
+        self.tile_size = tile_size
+        self.l_occupied = l_occupied
+        self.l_free = l_free
+        self.l_min = l_min
+        self.l_max = l_max
+        self.tiles = {}      # (tx, ty) -> ndarray [y, x]
+        self.dirty = set()   # Плитки, изменённые с последней выборки
+        self.updates = 0
+
+    def update_cone(self, x, y, yaw, distance, fov, max_range):
+        """
+        Учесть одно измерение конуса
+        x, y, yaw: положение и направление датчика в карте
+        distance: измеренное расстояние (>= max_range - препятствия нет)
+        """
+        res = self.resolution
+        hit = distance < max_range
+        reach = min(distance, max_range) + (res if hit else 0.0)
+        half = fov * 0.5
+
+        # Прямоугольник клеток, охватывающий конус
+        corners_x = [x]
+        corners_y = [y]
+        for angle in (yaw - half, yaw, yaw + half):
+            corners_x.append(x + reach * math.cos(angle))
+            corners_y.append(y + reach * math.sin(angle))
+        ix0 = math.floor(min(corners_x) / res)
+        ix1 = math.floor(max(corners_x) / res) + 1
+        iy0 = math.floor(min(corners_y) / res)
+        iy1 = math.floor(max(corners_y) / res) + 1
+
+        # Расстояние и пеленг центров клеток относительно датчика
+        cx = (np.arange(ix0, ix1, dtype=np.float32) + 0.5) * res - x
+        cy = (np.arange(iy0, iy1, dtype=np.float32) + 0.5) * res - y
+        dx = cx[np.newaxis, :]
+        dy = cy[:, np.newaxis]
+        dist = np.hypot(dx, dy)
+        bearing = np.arctan2(dy, dx) - yaw
+        bearing = (bearing + np.pi) % (2 * np.pi) - np.pi
+        inside = np.abs(bearing) <= half
+
+        delta = np.zeros(dist.shape, dtype=np.float32)
+        delta[inside & (dist < distance - res * 0.5)] = self.l_free
+        if hit:
+            delta[inside & (np.abs(dist - distance) <= res * 0.5)] = self.l_occupied
+        self._apply(ix0, iy0, delta)
+        self.updates += 1
+
+    def _apply(self, ix0, iy0, delta):
+        """Разложить приращение по плиткам (создавая их при необходимости)"""
+        size = self.tile_size
+        height, width = delta.shape
+        ty0, ty1 = iy0 // size, (iy0 + height - 1) // size
+        tx0, tx1 = ix0 // size, (ix0 + width - 1) // size
+        for ty in range(ty0, ty1 + 1):
+            # Пересечение плитки и прямоугольника в координатах delta
+            y_lo = max(ty * size, iy0)
+            y_hi = min((ty + 1) * size, iy0 + height)
+            for tx in range(tx0, tx1 + 1):
+                x_lo = max(tx * size, ix0)
+                x_hi = min((tx + 1) * size, ix0 + width)
+                part = delta[y_lo - iy0:y_hi - iy0, x_lo - ix0:x_hi - ix0]
+                if not part.any():
+                    continue
+                tile = self.tiles.get((tx, ty))
+                if tile is None:
+                    tile = np.zeros((size, size), dtype=np.float32)
+                    self.tiles[(tx, ty)] = tile
+                view = tile[y_lo - ty * size:y_hi - ty * size, x_lo - tx * size:x_hi - tx * size]
+                view += part
+                np.clip(view, self.l_min, self.l_max, out=view)
+                self.dirty.add((tx, ty))
+
+    def bounds(self):
+        """Охватывающий прямоугольник плиток (tx0, ty0, tx1, ty1) или None"""
+        if not self.tiles:
+            return None
+        keys = self.tiles.keys()
+        return (min(k[0] for k in keys), min(k[1] for k in keys),
+                max(k[0] for k in keys), max(k[1] for k in keys))
+
+    def take_dirty(self):
+        """Изменённые плитки с последнего вызова"""
+        dirty = self.dirty
+        self.dirty = set()
+        return dirty
+
+    @staticmethod
+    def to_occupancy(log_odds):
+        """log-odds -> int8 0..100, -1 для неизвестных клеток"""
+        probability = 1.0 - 1.0 / (1.0 + np.exp(log_odds))
+        occupancy = (probability * 100.0).astype(np.int8)
+        occupancy[log_odds == 0.0] = -1
+        return occupancy
+
+    def render(self, tx0, ty0, tx1, ty1):
+        """Массив занятости int8 [y, x] для прямоугольника плиток"""
+        size = self.tile_size
+        grid = np.full(((ty1 - ty0 + 1) * size, (tx1 - tx0 + 1) * size), -1, dtype=np.int8)
+        for (tx, ty), tile in self.tiles.items():
+            if tx0 <= tx <= tx1 and ty0 <= ty <= ty1:
+                row = (ty - ty0) * size
+                col = (tx - tx0) * size
+                grid[row:row + size, col:col + size] = self.to_occupancy(tile)
+        return grid
+
+    def memory_bytes(self):
+        """Память плиток (байт)"""
+        return sum(tile.nbytes for tile in self.tiles.values())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Поза робота через разделяемую память (seqlock) для процессов той же машины
+
+HardwareNode пишет в файл /dev/shm последнюю позу, скорость и метку
+времени каждой /odom. Читатель отображает файл в память один раз, дальше
+чтение - копия 68 байт из отображения и проверка, без системных вызовов,
+блокировок и десериализации DDS.
+
+Формат (96 байт, little-endian):
+    0   magic: 8s          - MYRBPOS1
+    8   size: uint32       - размер записи позы (проверка версии формата)
+    12  pid: uint32        - процесс писателя, 0 - писатель остановлен
+    16  seq: uint64        - счётчик seqlock: нечётный - запись идёт
+    24  generation: uint64 - номер запуска писателя (поза могла начаться заново)
+    32  stamp_ns: int64    - время ROS позы (как header.stamp /odom)
+    40  monotonic: float64 - time.monotonic() записи (свежесть между процессами)
+    48  x, y, theta, vx, wz: float64
+    88  crc: uint32        - crc32 записи с начальным значением seq
+
+Писатель: seq+1 (нечётный), запись, crc, seq+1. Читатель берёт seq,
+запись и seq ещё раз; нечётный или изменившийся seq - повтор. Python не
+ставит барьеров памяти, поэтому на слабо упорядоченной памяти (ARM)
+порядок записей может быть виден другому ядру иначе - склеенный снимок
+отсекает crc. Если писатель вытеснен посреди записи и попытки кончились,
+читатель не ждёт, а возвращает предыдущий согласованный снимок.
+
+Перезапуск писателя: существующий файл переиспользуется (читатели
+продолжают со своим отображением), незаконченная запись упавшего
+писателя закрывается, generation растёт. Если файл пересоздан (новый
+inode), читатель замечает это по устаревшей позе и отображает его заново.
+"""
+
+import collections
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+
+MAGIC = b'MYRBPOS1'
+HEADER = struct.Struct('<8sII')
+SEQ = struct.Struct('<Q')
+POSE = struct.Struct('<Qqdddddd')
+CRC = struct.Struct('<I')
+SEQ_OFFSET = 16
+POSE_OFFSET = 24
+CRC_OFFSET = POSE_OFFSET + POSE.size
+SIZE = 96
+
+PoseSnapshot = collections.namedtuple(
+    'PoseSnapshot', 'generation stamp_ns monotonic x y theta vx wz')
+
+
+def default_path(namespace=''):
+    """Файл канала робота: /dev/shm/my_robot_pose[_пространство_имён]"""
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    suffix = namespace.strip('/').replace('/', '_')
+    return os.path.join(directory, f'my_robot_pose_{suffix}' if suffix else 'my_robot_pose')
+
+
+def _valid(mem):
+    magic, size, _ = HEADER.unpack_from(mem, 0)
+    return magic == MAGIC and size == POSE.size
+
+
+class PoseWriter:
+    """Запись позы (один писатель на файл)"""
+
+    def __init__(self, path):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != SIZE:
+                os.ftruncate(fd, SIZE)
+            self._mem = mmap.mmap(fd, SIZE)
+        finally:
+            os.close(fd)
+        mem = self._mem
+        generation = 0
+        seq = 0
+        if _valid(mem):
+            # Перезапуск: читатели остаются на том же файле
+            seq = SEQ.unpack_from(mem, SEQ_OFFSET)[0]
+            generation = POSE.unpack_from(mem, POSE_OFFSET)[0]
+            if seq & 1:
+                seq += 1  # Писатель упал посреди записи
+                SEQ.pack_into(mem, SEQ_OFFSET, seq)
+        else:
+            SEQ.pack_into(mem, SEQ_OFFSET, 0)
+        HEADER.pack_into(mem, 0, MAGIC, POSE.size, os.getpid())
+        self._seq = seq
+        self.generation = generation + 1
+        self._buf = bytearray(POSE.size)
+        self.writes = 0
+
+    def write(self, stamp_ns, x, y, theta, vx, wz):
+        """Новая поза (stamp_ns - время ROS), видна читателям сразу"""
+        mem = self._mem
+        buf = self._buf
+        seq = self._seq
+        POSE.pack_into(buf, 0, self.generation, stamp_ns, time.monotonic(), x, y, theta, vx, wz)
+        SEQ.pack_into(mem, SEQ_OFFSET, seq + 1)
+        mem[POSE_OFFSET:CRC_OFFSET] = buf
+        CRC.pack_into(mem, CRC_OFFSET, zlib.crc32(buf, (seq + 2) & 0xFFFFFFFF))
+        SEQ.pack_into(mem, SEQ_OFFSET, seq + 2)
+        self._seq = seq + 2
+        self.writes += 1
+
+    def close(self):
+        """Писатель остановлен (pid = 0); файл остаётся для читателей"""
+        if self._mem is not None:
+            HEADER.pack_into(self._mem, 0, MAGIC, POSE.size, 0)
+            self._mem.close()
+            self._mem = None
+
+
+class PoseReader:
+    """Чтение последней позы без системных вызовов и блокировок"""
+
+    def __init__(self, path, stale_after=1.0, retries=8):
+        """
+        stale_after: поза старше (с) - проверить, не пересоздан ли файл
+        retries: попыток на снимок, пока писатель пишет
+        """
+        self.path = path
+        self.stale_after = stale_after
+        self.retries = retries
+        self.retried = 0     # Повторы из-за идущей записи
+        self.rejected = 0    # Снимки, отброшенные по crc
+        self._mem = None
+        self._inode = None
+        self._next_check = 0.0
+        self._last = None    # Последний согласованный снимок
+        self._open()
+
+    def _open(self):
+        """Отобразить файл (если писатель уже создал его)"""
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            stat = os.fstat(fd)
+            if stat.st_size < SIZE:
+                return
+            mem = mmap.mmap(fd, SIZE, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        if not _valid(mem):
+            mem.close()
+            return
+        if self._mem is not None:
+            self._mem.close()
+        self._mem = mem
+        self._inode = stat.st_ino
+        self._last = None
+
+    def _reopen_if_replaced(self, now):
+        """Раз в stale_after: файл пересоздан или появился - отобразить заново"""
+        if now < self._next_check:
+            return
+        self._next_check = now + self.stale_after
+        try:
+            inode = os.stat(self.path).st_ino
+        except OSError:
+            return
+        if inode != self._inode:
+            self._open()
+
+    @property
+    def writer_pid(self):
+        """pid писателя (0 - остановлен, None - файла нет)"""
+        if self._mem is None:
+            return None
+        return HEADER.unpack_from(self._mem, 0)[2]
+
+    def read(self, max_age=None):
+        """
+        Последний согласованный снимок PoseSnapshot или None
+        (писатель ещё ничего не записал или поза старше max_age с)
+        """
+        mem = self._mem
+        snapshot = self._last
+        if mem is not None:
+            for _ in range(self.retries):
+                seq = SEQ.unpack_from(mem, SEQ_OFFSET)[0]
+                if seq & 1:
+                    self.retried += 1
+                    continue
+                data = mem[POSE_OFFSET:CRC_OFFSET + CRC.size]
+                if SEQ.unpack_from(mem, SEQ_OFFSET)[0] != seq:
+                    self.retried += 1
+                    continue
+                if seq == 0:
+                    break  # Писатель ещё ничего не записал
+                if zlib.crc32(data[:POSE.size], seq & 0xFFFFFFFF) != CRC.unpack_from(data, POSE.size)[0]:
+                    self.rejected += 1
+                    continue
+                snapshot = self._last = PoseSnapshot._make(POSE.unpack_from(data))
+                break
+
+        now = time.monotonic()
+        if snapshot is None or now - snapshot.monotonic > self.stale_after:
+            self._reopen_if_replaced(now)
+            if self._mem is not mem:
+                return self.read(max_age)  # Файл отображён заново - читаем из него
+        if snapshot is not None and max_age is not None and now - snapshot.monotonic > max_age:
+            return None
+        return snapshot
+
+    def close(self):
+        if self._mem is not None:
+            self._mem.close()
+            self._mem = None
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Выборочный профилировщик стеков всех потоков процесса
+
+Фоновый поток раз в interval снимает стеки всех потоков Python
+(sys._current_frames: потоки энкодеров, сонара, executor'а) и считает
+одинаковые стеки. Подписи кадров кешируются по объекту кода, поэтому
+выборка - проход по кадрам и одно обращение к словарю на кадр. Запись
+результата - в том же фоновом потоке, executor узла не блокируется.
+
+Процессорное время по потокам (включая потоки DDS без Python-стека)
+берётся из /proc/self/task/<tid>/stat в начале и в конце профиля.
+
+Форматы: 'collapsed' (строки "поток;f1;f2 N" для flamegraph.pl и
+speedscope) и 'speedscope' (JSON, профиль на каждый поток).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+FORMATS = {'collapsed': 'collapsed', 'speedscope': 'speedscope.json'}
+
+
+def thread_cpu_times():
+    """{tid: (имя потока ядра, процессорное время с)} по /proc/self/task"""
+    result = {}
+    try:
+        tids = os.listdir('/proc/self/task')
+    except OSError:
+        return result
+    for tid in tids:
+        try:
+            with open(f'/proc/self/task/{tid}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue  # Поток завершился
+        comm = stat[stat.index('(') + 1:stat.rindex(')')]
+        fields = stat.rsplit(')', 1)[1].split()
+        result[int(tid)] = (comm, (int(fields[11]) + int(fields[12])) / CLOCK_TICKS)
+    return result
+
+
+class SamplingProfiler:
+    """Выборка стеков в фоновом потоке на заданное время"""
+
+    def __init__(self, interval=0.01):
+        """interval: период выборки (с)"""
+        self.interval = interval
+        self.result = None        # Итог последнего профиля (dict)
+        self.on_done = None       # Колбэк result -> None (из потока профилировщика)
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration, path, fmt='collapsed'):
+        """Начать профиль на duration с с записью в path"""
+        if self.running:
+            raise RuntimeError('Профилирование уже идёт')
+        if fmt not in FORMATS:
+            raise ValueError(f'Неизвестный формат {fmt!r}')
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(duration, path, fmt), name='profiler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Остановить досрочно и дождаться записи; итог или None"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.result
+
+    def _run(self, duration, path, fmt):
+        own = threading.get_ident()
+        codes = {}        # Объект кода -> индекс подписи
+        frames = []       # (функция, файл, строка)
+        counts = {}       # (имя потока, индексы кадров...) -> число выборок
+        samples = 0
+        cpu_start = thread_cpu_times()
+        wall_start = time.monotonic()
+        deadline = wall_start + duration
+
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    index = codes.get(code)
+                    if index is None:
+                        index = codes[code] = len(frames)
+                        frames.append((getattr(code, 'co_qualname', code.co_name),
+                                       code.co_filename, code.co_firstlineno))
+                    stack.append(index)
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stack.reverse()
+                key = tuple(stack)
+                counts[key] = counts.get(key, 0) + 1
+            samples += 1
+
+        wall = time.monotonic() - wall_start
+        threads = self._cpu_breakdown(cpu_start, thread_cpu_times(), wall)
+        try:
+            if fmt == 'speedscope':
+                self._write_speedscope(path, frames, counts, wall)
+            else:
+                self._write_collapsed(path, frames, counts)
+            error = None
+        except OSError as e:
+            error = str(e)
+        self.result = {
+            'path': path if error is None else None,
+            'error': error,
+            'duration': round(wall, 3),
+            'samples': samples,
+            'threads': threads,
+        }
+        if self.on_done is not None:
+            self.on_done(self.result)
+
+    @staticmethod
+    def _cpu_breakdown(start, end, wall):
+        """[(имя, процессорное время с, % от одного ядра)] по убыванию"""
+        names = {thread.native_id: thread.name for thread in threading.enumerate()}
+        rows = []
+        for tid, (comm, cpu) in end.items():
+            used = cpu - start.get(tid, (comm, 0.0))[1]
+            name = names.get(tid, comm)
+            rows.append((name, round(used, 3), round(used / wall * 100.0, 1) if wall > 0 else 0.0))
+        rows.sort(key=lambda row: -row[1])
+        return rows
+
+    @staticmethod
+    def _label(frame):
+        function, filename, line = frame
+        return f'{function} ({os.path.basename(filename)}:{line})'
+
+    def _write_collapsed(self, path, frames, counts):
+        labels = [self._label(frame).replace(';', ':') for frame in frames]
+        with open(path, 'w') as f:
+            for key, count in counts.items():
+                thread = key[0].replace(';', ':').replace(' ', '_')
+                stack = ';'.join(labels[index] for index in key[1:])
+                f.write(f'{thread};{stack} {count}\n' if stack else f'{thread} {count}\n')
+
+    def _write_speedscope(self, path, frames, counts, wall):
+        per_thread = {}
+        for key, count in counts.items():
+            samples, weights = per_thread.setdefault(key[0], ([], []))
+            samples.append(list(key[1:]))
+            weights.append(count * self.interval)
+        document = {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'exporter': 'my_robot.profiler',
+            'name': os.path.basename(path),
+            'shared': {'frames': [{'name': function, 'file': filename, 'line': line}
+                                  for function, filename, line in frames]},
+            'profiles': [{
+                'type': 'sampled',
+                'name': thread,
+                'unit': 'seconds',
+                'startValue': 0.0,
+                'endValue': wall,
+                'samples': samples,
+                'weights': weights,
+            } for thread, (samples, weights) in per_thread.items()],
+        }
+        with open(path, 'w') as f:
+            json.dump(document, f)
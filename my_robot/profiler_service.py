@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Сервис профилирования узла: ~/profile (std_srvs/SetBool)
+
+data=true - начать профиль на profile_duration с (ответ сразу, выборка и
+запись идут в фоновом потоке, колбэки узла не ждут); data=false -
+остановить досрочно и вернуть итог последнего профиля: файл и
+процессорное время по потокам. Итог также пишется в лог.
+
+Профилировщик один на процесс: в составном режиме сервисы всех узлов
+управляют одним и тем же профилем.
+
+    ros2 service call /hardware_node/profile std_srvs/srv/SetBool '{data: true}'
+    ros2 service call /hardware_node/profile std_srvs/srv/SetBool '{data: false}'
+"""
+
+import os
+import tempfile
+import time
+
+from std_srvs.srv import SetBool
+
+from my_robot.profiler import FORMATS, SamplingProfiler
+
+_profiler = None
+
+
+def process_profiler():
+    """Общий профилировщик процесса"""
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler()
+    return _profiler
+
+
+def format_result(result):
+    """Итог профиля одной строкой для ответа и лога"""
+    if result is None:
+        return 'Профилей ещё не было'
+    threads = ', '.join(f'{name}={cpu:.2f}с/{percent:.0f}%'
+                        for name, cpu, percent in result['threads'] if cpu > 0)
+    target = result['path'] or f'ошибка записи: {result["error"]}'
+    return (f'{target}; {result["samples"]} выборок за {result["duration"]:.1f} с; '
+            f'CPU по потокам: {threads or "нет"}')
+
+
+class ProfilerService:
+    """Параметры profile_* и сервис ~/profile узла"""
+
+    def __init__(self, node, callback_group=None):
+        self.node = node
+        node.declare_parameter('profile_duration', 10.0)    # Длительность профиля (с)
+        node.declare_parameter('profile_interval', 0.01)    # Период выборки стеков (с)
+        node.declare_parameter('profile_format', 'collapsed')  # 'collapsed' или 'speedscope'
+        node.declare_parameter('profile_dir', os.path.join(tempfile.gettempdir(), 'my_robot_profiles'))
+        self.service = node.create_service(SetBool, '~/profile', self.callback,
+                                           callback_group=callback_group)
+
+    def callback(self, request, response):
+        profiler = process_profiler()
+        if not request.data:
+            response.success = profiler.result is not None
+            response.message = format_result(profiler.stop())
+            return response
+
+        get = self.node.get_parameter
+        fmt = get('profile_format').value
+        directory = get('profile_dir').value
+        path = os.path.join(directory, f'{self.node.get_name()}-{time.strftime("%Y%m%d-%H%M%S")}'
+                                       f'.{FORMATS.get(fmt, fmt)}')
+        duration = get('profile_duration').value
+        try:
+            os.makedirs(directory, exist_ok=True)
+            profiler.interval = get('profile_interval').value
+            profiler.on_done = self.on_done
+            profiler.start(duration, path, fmt)
+        except (OSError, RuntimeError, ValueError) as e:
+            response.success = False
+            response.message = str(e)
+            return response
+        response.success = True
+        response.message = f'Профилирование {duration:.0f} с -> {path}'
+        return response
+
+    def on_done(self, result):
+        self.node.get_logger().info(f'Профиль готов: {format_result(result)}')
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Приоритет и привязка к ядрам потоков процесса
+
+Настройка потока ОС по его native_id (0 - текущий поток): SCHED_FIFO
+и sched_setaffinity. Только Linux; SCHED_FIFO нужны права CAP_SYS_NICE
+(или RLIMIT_RTPRIO). Без прав настройка пропускается, поток остаётся
+на обычном планировщике - вызывающий узнаёт это по результату.
+"""
+
+import os
+
+
+def parse_cpus(text):
+    """'2,3' или '2-3' -> {2, 3}; '' - пустое множество (без привязки)"""
+    cpus = set()
+    for part in text.replace(' ', '').split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def configure_thread(tid=0, priority=0, cpus=()):
+    """
+    SCHED_FIFO с priority (0 - не менять) и ядра cpus (пусто - не менять)
+    для потока tid; (realtime, pinned) - что удалось выставить
+    """
+    realtime = pinned = False
+    if priority > 0:
+        try:
+            os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(priority))
+            realtime = True
+        except (AttributeError, OSError):
+            pass
+    if cpus:
+        try:
+            os.sched_setaffinity(tid, cpus)
+            pinned = True
+        except (AttributeError, OSError, ValueError):
+            pass
+    return realtime, pinned
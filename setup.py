@@ -1,3 +1,5 @@
+from glob import glob
+
 from setuptools import find_packages, setup
 
 package_name = 'my_robot'
@@ -10,6 +12,7 @@ setup(
         ('share/ament_index/resource_index/packages',
             ['resource/' + package_name]),
         ('share/' + package_name, ['package.xml']),
+        ('share/' + package_name + '/launch', glob('launch/*.launch.py')),
     ],
     install_requires=['setuptools'],
     zip_safe=True,
@@ -23,6 +26,11 @@ setup(
         'hardware_node = my_robot.hardware.hardware_node:main',
         'room_explorer = my_robot.behaviors.room_explorer_node:main',
         'servo_controller = my_robot.hardware.servo_controller:main',
+        'occupancy_mapper = my_robot.mapping.mapping_node:main',
+        'robot_composed = my_robot.composed:main',
+        'replay_events = my_robot.hardware.replay:main',
+        'sim_clock = my_robot.hardware.hal.sim:main',
+        'explorer_sweep = my_robot.behaviors.explorer_sim:main',
     ],
   },
 )
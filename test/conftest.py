@@ -0,0 +1,8 @@
+"""Общая настройка тестов: симуляционный бэкенд и подмены из benchmark/"""
+
+import os
+import sys
+
+os.environ.setdefault('MY_ROBOT_BACKEND', 'sim')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'benchmark'))
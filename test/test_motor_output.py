@@ -0,0 +1,152 @@
+"""MotorOutputStage: дедупликация, слияние команд и блочная запись каналов"""
+
+import time
+
+from my_robot.hardware.motor_output import FULL, LED0_ON_L, MODE1, MODE1_AI
+from my_robot.hardware.motor_output import MOTOR_CHANNELS, MotorOutputStage
+import pytest
+from shims import FakeMotorHAT
+
+FORWARD = FakeMotorHAT.FORWARD
+BACKWARD = FakeMotorHAT.BACKWARD
+RELEASE = FakeMotorHAT.RELEASE
+
+
+def make_stage(max_rate=50.0):
+    hat = FakeMotorHAT()
+    stage = MotorOutputStage(hat, max_rate=max_rate, refresh_period=0.0)
+    return hat, stage
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def channel_words(block):
+    """Разбор блока: {канал: (on, off)}"""
+    reg, data = block
+    first = (reg - LED0_ON_L) // 4
+    words = {}
+    for i in range(0, len(data), 4):
+        on = data[i] | data[i + 1] << 8
+        off = data[i + 2] | data[i + 3] << 8
+        words[first + i // 4] = (on, off)
+    return words
+
+
+@pytest.fixture
+def running():
+    hat, stage = make_stage(max_rate=5.0)
+    stage.start()
+    yield hat, stage
+    stage.stop()
+
+
+def test_auto_increment_enabled_on_start():
+    hat, _ = make_stage()
+    assert hat._pwm.i2c.registers[MODE1] & MODE1_AI
+
+
+def test_first_write_is_one_block():
+    hat, stage = make_stage()
+    stage.apply((FORWARD, 100), (BACKWARD, 200))
+    i2c = hat._pwm.i2c
+    assert len(i2c.blocks) == 1
+    assert stage.i2c_writes == 1
+    pwm_l, in1_l, in2_l = MOTOR_CHANNELS[1]
+    pwm_r, in1_r, in2_r = MOTOR_CHANNELS[2]
+    words = channel_words(i2c.blocks[0])
+    # Непрерывный диапазон каналов обоих моторов (8..13)
+    assert sorted(words) == list(range(8, 14))
+    assert i2c.blocks[0][0] == LED0_ON_L + 4 * 8
+    assert words[pwm_l] == (0, 100 * 16)
+    assert words[in1_l] == (FULL, 0)
+    assert words[in2_l] == (0, FULL)
+    assert words[pwm_r] == (0, 200 * 16)
+    assert words[in1_r] == (0, FULL)
+    assert words[in2_r] == (FULL, 0)
+
+
+def test_block_covers_only_changed_channels():
+    hat, stage = make_stage()
+    stage.apply((FORWARD, 100), (FORWARD, 100))
+    i2c = hat._pwm.i2c
+
+    stage.apply((FORWARD, 120), (FORWARD, 100))  # Только ШИМ левого
+    assert channel_words(i2c.blocks[-1]) == {MOTOR_CHANNELS[1][0]: (0, 120 * 16)}
+
+    stage.apply((FORWARD, 120), (BACKWARD, 100))  # Только направление правого
+    _, in1, in2 = MOTOR_CHANNELS[2]
+    assert channel_words(i2c.blocks[-1]) == {in1: (0, FULL), in2: (FULL, 0)}
+    assert len(i2c.blocks) == 3
+
+
+def test_unchanged_channels_inside_range_keep_values():
+    hat, stage = make_stage()
+    stage.apply((FORWARD, 100), (FORWARD, 150))
+    # ШИМ левого (8) и правого (13): каналы 9..12 внутри блока - текущие
+    stage.apply((FORWARD, 110), (FORWARD, 160))
+    words = channel_words(hat._pwm.i2c.blocks[-1])
+    assert sorted(words) == list(range(8, 14))
+    assert words[MOTOR_CHANNELS[1][1]] == (FULL, 0)
+    assert words[MOTOR_CHANNELS[2][2]] == (0, FULL)
+
+
+def test_repeated_command_is_skipped(running):
+    hat, stage = running
+    command = ((FORWARD, 180), (FORWARD, 180))
+    stage.submit(*command)
+    assert wait_for(lambda: stage.i2c_writes == 1)
+    for _ in range(10):
+        stage.submit(*command)
+    time.sleep(0.05)
+    assert stage.skipped == 10
+    assert stage.i2c_writes == 1
+    assert len(hat._pwm.i2c.blocks) == 1
+
+
+def test_latest_command_wins(running):
+    hat, stage = running
+    stage.submit((FORWARD, 100), (FORWARD, 100))
+    assert wait_for(lambda: stage.i2c_writes == 1)
+    # Пока не прошёл min_interval (0.2 с), команды сливаются
+    stage.submit((FORWARD, 110), (FORWARD, 110))
+    stage.submit((FORWARD, 120), (FORWARD, 120))
+    stage.submit((BACKWARD, 130), (FORWARD, 130))
+    assert wait_for(lambda: stage.i2c_writes == 2)
+    time.sleep(stage.min_interval + 0.05)
+    assert stage.coalesced == 2
+    assert stage.i2c_writes == 2
+    assert stage._applied == [(BACKWARD, 130), (FORWARD, 130)]
+    words = channel_words(hat._pwm.i2c.blocks[-1])
+    assert words[MOTOR_CHANNELS[1][0]] == (0, 130 * 16)
+    assert words[MOTOR_CHANNELS[2][0]] == (0, 130 * 16)
+
+
+def test_auto_increment_restored_after_reset():
+    hat, stage = make_stage()
+    stage.apply((FORWARD, 100), (FORWARD, 100))
+    i2c = hat._pwm.i2c
+    i2c.registers[MODE1] = 0  # PWM() на том же адресе
+    stage.invalidate()
+    stage.apply((FORWARD, 120), (FORWARD, 100))
+    assert i2c.registers[MODE1] & MODE1_AI
+    assert len(i2c.blocks) == 2
+
+
+def test_falls_back_without_auto_increment():
+    hat, stage = make_stage()
+    i2c = hat._pwm.i2c
+    i2c.sticky_ai = False
+    i2c.registers[MODE1] = 0
+    stage.invalidate()
+    stage.apply((BACKWARD, 90), (RELEASE, 0))
+    assert not i2c.blocks
+    left, right = hat.getMotor(1), hat.getMotor(2)
+    assert (left.mode, left.speed) == (BACKWARD, 90)
+    assert (right.mode, right.speed) == (RELEASE, 0)
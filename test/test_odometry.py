@@ -0,0 +1,114 @@
+"""Интегрирование позы OdometryIntegrator по тикам энкодеров"""
+
+import math
+
+from my_robot.hardware.kinematics import KinematicsModel
+from my_robot.hardware.odometry import ARC, EULER, INTEGRATION_METHODS, MIDPOINT
+from my_robot.hardware.odometry import OdometryIntegrator
+import pytest
+
+WHEEL_BASE = 0.2
+KINEMATICS = KinematicsModel(WHEEL_BASE, 0.065, 20)
+STEP = KINEMATICS.meters_per_tick
+
+
+def approx(value, rel=1e-9):
+    return pytest.approx(value, rel=rel, abs=1e-12)
+
+
+@pytest.mark.parametrize('method', INTEGRATION_METHODS)
+def test_straight_line(method):
+    odometry = OdometryIntegrator(KINEMATICS, method)
+    for _ in range(5):
+        odometry.add_ticks(10, 10)
+    x, y, theta = odometry.pose()
+    assert x == approx(50 * STEP)
+    assert y == approx(0.0)
+    assert theta == approx(0.0)
+
+
+@pytest.mark.parametrize('method', INTEGRATION_METHODS)
+def test_pure_rotation(method):
+    odometry = OdometryIntegrator(KINEMATICS, method)
+    for _ in range(4):
+        odometry.add_ticks(-10, 10)
+    x, y, theta = odometry.pose()
+    assert x == approx(0.0)
+    assert y == approx(0.0)
+    assert theta == approx(4 * 20 * STEP / WHEEL_BASE)
+
+
+def arc_pose(left, right):
+    """Точная поза после дуги: left/right - путь колёс (м)"""
+    theta = (right - left) / WHEEL_BASE
+    radius = (left + right) * 0.5 / theta
+    return radius * math.sin(theta), radius * (1.0 - math.cos(theta)), theta
+
+
+def test_known_arc_exact():
+    odometry = OdometryIntegrator(KINEMATICS, ARC)
+    odometry.add_ticks(30, 60)
+    x, y, theta = odometry.pose()
+    expected = arc_pose(30 * STEP, 60 * STEP)
+    assert (x, y, theta) == pytest.approx(expected, rel=1e-9)
+
+
+@pytest.mark.parametrize('method, tolerance', ((MIDPOINT, 0.5), (EULER, 2.0)))
+def test_known_arc_small_steps(method, tolerance):
+    odometry = OdometryIntegrator(KINEMATICS, method)
+    for _ in range(30):
+        odometry.add_ticks(1, 2)
+    x, y, theta = odometry.pose()
+    expected = arc_pose(30 * STEP, 60 * STEP)
+    assert theta == approx(expected[2])
+    # Ошибка положения в тиках (у EULER первый порядок)
+    assert math.hypot(x - expected[0], y - expected[1]) < tolerance * STEP
+
+
+@pytest.mark.parametrize('direction', (1, -1))
+def test_ticks_follow_direction(direction):
+    odometry = OdometryIntegrator(KINEMATICS)
+    for i in range(40):
+        now = i * 0.01
+        odometry.add_tick(0, now, direction)
+        odometry.add_tick(1, now, direction)
+    x, y, theta = odometry.pose()
+    # Первый тик с места - без экстраполяции второго колеса
+    assert x == pytest.approx(direction * 40 * STEP, abs=0.01 * STEP)
+    assert abs(y) < 0.1 * STEP
+    assert theta == approx(0.0)
+    assert odometry.ticks == 80
+
+
+def test_reverse_rotation_from_ticks():
+    odometry = OdometryIntegrator(KINEMATICS)
+    for i in range(40):
+        now = i * 0.01
+        odometry.add_tick(0, now, 1)
+        odometry.add_tick(1, now, -1)
+    x, y, theta = odometry.pose()
+    assert math.hypot(x, y) < 0.1 * STEP
+    assert theta == approx(-40 * 2 * STEP / WHEEL_BASE)
+
+
+def test_interleaved_ticks_keep_heading():
+    """Тики колёс вперемежку не превращаются в повороты вокруг колеса
+
+    Сдвиг фаз энкодеров неотличим от разворота на полтика: курс
+    отклоняется не больше чем на полтика и не накапливается.
+    """
+    odometry = OdometryIntegrator(KINEMATICS)
+    for i in range(100):
+        now = i * 0.01
+        odometry.add_tick(0, now, 1)
+        odometry.add_tick(1, now + 0.005, 1)
+    x, y, theta = odometry.pose()
+    limit = 0.5 * STEP / WHEEL_BASE + 1e-9
+    assert abs(theta) < limit
+    assert x == pytest.approx(100 * STEP, abs=STEP)
+    assert abs(y) < limit * x + STEP
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        OdometryIntegrator(KINEMATICS, 'rk4')
@@ -0,0 +1,110 @@
+"""PoseTrail: прореживание, переход между уровнями и сжатие последнего уровня"""
+
+import math
+
+from my_robot.hardware.pose_trail import PoseTrail
+import pytest
+
+
+def drive(trail, count, step=0.1, start=0):
+    """Прямая вдоль x с шагом step, одна поза в 10 мс"""
+    for i in range(start, start + count):
+        trail.add(i * 10_000_000, i * step, 0.0, 0.0)
+
+
+def seqs(trail):
+    return [point[0] for point in trail.points()]
+
+
+def test_decimation_by_distance_and_angle():
+    trail = PoseTrail(capacity=16, levels=1, min_distance=0.05, min_angle=0.26)
+    assert trail.add(0, 0.0, 0.0, 0.0)
+    assert not trail.add(1, 0.04, 0.0, 0.0)
+    assert trail.add(2, 0.05, 0.0, 0.0)
+    assert trail.add(3, 0.05, 0.0, 0.3)          # Поворот на месте
+    assert not trail.add(4, 0.05, 0.0, 0.3 + 0.2)
+    assert trail.offered == 5
+    assert len(trail) == 3
+
+
+def test_angle_wraps_around_pi():
+    trail = PoseTrail(capacity=16, levels=1, min_angle=0.26)
+    trail.add(0, 0.0, 0.0, math.pi - 0.05)
+    assert not trail.add(1, 0.0, 0.0, -math.pi + 0.05)  # 0.1 рад, а не 2pi - 0.1
+
+
+def test_times_relative_to_first_point():
+    trail = PoseTrail(capacity=8, levels=1)
+    trail.add(5_000_000_000, 0.0, 0.0, 0.0)
+    trail.add(5_250_000_000, 1.0, 0.0, 0.0)
+    times = [point[1] for point in trail.points()]
+    assert times == pytest.approx([0.0, 0.25])
+
+
+def test_level_wrap_promotes_oldest():
+    trail = PoseTrail(capacity=4, levels=2, min_distance=0.05, factor=2.0)
+    drive(trail, 6)
+    level0, level1 = trail.levels
+    # Две старые точки ушли на уровень 1, уровень 0 - кольцо с head != 0
+    assert (level0.size, level1.size) == (4, 2)
+    assert level0.head == 2
+    assert [p[0] for p in level0.points()] == [3, 4, 5, 6]
+    assert seqs(trail) == [1, 2, 3, 4, 5, 6]
+    xs = [point[2] for point in trail.points()]
+    assert xs == pytest.approx([i * 0.1 for i in range(6)])
+
+
+def test_promotion_decimated_by_next_level():
+    trail = PoseTrail(capacity=4, levels=2, min_distance=0.09, factor=3.0)
+    drive(trail, 10)
+    # Уровень 1 принимает точки через 0.27 м: из вытесненных 1..6 - 1 и 4
+    assert [p[0] for p in trail.levels[1].points()] == [1, 4]
+    assert trail.dropped == 4
+    assert seqs(trail) == [1, 4, 7, 8, 9, 10]
+
+
+def test_last_level_compaction():
+    trail = PoseTrail(capacity=4, levels=1, min_distance=0.05)
+    drive(trail, 5)
+    level = trail.levels[0]
+    # Заполненный уровень сжат через одну точку, начало прогона сохранено
+    assert trail.compactions == 1
+    assert seqs(trail) == [1, 3, 5]
+    assert level.min_distance == pytest.approx(0.1)
+    assert level.last == pytest.approx((0.4, 0.0, 0.0))
+
+
+def test_repeated_compaction_with_promotion():
+    trail = PoseTrail(capacity=4, levels=2, min_distance=0.05, factor=2.0)
+    drive(trail, 30)
+    last = trail.levels[1]
+    # Последний уровень сжимается снова и снова, шаг каждый раз вдвое
+    assert trail.compactions >= 2
+    assert last.min_distance == pytest.approx(0.1 * 2 ** trail.compactions)
+    order = seqs(trail)
+    assert order[0] == 1
+    assert order[-4:] == [27, 28, 29, 30]
+    assert order == sorted(order)
+    times = [point[1] for point in trail.points()]
+    assert times == sorted(times)
+
+
+def test_long_run_bounded_memory():
+    trail = PoseTrail(capacity=32, levels=3, min_distance=0.05, factor=4.0)
+    nbytes = trail.nbytes
+    drive(trail, 20000)
+    assert trail.nbytes == nbytes
+    assert len(trail) <= 3 * 32
+    order = seqs(trail)
+    assert order[0] == 1 and order[-1] == 20000
+    assert order == sorted(order)
+    stats = trail.stats()
+    assert stats['accepted'] == 20000
+    assert stats['points'] == len(trail)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        PoseTrail(capacity=1)
+    with pytest.raises(ValueError):
+        PoseTrail(levels=0)
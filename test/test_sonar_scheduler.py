@@ -0,0 +1,120 @@
+"""SonarScheduler: порядок запусков и пауза от взаимных помех"""
+
+import math
+
+from my_robot.hardware.sonar_scheduler import SonarScheduler
+import pytest
+
+SETTLE = 0.025
+# front и front_left мешают друг другу (оси ближе 0.8 рад), left - ни с кем
+SENSORS = [('front', 0.0), ('front_left', 0.5), ('left', math.pi / 2)]
+
+
+def make_scheduler(sensors=SENSORS):
+    return SonarScheduler(sensors, min_rate=5.0, max_rate=30.0,
+                          crosstalk_angle=0.8, settle=SETTLE)
+
+
+def ping(scheduler, name, now):
+    scheduler.fired(name, now)
+    scheduler.finished(name)
+
+
+def test_crosstalk_pairs():
+    scheduler = make_scheduler()
+    assert scheduler.crosstalk('front', 'front_left')
+    assert scheduler.crosstalk('front_left', 'front')
+    assert not scheduler.crosstalk('front', 'left')
+    assert not scheduler.crosstalk('front_left', 'left')
+
+
+def test_crosstalk_wraps_around():
+    scheduler = make_scheduler([('a', math.pi - 0.1), ('b', -math.pi + 0.1)])
+    assert scheduler.crosstalk('a', 'b')
+
+
+def test_most_overdue_first():
+    scheduler = make_scheduler([('a', 0.0), ('b', math.pi / 2), ('c', math.pi)])
+    ping(scheduler, 'a', 0.00)
+    ping(scheduler, 'b', 0.05)
+    ping(scheduler, 'c', 0.02)
+    # next_due: a=0.20, c=0.22, b=0.25
+    assert scheduler.select(0.30) == ['a', 'c', 'b']
+    assert scheduler.select(0.21) == ['a']
+
+
+def test_neighbours_not_fired_together():
+    scheduler = make_scheduler()
+    ping(scheduler, 'front_left', 0.0)
+    ping(scheduler, 'front', 0.01)
+    # Оба просрочены: первым самый просроченный, его сосед ждёт.
+    # left ещё не запускался - он просрочен больше всех
+    assert scheduler.select(1.0) == ['left', 'front_left']
+
+
+def test_neighbour_waits_for_echo_in_flight():
+    scheduler = make_scheduler()
+    scheduler.fired('front', 0.0)
+    # До конца эха соседа front_left не запускается, left - независимо
+    assert scheduler.select(0.0) == ['left']
+    ping(scheduler, 'left', 0.0)
+    assert scheduler.select(1.0) == ['left']
+    assert scheduler.next_time(1.0) == pytest.approx(0.2)  # Только left
+
+
+def test_neighbour_waits_settle_after_echo():
+    scheduler = make_scheduler()
+    scheduler.hold('left', 10.0)
+    scheduler.fired('front', 1.0)
+    scheduler.finished('front')
+    assert scheduler.select(1.0 + SETTLE / 2) == []
+    assert scheduler.next_time(1.0) == pytest.approx(1.0 + SETTLE)
+    assert scheduler.select(1.0 + SETTLE) == ['front_left']
+
+
+def test_hold_delays_sensor():
+    scheduler = make_scheduler()
+    scheduler.hold('left', 0.5)
+    assert 'left' not in scheduler.select(0.1)
+    assert 'left' in scheduler.select(0.5)
+
+
+def test_set_yaw_updates_neighbours():
+    scheduler = make_scheduler()
+    scheduler.set_yaw('left', 0.3)
+    assert scheduler.crosstalk('left', 'front')
+    scheduler.fired('front', 0.0)
+    assert 'left' not in scheduler.select(0.0)
+
+
+def test_set_motion_rates():
+    scheduler = make_scheduler()
+    scheduler.set_rate('front_left', 12.0)
+    scheduler.set_motion(0.2, 0.0)
+    states = scheduler.states
+    assert states['front'].rate == pytest.approx(30.0)
+    assert states['left'].rate == pytest.approx(5.0)
+    assert states['front_left'].rate == pytest.approx(12.0)
+    scheduler.set_motion(0.0, -0.5)
+    assert states['front'].rate == pytest.approx(5.0)
+    assert states['left'].rate == pytest.approx(17.5)
+    assert states['front_left'].rate == pytest.approx(12.0)
+
+
+def test_speed_up_applies_immediately():
+    scheduler = make_scheduler()
+    ping(scheduler, 'front', 0.0)
+    assert scheduler.states['front'].next_due == pytest.approx(0.2)
+    scheduler.set_motion(0.2, 0.0)
+    assert scheduler.states['front'].next_due == pytest.approx(1.0 / 30.0)
+
+
+def test_stats_rates():
+    scheduler = make_scheduler()
+    scheduler.select(0.0)
+    for i in range(5):
+        ping(scheduler, 'left', i * 0.2)
+    stats = scheduler.stats(1.0)
+    assert stats['left_hz'] == 5.0
+    assert stats['front_hz'] == 0.0
+    assert stats['left_target_hz'] == 5.0